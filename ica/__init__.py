@@ -5,15 +5,28 @@
 from ica.core import (
     DataFrameNamespace,
     get_dataframes,
+    get_attachment_counts,
+    get_transcript_page,
+    iter_transcript_pages,
     output_results,
     get_sql_connection,
     execute_sql_query,
+    use_chat_database_snapshot,
 )
+from ica.database import ReadProfile
+from ica.rollup import get_daily_rollup, get_rollup
+from ica.sessions import get_session_ids
+from ica.features import get_feature, register_feature
+from ica.analyzer import AnalyzerResult, run_analyzer_module
 from ica.exceptions import (
     BaseAnalyzerException,
     ContactNotFoundError,
     ContactWithSameNameError,
     ConversationNotFoundError,
     DateRangeInvalidError,
+    FeatureNotFoundError,
     FormatNotSupportedError,
+    SearchIndexNotFoundError,
+    SearchQueryInvalidError,
+    WarehouseNotFoundError,
 )
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+import ast
+import sys
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from types import ModuleType
+from typing import Optional
+
+import pandas as pd
+
+import ica
+from ica.cli import TypedCLIArguments, use_snapshot
+from ica.core import DataFrameNamespace
+from ica.exceptions import FeatureNotFoundError
+from ica.features import FEATURE_REGISTRY, get_feature
+
+
+@dataclass
+class AnalyzerResult:
+    """
+    The dataframe produced by an analyzer module's analyze() function, along
+    with any labels to use when outputting it
+    """
+
+    df: pd.DataFrame
+    prettified_label_overrides: Optional[dict[str, str]] = None
+
+
+def is_analyzer_module(module: ModuleType) -> bool:
+    """
+    Determine whether the given module implements the analyzer interface (as
+    opposed to being a script which loads and outputs its own data)
+    """
+    return callable(getattr(module, "analyze", None))
+
+
+def is_analyzer_module_file(path: str) -> bool:
+    """
+    Determine whether the Python file at the given path implements the analyzer
+    interface (i.e. defines a top-level analyze() function), without executing
+    the file
+    """
+    return any(
+        isinstance(node, ast.FunctionDef) and node.name == "analyze"
+        for node in ast.parse(Path(path).read_text(), filename=path).body
+    )
+
+
+def get_analyzer_cli_args(
+    module: ModuleType, args: Optional[Sequence[str]] = None
+) -> TypedCLIArguments:
+    """
+    Parse the CLI arguments (by default, those in sys.argv) for the given
+    analyzer module, including any additional arguments added by its
+    add_cli_arguments() function
+    """
+    cli_parser = ica.get_cli_parser()
+    add_cli_arguments = getattr(module, "add_cli_arguments", None)
+    if add_cli_arguments:
+        add_cli_arguments(cli_parser)
+    cli_args = cli_parser.parse_args(
+        args, namespace=getattr(module, "CLI_ARGUMENTS", TypedCLIArguments)()
+    )
+    if cli_args.workers is not None and cli_args.workers < 1:
+        cli_parser.error("--workers must be at least 1")
+    return cli_args
+
+
+def validate_analyzer_features(module: ModuleType) -> None:
+    """
+    Raise an error if the given analyzer module declares a derived feature which
+    has not been registered
+    """
+    for feature_name in getattr(module, "FEATURES", ()):
+        if feature_name not in FEATURE_REGISTRY:
+            raise FeatureNotFoundError(
+                f'No feature named "{feature_name}" has been registered'
+            )
+
+
+def get_analyzer_dataframes(
+    module: ModuleType, cli_args: TypedCLIArguments, compute_features: bool = True
+) -> DataFrameNamespace:
+    """
+    Load the dataframes for the given analyzer module, and (unless
+    compute_features is False) compute every derived feature it declares, so
+    that each is computed once, up front, no matter how many analyzers use it
+    """
+    validate_analyzer_features(module)
+    dfs = ica.get_dataframes(
+        contacts=cli_args.contacts,
+        timezone=cli_args.timezone,
+        from_date=cli_args.from_date,
+        to_date=cli_args.to_date,
+        from_people=cli_args.from_people,
+        read_profile=cli_args.read_profile,
+        **getattr(module, "DATAFRAME_OPTIONS", {}),
+    )
+    if compute_features:
+        for feature_name in getattr(module, "FEATURES", ()):
+            get_feature(dfs, feature_name)
+    return dfs
+
+
+def run_analyzer_module(module: ModuleType) -> None:
+    """
+    Run the given analyzer module from the command line: parse its arguments,
+    load the conversation (or every conversation, one at a time), pass both to
+    its analyze() function, and output the result
+    """
+    cli_args = get_analyzer_cli_args(module)
+    # An analyzer run through the `ica` command reuses the snapshot (if any)
+    # which was already taken for it
+    with use_snapshot(cli_args):
+        if cli_args.all_conversations:
+            from ica.conversations import analyze_all_conversations
+
+            result = analyze_all_conversations(module, cli_args, sys.argv[1:])
+        else:
+            dfs = get_analyzer_dataframes(module, cli_args)
+            result = module.analyze(dfs, cli_args)
+    ica.output_results(
+        result.df,
+        format=cli_args.format,
+        output=cli_args.output,
+        prettified_label_overrides=result.prettified_label_overrides,
+    )
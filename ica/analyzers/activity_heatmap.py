@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+import argparse
+import calendar
+import sys
+
+import numpy as np
+import pandas as pd
+
+import ica
+from ica.timestamps import get_local_codes
+
+# The derived features used by this analyzer (see ica.features)
+FEATURES = ("non_reaction_messages", "all_participants")
+
+# The number of days in a week and hours in a day, i.e. the shape of the heatmap
+WEEKDAY_COUNT = 7
+HOUR_COUNT = 24
+
+
+class ActivityHeatmapCLIArguments(ica.TypedCLIArguments):
+    """Additional CLI arguments specific to the activity_heatmap analyzer"""
+
+    by_sender: bool
+
+
+CLI_ARGUMENTS = ActivityHeatmapCLIArguments
+
+
+def add_cli_arguments(cli_parser: argparse.ArgumentParser) -> None:
+    """
+    Add the CLI arguments specific to this analyzer
+    """
+    cli_parser.add_argument(
+        "--by-sender",
+        action="store_true",
+        help="if specified, outputs a separate heatmap for each sender (one "
+        "after the other) instead of a single heatmap for everyone",
+    )
+
+
+def get_activity_heatmaps(messages: pd.DataFrame, senders: list[str]) -> np.ndarray:
+    """
+    Count the given messages by sender, (local) day of the week, and (local)
+    hour of the day, returning an array of shape (senders, 7, 24) where Monday
+    is the first day of the week; messages from any other sender are ignored
+    """
+    # The hour codes number every local hour since 1970, from which both the
+    # hour of the day and the day of the week can be derived arithmetically
+    hour_codes = get_local_codes(messages, "hour")
+    # 1970-01-01 was a Thursday, so shift every day code such that Monday is 0
+    weekdays = (hour_codes // HOUR_COUNT + 3) % WEEKDAY_COUNT
+    hours = hour_codes % HOUR_COUNT
+    sender_indices = pd.Index(senders).get_indexer(messages["sender_display_name"])
+    is_known_sender = sender_indices >= 0
+    # Number every (sender, weekday, hour) cell so that all of them can be
+    # counted at once
+    cell_codes = (
+        sender_indices[is_known_sender] * WEEKDAY_COUNT + weekdays[is_known_sender]
+    ) * HOUR_COUNT + hours[is_known_sender]
+    return np.bincount(
+        cell_codes, minlength=len(senders) * WEEKDAY_COUNT * HOUR_COUNT
+    ).reshape(len(senders), WEEKDAY_COUNT, HOUR_COUNT)
+
+
+def analyze(
+    dfs: ica.DataFrameNamespace, cli_args: ActivityHeatmapCLIArguments
+) -> ica.AnalyzerResult:
+    """
+    Generates a heatmap of the number of messages sent in each hour of each day
+    of the week, in total or for each sender
+    """
+    senders = ["Me"] + ica.get_feature(dfs, "all_participants")
+    heatmaps = get_activity_heatmaps(
+        ica.get_feature(dfs, "non_reaction_messages"), senders
+    )
+    weekdays = pd.Index(list(calendar.day_name), name="weekday")
+    hours = pd.RangeIndex(HOUR_COUNT)
+
+    if not cli_args.by_sender:
+        return ica.AnalyzerResult(
+            pd.DataFrame(heatmaps.sum(axis=0), index=weekdays, columns=hours)
+        )
+
+    return ica.AnalyzerResult(
+        pd.concat(
+            [
+                pd.DataFrame(heatmap, index=weekdays, columns=hours).assign(
+                    sender=sender
+                )
+                for sender, heatmap in zip(senders, heatmaps)
+            ]
+        ).loc[:, ["sender", *hours]]
+    )
+
+
+def main() -> None:
+    """
+    Generates a heatmap of the number of messages sent in each hour of each day
+    of the week, in total or for each sender
+    """
+    ica.run_analyzer_module(sys.modules[__name__])
+
+
+if __name__ == "__main__":
+    main()
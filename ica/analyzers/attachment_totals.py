@@ -1,62 +1,217 @@
 #!/usr/bin/env python3
 
+import argparse
+import sys
+from collections.abc import Mapping, Sequence
+from typing import Optional
 
 import pandas as pd
 
 import ica
 
+# The domains of the links counted by each link category; domains are compared
+# case-insensitively and without any leading "www."
+LINK_CATEGORIES: dict[str, tuple[str, ...]] = {
+    "youtube_videos": ("youtube.com", "youtu.be"),
+    "apple_music": ("music.apple.com",),
+    "spotify": ("open.spotify.com",),
+}
 
-# Count the number of occurrences of the given regular expression pattern within
-# the provided Series
-def count_occurrences(series: pd.Series, pattern: str) -> int:
-    return series.str.count(pattern).sum()
 
+# The derived features used by this analyzer (see ica.features)
+FEATURES = (
+    "non_reaction_messages",
+    "links",
+    "all_participants",
+    "display_names_by_handle",
+)
 
-def main() -> None:
+# Attachments are counted by SQLite instead, as the conversation is loaded (see
+# ica.get_dataframes()), so there is no need to load every attachment; the
+# extension classes distinguish audio messages from other audio files
+DATAFRAME_OPTIONS = {
+    "include_attachments": False,
+    "attachment_count_extensions": ("caf", "m4a"),
+}
+
+
+class AttachmentTotalsCLIArguments(ica.TypedCLIArguments):
+    """Additional CLI arguments specific to the attachment_totals analyzer"""
+
+    link_categories: Optional[list[tuple[str, str]]]
+    by_sender: bool
+
+
+CLI_ARGUMENTS = AttachmentTotalsCLIArguments
+
+
+def parse_link_category(value: str) -> tuple[str, str]:
+    """
+    Parse a user-supplied link category of the form CATEGORY=DOMAIN
+    """
+    category, separator, domain = value.partition("=")
+    if not category or not separator or not domain:
+        raise argparse.ArgumentTypeError(
+            f'"{value}" must be of the form CATEGORY=DOMAIN'
+        )
+    return category, domain.lower().removeprefix("www.")
+
+
+def get_link_totals(
+    links: pd.DataFrame,
+    sender_columns: pd.Series,
+    link_categories: Mapping[str, Sequence[str]],
+) -> pd.DataFrame:
+    """
+    Count the given links (as extracted by ica.text.get_link_occurrences()) for
+    every link category, broken down by sender; every link is classified by its
+    domain, so adding more categories costs nothing extra; a link is counted in
+    every category which lists its domain
+    """
+    categories_by_domain = pd.DataFrame(
+        [
+            (domain, category)
+            for category, domains in link_categories.items()
+            for domain in domains
+        ],
+        columns=pd.Index(["domain", "type"]),
+    ).drop_duplicates()
+    return (
+        pd.DataFrame(
+            {
+                "domain": links["domain"],
+                "sender_column": sender_columns.loc[links.index],
+            }
+        )
+        .merge(categories_by_domain, on="domain")
+        .groupby(["type", "sender_column"])
+        .size()
+        .unstack(fill_value=0)
+        .reindex(index=list(link_categories.keys()), fill_value=0)
+    )
+
+
+def get_attachment_type_totals(
+    attachment_counts: pd.DataFrame, sender_columns: pd.Series
+) -> pd.DataFrame:
+    """
+    Count the attachments of each notable type, broken down by sender, from the
+    aggregate attachment counts by MIME type and extension class
+    """
+    return (
+        pd.DataFrame(
+            {
+                "gifs": attachment_counts["mime_type"].eq("image/gif"),
+                "audio_messages": attachment_counts["extension_class"].eq("caf"),
+                "audio_files": attachment_counts["extension_class"].eq("m4a"),
+                "recorded_videos": attachment_counts["mime_type"].eq("video/quicktime"),
+            }
+        )
+        .mul(attachment_counts["count"], axis="index")
+        .groupby(sender_columns)
+        .sum()
+        .T
+    )
+
+
+def add_cli_arguments(cli_parser: argparse.ArgumentParser) -> None:
+    """
+    Add the CLI arguments specific to this analyzer
+    """
+    cli_parser.add_argument(
+        "--link-category",
+        type=parse_link_category,
+        action="append",
+        dest="link_categories",
+        help="an additional category of links to count, of the form "
+        "CATEGORY=DOMAIN (e.g. tiktok_videos=tiktok.com); pass this flag "
+        "multiple times to count multiple domains",
+    )
+    cli_parser.add_argument(
+        "--by-sender",
+        action="store_true",
+        help="if specified, breaks down every total by sender",
+    )
+
+
+def analyze(
+    dfs: ica.DataFrameNamespace, cli_args: AttachmentTotalsCLIArguments
+) -> ica.AnalyzerResult:
     """
     Generate count data by attachment type, including number of Spotify links
     shared, YouTube videos, Apple Music, etc.
     """
-    cli_args = ica.get_cli_parser().parse_args(namespace=ica.TypedCLIArguments())
-    dfs = ica.get_dataframes(
-        contacts=cli_args.contacts,
-        timezone=cli_args.timezone,
-        from_date=cli_args.from_date,
-        to_date=cli_args.to_date,
-        from_people=cli_args.from_people,
-    )
-
-    is_reaction = dfs.messages["is_reaction"]
-    totals_map = {
-        "gifs": dfs.attachments["mime_type"].eq("image/gif").sum(),
-        "youtube_videos": count_occurrences(
-            dfs.messages[is_reaction.eq(False)]["text"],
-            r"(https?://(?:www\.)(?:youtube\.com|youtu\.be)/(?:.*?)(?:\s|$))",
-        ),
-        "apple_music": count_occurrences(
-            dfs.messages[is_reaction.eq(False)]["text"],
-            r"(https?://(?:music\.apple\.com)/(?:.*?)(?:\s|$))",
+    attachment_counts = dfs.attachment_counts
+    if attachment_counts is None:
+        raise ValueError(
+            "The attachments must be counted as the conversation is loaded (see "
+            "DATAFRAME_OPTIONS)"
+        )
+
+    link_categories = {
+        category: list(domains) for category, domains in LINK_CATEGORIES.items()
+    }
+    for category, domain in cli_args.link_categories or []:
+        link_categories.setdefault(category, []).append(domain)
+
+    # Attribute every message and attachment to "Me" or to the display name of
+    # the participant who sent it
+    all_participants = ica.get_feature(dfs, "all_participants")
+    messages = ica.get_feature(dfs, "non_reaction_messages")
+    link_totals = get_link_totals(
+        ica.get_feature(dfs, "links"),
+        sender_columns=messages["sender_display_name"].where(
+            ~messages["is_from_me"], "Me"
         ),
-        "spotify": count_occurrences(
-            dfs.messages[is_reaction.eq(False)]["text"],
-            r"(https?://(?:open\.spotify\.com)/(?:.*?)(?:\s|$))",
+        link_categories=link_categories,
+    )
+    attachment_type_totals = get_attachment_type_totals(
+        attachment_counts,
+        sender_columns=attachment_counts["sender_handle"]
+        .map(ica.get_feature(dfs, "display_names_by_handle"))
+        .where(~attachment_counts["is_from_me"], "Me"),
+    )
+
+    totals = (
+        pd.concat(
+            [
+                attachment_type_totals.loc[["gifs"]],
+                link_totals,
+                attachment_type_totals.drop(index="gifs"),
+            ]
+        )
+        .reindex(columns=["Me", *all_participants], fill_value=0)
+        .fillna(0)
+        .astype(int)
+        .rename(
+            columns=lambda col: "total_from_me" if col == "Me" else f"total_from_{col}"
+        )
+        .rename_axis(index="type", columns=None)
+    )
+    totals.insert(0, "total", totals.sum(axis=1))
+
+    return ica.AnalyzerResult(
+        (totals if cli_args.by_sender else totals[["total"]]).sort_values(
+            by="total", ascending=False
         ),
-        "audio_messages": (dfs.attachments["filename"].str.endswith(".caf").sum()),
-        "audio_files": (dfs.attachments["filename"].str.endswith(".m4a").sum()),
-        "recorded_videos": (dfs.attachments["mime_type"].eq("video/quicktime").sum()),
-    }
-    ica.output_results(
-        pd.DataFrame({"type": totals_map.keys(), "total": totals_map.values()})
-        .set_index("type")
-        .sort_values(by="total", ascending=False),
-        format=cli_args.format,
-        output=cli_args.output,
         prettified_label_overrides={
             "youtube_videos": "YouTube Videos",
             "gifs": "GIFs",
+            **{
+                f"total_from_{display_name}": f"Total From {display_name}"
+                for display_name in all_participants
+            },
         },
     )
 
 
+def main() -> None:
+    """
+    Generate count data by attachment type, including number of Spotify links
+    shared, YouTube videos, Apple Music, etc.
+    """
+    ica.run_analyzer_module(sys.modules[__name__])
+
+
 if __name__ == "__main__":
     main()
@@ -1,9 +1,18 @@
 #!/usr/bin/env python3
-import re
+import argparse
+import contextlib
+import sys
+from typing import Optional
 
+import numpy as np
 import pandas as pd
 
 import ica
+from ica.text import PhraseMatcher
+from ica.token_index import TokenIndex, get_token_index
+
+# The derived features used by this analyzer (see ica.features)
+FEATURES = ("non_reaction_messages", "all_participants")
 
 
 class CountPhrasesArgumentParser(ica.TypedCLIArguments):
@@ -12,6 +21,11 @@ class CountPhrasesArgumentParser(ica.TypedCLIArguments):
     phrases: list[str]
     use_regex: bool
     case_sensitive: bool
+    whole_words: bool
+    use_index: bool
+
+
+CLI_ARGUMENTS = CountPhrasesArgumentParser
 
 
 def get_phrase_counts(
@@ -20,40 +34,60 @@ def get_phrase_counts(
     all_participants: list[str],
     use_regex: bool = False,
     case_sensitive: bool = False,
+    whole_words: bool = False,
+    token_index: Optional[TokenIndex] = None,
 ) -> pd.DataFrame:
-    patterns = [phrase if use_regex else re.escape(phrase) for phrase in phrases]
-    flags = 0 if case_sensitive else re.IGNORECASE
+    matcher = PhraseMatcher(
+        phrases,
+        use_regex=use_regex,
+        case_sensitive=case_sensitive,
+        whole_words=whole_words,
+    )
+    # Scan every message exactly once for all phrases (or, if a token index is
+    # supplied, only the messages which could contain them), then attribute the
+    # hits to each sender with a single groupby (rather than rescanning the
+    # messages for every phrase and every sender)
+    if token_index:
+        token_index.update(messages_df)
+        hits = token_index.get_phrase_hits(messages_df, matcher)
+    else:
+        hits = matcher.get_phrase_hits(messages_df["text"])
+    sender_columns = (
+        ("count_from_" + messages_df["sender_display_name"])
+        .where(~messages_df["is_from_me"], "count_from_me")
+        .to_numpy()
+    )
+    counts_by_sender = (
+        hits.assign(sender_column=sender_columns[hits["position"]])
+        .groupby(["phrase_index", "sender_column"])["count"]
+        .sum()
+        .unstack(fill_value=0)
+        .reindex(index=range(len(phrases)), fill_value=0)
+    )
 
     # Initialize data dictionary with total counts
     data = {
         "phrase": phrases,
-        "count": [
-            messages_df["text"].str.count(pattern, flags=flags).sum()
-            for pattern in patterns
-        ],
-        "count_from_me": [
-            messages_df[messages_df["is_from_me"]]["text"]
-            .str.count(pattern, flags=flags)
-            .sum()
-            for pattern in patterns
-        ],
+        "count": counts_by_sender.sum(axis=1).to_numpy(),
     }
 
-    # Add counts for each participant
-    for participant in all_participants:
-        participant_msgs = messages_df[
-            messages_df["sender_display_name"] == participant
-        ]
-        data[f"count_from_{participant}"] = [
-            participant_msgs["text"].str.count(pattern, flags=flags).sum()
-            for pattern in patterns
-        ]
+    # Add counts for "me" and for each participant
+    for column in ["count_from_me"] + [
+        f"count_from_{participant}" for participant in all_participants
+    ]:
+        data[column] = (
+            counts_by_sender[column].to_numpy()
+            if column in counts_by_sender
+            else np.zeros(len(phrases), dtype="int64")
+        )
 
     return pd.DataFrame(data).set_index("phrase")
 
 
-def main() -> None:
-    cli_parser = ica.get_cli_parser()
+def add_cli_arguments(cli_parser: argparse.ArgumentParser) -> None:
+    """
+    Add the CLI arguments specific to this analyzer
+    """
     cli_parser.add_argument("phrases", nargs="+", help="one or more phrases to count")
     cli_parser.add_argument(
         "--use-regex",
@@ -67,28 +101,39 @@ def main() -> None:
         action="store_true",
         help="if specified, treats phrases as case-sensitive",
     )
-    cli_args = cli_parser.parse_args(namespace=CountPhrasesArgumentParser())
-    dfs = ica.get_dataframes(
-        contacts=cli_args.contacts,
-        timezone=cli_args.timezone,
-        from_date=cli_args.from_date,
-        to_date=cli_args.to_date,
-        from_people=cli_args.from_people,
+    cli_parser.add_argument(
+        "--whole-words",
+        "-w",
+        action="store_true",
+        help="if specified, only counts phrases which start and end on word boundaries",
+    )
+    cli_parser.add_argument(
+        "--use-index",
+        action="store_true",
+        help="if specified, maintains a persistent word index of all counted "
+        "messages so that repeated counts only scan the relevant messages",
     )
 
-    all_participants = sorted(dfs.handles["display_name"].unique())
-    results = get_phrase_counts(
-        dfs.messages[~dfs.messages["is_reaction"]],
-        phrases=cli_args.phrases,
-        all_participants=all_participants,
-        use_regex=cli_args.use_regex,
-        case_sensitive=cli_args.case_sensitive,
-    )
 
-    ica.output_results(
+def analyze(
+    dfs: ica.DataFrameNamespace, cli_args: CountPhrasesArgumentParser
+) -> ica.AnalyzerResult:
+    all_participants = ica.get_feature(dfs, "all_participants")
+    with contextlib.ExitStack() as stack:
+        results = get_phrase_counts(
+            ica.get_feature(dfs, "non_reaction_messages"),
+            phrases=cli_args.phrases,
+            all_participants=all_participants,
+            use_regex=cli_args.use_regex,
+            case_sensitive=cli_args.case_sensitive,
+            whole_words=cli_args.whole_words,
+            token_index=(
+                stack.enter_context(get_token_index()) if cli_args.use_index else None
+            ),
+        )
+
+    return ica.AnalyzerResult(
         results,
-        format=cli_args.format,
-        output=cli_args.output,
         prettified_label_overrides={
             **{phrase: phrase for phrase in cli_args.phrases},
             **{
@@ -99,5 +144,9 @@ def main() -> None:
     )
 
 
+def main() -> None:
+    ica.run_analyzer_module(sys.modules[__name__])
+
+
 if __name__ == "__main__":
     main()
@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 
 import ica
+import ica.warehouse
+from ica.sessions import DEFAULT_SESSION_GAP, parse_session_gap
 
 
 def main() -> None:
@@ -9,18 +11,46 @@ def main() -> None:
     """
     parser = ica.get_cli_parser()
     parser.add_argument("query", help="the SQL query to execute")
+    parser.add_argument(
+        "--session-gap",
+        type=parse_session_gap,
+        default=DEFAULT_SESSION_GAP,
+        help="the length of silence (e.g. '30min' or '2h') after which a new "
+        "session begins, for the session_id column of the message_details view; "
+        "defaults to 1h",
+    )
+    parser.add_argument(
+        "--warehouse",
+        action="store_true",
+        help="also attach the warehouse built by `ica warehouse build`, whose "
+        "tables (e.g. warehouse.messages) hold every message in every "
+        "conversation; with --all-conversations, only the warehouse is queried",
+    )
     cli_args = parser.parse_args()
 
-    dfs = ica.get_dataframes(
-        contacts=cli_args.contacts,
-        timezone=cli_args.timezone,
-        from_date=cli_args.from_date,
-        to_date=cli_args.to_date,
-        from_people=cli_args.from_people,
-    )
+    if cli_args.all_conversations and cli_args.warehouse:
+        # Every conversation is already in the warehouse, so no conversation
+        # needs to be loaded
+        sql_connection = ica.warehouse.get_warehouse_connection()
+    else:
+        dfs = ica.get_dataframes(
+            contacts=cli_args.contacts,
+            timezone=cli_args.timezone,
+            from_date=cli_args.from_date,
+            to_date=cli_args.to_date,
+            from_people=cli_args.from_people,
+            read_profile=cli_args.read_profile,
+        )
+        sql_connection = ica.get_sql_connection(
+            dfs,
+            session_gap=cli_args.session_gap,
+            warehouse_path=(
+                ica.warehouse.WAREHOUSE_PATH if cli_args.warehouse else None
+            ),
+        )
 
     # Execute the query and print the resulting dataframe to stdout
-    with ica.get_sql_connection(dfs) as con:
+    with sql_connection as con:
         result_df = ica.execute_sql_query(cli_args.query, con)
         ica.output_results(
             result_df,
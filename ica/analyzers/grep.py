@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+import importlib.resources
+import os
+import re
+import sqlite3
+from typing import Optional
+
+import pandas as pd
+import tzlocal
+
+import ica
+import ica.core
+from ica.message_search import SearchScope, format_found_messages, get_search_scope
+from ica.text import get_required_literal
+
+# The columns read for every message by both grep_messages.sql and
+# grep_context.sql
+MESSAGE_COLUMNS = [
+    "ROWID",
+    "chat_id",
+    "sender_handle",
+    "is_from_me",
+    "date",
+    "text",
+    "attributedBody",
+]
+
+
+def build_literal_filter_clause(pattern: re.Pattern) -> tuple[str, list]:
+    """
+    Build a SQL WHERE clause fragment (and its parameters) which rules out the
+    messages that cannot match the given pattern, because they do not contain
+    the literal string which every match must contain; the text of a message
+    which only has an attributedBody is encoded as UTF-8 within it, so the
+    attributedBody can be searched without decoding it first
+    """
+    literal = get_required_literal(pattern.pattern, pattern.flags)
+    if not literal:
+        return "", []
+    # A literal without any cased characters (e.g. digits or emoji) is matched
+    # exactly, whether or not the pattern ignores case
+    if pattern.flags & re.IGNORECASE and literal.lower() != literal.upper():
+        # SQLite's lower() only folds ASCII characters, so any other literal
+        # cannot be searched case-insensitively (Python's case folding also
+        # equates a few exotic characters, such as the Kelvin sign, with ASCII
+        # letters, but these never appear in practice)
+        if not literal.isascii():
+            return "", []
+        return (
+            """
+            AND (
+                instr(lower("message"."text"), ?) > 0
+                OR (
+                    "message"."text" IS NULL
+                    AND instr(lower(CAST("message"."attributedBody" AS TEXT)), ?) > 0
+                )
+            )
+            """,
+            [literal.lower(), literal.lower()],
+        )
+    return (
+        """
+        AND (
+            instr("message"."text", ?) > 0
+            OR (
+                "message"."text" IS NULL
+                AND instr("message"."attributedBody", ?) > 0
+            )
+        )
+        """,
+        [literal, literal.encode("utf-8")],
+    )
+
+
+def decode_messages(messages: pd.DataFrame) -> pd.DataFrame:
+    """
+    Merge the decoded attributedBody of every message without any text into its
+    text column
+    """
+    return messages.assign(
+        text=lambda df: (
+            df["text"]
+            .fillna(
+                df.loc[df["text"].isna(), "attributedBody"]
+                .dropna()
+                .apply(ica.core.decode_message_attributedbody)
+            )
+            .fillna("")
+        ),
+        is_from_me=lambda df: df["is_from_me"].astype(bool),
+    ).drop(columns="attributedBody")
+
+
+def find_matching_messages(
+    search_scope: SearchScope,
+    pattern: re.Pattern,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    timezone: Optional[str] = None,
+    include_reactions: bool = False,
+) -> pd.DataFrame:
+    """
+    Find every message in the given scope (within the given date range) whose
+    text matches the given pattern, in the order they were sent; SQLite rules
+    out most non-matching messages before any of them are decoded
+    """
+    literal_filter_clause, literal_params = build_literal_filter_clause(pattern)
+    sender_filter_clause, sender_params = ica.core.build_sender_filter_clause(
+        search_scope.include_me, search_scope.sender_handles
+    )
+    chat_ids = search_scope.chat_ids
+    messages = pd.read_sql_query(
+        sql=importlib.resources.files("ica")
+        .joinpath(os.path.join("queries", "grep_messages.sql"))
+        .read_text()
+        .format(
+            chat_filter_clause=(
+                '"chat_message_join"."chat_id" IN ({})'.format(
+                    ", ".join("?" for _ in chat_ids)
+                )
+                if chat_ids is not None
+                else "1"
+            ),
+            literal_filter_clause=literal_filter_clause,
+            sender_filter_clause=sender_filter_clause,
+            date_filter_clause=ica.core.build_date_filter_clause(
+                from_date, to_date, timezone=timezone
+            ),
+        ),
+        con=search_scope.chat_con,
+        params=list(chat_ids or ()) + literal_params + sender_params,
+    ).pipe(decode_messages)
+    is_match = messages["text"].map(lambda text: pattern.search(text) is not None)
+    if not include_reactions:
+        is_match &= ~messages["text"].str.match(ica.core.REACTION_PATTERN)
+    return messages[is_match].reset_index(drop=True)
+
+
+def get_context_windows(
+    chat_con: sqlite3.Connection,
+    matches: pd.DataFrame,
+    before_count: int,
+    after_count: int,
+) -> pd.DataFrame:
+    """
+    Surround every matching message with the given number of messages before
+    and after it in the same chat, merging the windows of matches which overlap
+    or adjoin; the messages around each match are read by walking the chat's
+    index of ROWIDs away from the match (rather than reading the whole
+    conversation), and the windows are numbered in the order they were sent
+    """
+    query = (
+        importlib.resources.files("ica")
+        .joinpath(os.path.join("queries", "grep_context.sql"))
+        .read_text()
+    )
+    before_query = query.format(comparison_operator="<", sort_direction="DESC")
+    after_query = query.format(comparison_operator=">", sort_direction="ASC")
+
+    match_windows: dict[tuple, int] = {}
+    context_rows: list[tuple] = []
+    window_count = 0
+    window_chat_id = None
+    # The ROWID of the first message after the current window (or None if the
+    # window extends to the end of its chat), which the window of the next
+    # match must start at (or before) to be merged with it
+    next_rowid = None
+    for chat_id, rowid in sorted(zip(matches["chat_id"], matches["ROWID"])):
+        before_rows = (
+            chat_con.execute(
+                before_query,
+                {
+                    "chat_id": chat_id,
+                    "message_rowid": rowid,
+                    "message_count": before_count,
+                },
+            ).fetchall()[::-1]
+            if before_count
+            else []
+        )
+        # Read one more message than is needed, to find where the window ends
+        after_rows = chat_con.execute(
+            after_query,
+            {
+                "chat_id": chat_id,
+                "message_rowid": rowid,
+                "message_count": after_count + 1,
+            },
+        ).fetchall()
+        first_rowid = before_rows[0][0] if before_rows else rowid
+        if not (
+            window_count
+            and chat_id == window_chat_id
+            and (next_rowid is None or first_rowid <= next_rowid)
+        ):
+            window_count += 1
+            window_chat_id = chat_id
+        match_windows[(chat_id, rowid)] = window_count
+        context_rows.extend(
+            (window_count, *row) for row in before_rows + after_rows[:after_count]
+        )
+        next_rowid = (
+            after_rows[after_count][0] if len(after_rows) > after_count else None
+        )
+
+    windows = (
+        pd.concat(
+            [
+                matches.assign(
+                    window=[
+                        match_windows[key]
+                        for key in zip(matches["chat_id"], matches["ROWID"])
+                    ],
+                    is_match=True,
+                ),
+                pd.DataFrame(context_rows, columns=["window", *MESSAGE_COLUMNS])
+                .pipe(decode_messages)
+                .assign(is_match=False),
+            ],
+            ignore_index=True,
+        )
+        # A message within the window of another match is listed only once,
+        # as a match
+        .drop_duplicates(subset=["window", "ROWID"])
+    )
+    # Number the windows (from 1) in the order of their first messages
+    window_numbers = (
+        windows.groupby("window")["date"].min().rank(method="first").astype(int)
+    )
+    return (
+        windows.assign(window=lambda df: df["window"].map(window_numbers))
+        .sort_values(["window", "ROWID"])
+        .reset_index(drop=True)
+    )
+
+
+def main() -> None:
+    """
+    Search every message in the conversation (or in every conversation) for the
+    given regular expression, listing each matching message along with the
+    given number of messages around it
+    """
+    parser = ica.get_cli_parser()
+    parser.add_argument("pattern", help="the regular expression to search for")
+    parser.add_argument(
+        "--fixed-strings",
+        "-F",
+        action="store_true",
+        help="if specified, treats the pattern as a literal string rather than "
+        "a regular expression",
+    )
+    parser.add_argument(
+        "--case-sensitive",
+        "-s",
+        action="store_true",
+        help="if specified, treats the pattern as case-sensitive",
+    )
+    parser.add_argument(
+        "--before-context",
+        "-B",
+        type=int,
+        help="the number of messages to list before each matching message",
+    )
+    parser.add_argument(
+        "--after-context",
+        "-A",
+        type=int,
+        help="the number of messages to list after each matching message",
+    )
+    parser.add_argument(
+        "--context",
+        "-C",
+        type=int,
+        default=0,
+        help="the number of messages to list before and after each matching "
+        "message (unless overridden by --before-context or --after-context)",
+    )
+    parser.add_argument(
+        "--include-reactions",
+        action="store_true",
+        help="if specified, includes reactions which quote a matching message",
+    )
+    cli_args = parser.parse_args()
+    before_count = (
+        cli_args.before_context
+        if cli_args.before_context is not None
+        else cli_args.context
+    )
+    after_count = (
+        cli_args.after_context
+        if cli_args.after_context is not None
+        else cli_args.context
+    )
+    if before_count < 0 or after_count < 0:
+        parser.error("the number of messages of context cannot be negative")
+    try:
+        pattern = re.compile(
+            re.escape(cli_args.pattern) if cli_args.fixed_strings else cli_args.pattern,
+            flags=0 if cli_args.case_sensitive else re.IGNORECASE,
+        )
+    except re.error as error:
+        parser.error(f"invalid regular expression: {error}")
+    timezone = cli_args.timezone or tzlocal.get_localzone().key
+
+    with get_search_scope(cli_args) as search_scope:
+        messages = find_matching_messages(
+            search_scope,
+            pattern,
+            from_date=cli_args.from_date,
+            to_date=cli_args.to_date,
+            timezone=timezone,
+            include_reactions=cli_args.include_reactions,
+        )
+        columns = ["timestamp", "sender", "message"]
+        if before_count or after_count:
+            messages = get_context_windows(
+                search_scope.chat_con, messages, before_count, after_count
+            ).assign(is_match=lambda df: df["is_match"].map({True: "Yes", False: "No"}))
+            columns = ["window", "timestamp", "sender", "is_match", "message"]
+        results = format_found_messages(
+            messages, search_scope, timezone, columns=columns
+        )
+
+    ica.output_results(results, format=cli_args.format, output=cli_args.output)
+
+
+if __name__ == "__main__":
+    main()
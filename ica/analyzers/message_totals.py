@@ -1,10 +1,14 @@
 #!/usr/bin/env python3
 import datetime
+import sys
 
 import pandas as pd
 
 import ica
 
+# The derived features used by this analyzer (see ica.features)
+FEATURES = ("non_reaction_messages", "reaction_messages", "daily_rollup")
+
 
 def get_first_message_date(dfs: ica.DataFrameNamespace) -> pd.Timestamp:
     """
@@ -17,19 +21,16 @@ def get_sums_by_day(dfs: ica.DataFrameNamespace) -> pd.DataFrame:
     """
     Calculate the text message sums, grouped by date
     """
-    if dfs.messages.empty:
-        return pd.DataFrame(
-            columns=pd.Index(
-                ["message_count", "is_from_me", "is_from_them"], dtype="object"
-            )
-        ).rename_axis(index="date")
-    return (
-        dfs.messages.assign(message_count=1)
-        .resample("D", on="datetime")
-        .sum(numeric_only=True)
-        .rename_axis(index="date")
-        .assign(is_from_them=lambda df: df["message_count"] - df["is_from_me"])
+    daily_rollup = ica.get_feature(dfs, "daily_rollup")
+    counts_by_sender = (daily_rollup["messages"] + daily_rollup["reactions"]).unstack(
+        "sender_display_name", fill_value=0
     )
+    return pd.DataFrame(
+        {
+            "message_count": counts_by_sender.sum(axis=1),
+            "is_from_me": counts_by_sender.get("Me", 0),
+        }
+    ).assign(is_from_them=lambda df: df["message_count"] - df["is_from_me"])
 
 
 def get_days_messaged_count(sums_by_day: pd.DataFrame) -> int:
@@ -54,20 +55,13 @@ def get_noreply_count(sums_by_day: pd.DataFrame) -> int:
     )
 
 
-def main() -> None:
+def analyze(
+    dfs: ica.DataFrameNamespace, cli_args: ica.TypedCLIArguments
+) -> ica.AnalyzerResult:
     """
     Generate a summary of message and reaction counts, by person and in total,
     as well as other insightful metrics
     """
-    cli_args = ica.get_cli_parser().parse_args(namespace=ica.TypedCLIArguments())
-    dfs = ica.get_dataframes(
-        contacts=cli_args.contacts,
-        timezone=cli_args.timezone,
-        from_date=cli_args.from_date,
-        to_date=cli_args.to_date,
-        from_people=cli_args.from_people,
-    )
-
     first_message_date = get_first_message_date(dfs)
     today = pd.Timestamp(datetime.date.today())
     if cli_args.to_date:
@@ -85,8 +79,8 @@ def main() -> None:
     sums_by_day = get_sums_by_day(dfs)
     days_messaged_count = get_days_messaged_count(sums_by_day)
 
-    messages_only = dfs.messages[~dfs.messages["is_reaction"]]
-    reactions_only = dfs.messages[dfs.messages["is_reaction"]]
+    messages_only = ica.get_feature(dfs, "non_reaction_messages")
+    reactions_only = ica.get_feature(dfs, "reaction_messages")
 
     totals_map = {
         "messages": len(messages_only),
@@ -118,14 +112,20 @@ def main() -> None:
         }
     )
 
-    ica.output_results(
+    return ica.AnalyzerResult(
         pd.DataFrame(
             {"metric": tuple(totals_map.keys()), "total": tuple(totals_map.values())},
-        ).set_index("metric"),
-        format=cli_args.format,
-        output=cli_args.output,
+        ).set_index("metric")
     )
 
 
+def main() -> None:
+    """
+    Generate a summary of message and reaction counts, by person and in total,
+    as well as other insightful metrics
+    """
+    ica.run_analyzer_module(sys.modules[__name__])
+
+
 if __name__ == "__main__":
     main()
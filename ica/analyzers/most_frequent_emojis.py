@@ -1,12 +1,11 @@
 #!/usr/bin/env python3
-import emoji
-import pandas as pd
+import argparse
+import sys
 
 import ica
 
-# List of modifier characters representing the skin tones to be removed from the
-# emoji list
-skin_tones = {"🏻", "🏼", "🏽", "🏾", "🏿"}
+# The derived features used by this analyzer (see ica.features)
+FEATURES = ("non_reaction_messages", "emojis", "all_participants")
 
 
 class MostFrequentEmojisCLIArguments(ica.TypedCLIArguments):
@@ -15,58 +14,53 @@ class MostFrequentEmojisCLIArguments(ica.TypedCLIArguments):
     result_count: int
 
 
-def main() -> None:
+CLI_ARGUMENTS = MostFrequentEmojisCLIArguments
+
+
+def add_cli_arguments(cli_parser: argparse.ArgumentParser) -> None:
     """
-    Generates count data for the top 10 most frequently used emojis across the
-    entire conversation
+    Add the CLI arguments specific to this analyzer
     """
-    cli_parser = ica.get_cli_parser()
     cli_parser.add_argument(
         "--result-count",
         type=int,
         default=10,
         help="the number of emoji results to rank",
     )
-    cli_args = cli_parser.parse_args(namespace=MostFrequentEmojisCLIArguments())
-    dfs = ica.get_dataframes(
-        contacts=cli_args.contacts,
-        timezone=cli_args.timezone,
-        from_date=cli_args.from_date,
-        to_date=cli_args.to_date,
-        from_people=cli_args.from_people,
-    )
 
-    # Filter out reactions as they are not part of the message text analysis
-    messages = dfs.messages[~dfs.messages["is_reaction"]].copy()
 
-    # Create a translation table to remove skin tones
-    translation_table = str.maketrans("", "", "".join(skin_tones))
-
-    def extract_emojis(text: str) -> list[str]:
-        return [
-            item["emoji"].translate(translation_table)
-            for item in emoji.emoji_list(text)
-        ]
-
-    # Extract emojis from all messages at once
-    messages["emoji"] = messages["text"].apply(extract_emojis)
-
-    # Explode the list of emojis so each emoji has its own row
-    emoji_data = messages.explode("emoji")
+def analyze(
+    dfs: ica.DataFrameNamespace, cli_args: MostFrequentEmojisCLIArguments
+) -> ica.AnalyzerResult:
+    """
+    Generates count data for the top 10 most frequently used emojis across the
+    entire conversation
+    """
+    # Filter out reactions as they are not part of the message text analysis
+    messages = ica.get_feature(dfs, "non_reaction_messages")
 
-    # Drop rows with no emojis
-    emoji_data = emoji_data.dropna(subset=["emoji"])
+    # Every emoji (with skin tones removed) from all messages, extracted at once
+    # using a single precompiled pattern; each emoji is labeled with the index
+    # of the message it was found in
+    emojis = ica.get_feature(dfs, "emojis")
 
     # Normalize sender column for pivoting
     # We want columns for "Me" and each participant
-    emoji_data["sender_column"] = emoji_data["sender_display_name"]
-    emoji_data.loc[emoji_data["is_from_me"], "sender_column"] = "Me"
+    sender_columns = messages["sender_display_name"].where(
+        ~messages["is_from_me"], "Me"
+    )
 
-    # Create a pivot table of counts
-    results = pd.crosstab(emoji_data["emoji"], emoji_data["sender_column"])
+    # Count the occurrences of each emoji by sender
+    results = (
+        emojis.to_frame()
+        .assign(sender_column=sender_columns.loc[emojis.index])
+        .groupby(["emoji", "sender_column"])
+        .size()
+        .unstack(fill_value=0)
+    )
 
     # Ensure all participants (and "Me") are represented as columns
-    all_participants = sorted(dfs.handles["display_name"].unique())
+    all_participants = ica.get_feature(dfs, "all_participants")
     expected_cols = ["Me"] + all_participants
     results = results.reindex(columns=expected_cols, fill_value=0)
 
@@ -88,10 +82,8 @@ def extract_emojis(text: str) -> list[str]:
         .astype(int)
     )
 
-    ica.output_results(
+    return ica.AnalyzerResult(
         results,
-        format=cli_args.format,
-        output=cli_args.output,
         prettified_label_overrides={
             f"count_from_{display_name}": f"Count From {display_name}"
             for display_name in all_participants
@@ -99,5 +91,13 @@ def extract_emojis(text: str) -> list[str]:
     )
 
 
+def main() -> None:
+    """
+    Generates count data for the top 10 most frequently used emojis across the
+    entire conversation
+    """
+    ica.run_analyzer_module(sys.modules[__name__])
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+import ica
+from ica.core import prettify_header_name
+from ica.timestamps import get_local_codes
+
+# The derived features used by this analyzer (see ica.features)
+FEATURES = ("non_reaction_messages", "all_participants")
+
+# The statistics reported for the reply times of each participant, as the name
+# of each statistic and the quantile of the reply times it corresponds to
+REPLY_TIME_QUANTILES = {
+    "median_reply_time": 0.5,
+    "p90_reply_time": 0.9,
+    "max_reply_time": 1.0,
+}
+
+
+class ResponseTimesCLIArguments(ica.TypedCLIArguments):
+    """Additional CLI arguments specific to the response_times analyzer"""
+
+    by_hour: bool
+
+
+CLI_ARGUMENTS = ResponseTimesCLIArguments
+
+
+def add_cli_arguments(cli_parser: argparse.ArgumentParser) -> None:
+    """
+    Add the CLI arguments specific to this analyzer
+    """
+    cli_parser.add_argument(
+        "--by-hour",
+        action="store_true",
+        help="if specified, breaks down reply times by the (local) hour of the "
+        "day at which each message being replied to was sent",
+    )
+
+
+def get_replies(messages: pd.DataFrame) -> pd.DataFrame:
+    """
+    Find every reply in the given (chronologically-sorted) messages, where a
+    reply is any message whose sender differs from that of the message before
+    it; return a dataframe with the 'participant' who replied, the 'reply_time'
+    (in seconds) since the message they replied to, and the local 'hour' at which
+    that message was sent
+    """
+    sender_codes, senders = pd.factorize(messages["sender_display_name"])
+    datetime_ns = pd.DatetimeIndex(messages["datetime"]).as_unit("ns").asi8
+    # Comparing every message with the one before it marks the boundaries at
+    # which the sender changes, all without iterating over the messages
+    is_reply = sender_codes[1:] != sender_codes[:-1]
+    reply_times_ns = np.diff(datetime_ns)[is_reply]
+    return pd.DataFrame(
+        {
+            "participant": senders.take(sender_codes[1:][is_reply]),
+            "reply_time": reply_times_ns / 1_000_000_000,
+            "hour": get_local_codes(messages, "hour")[:-1][is_reply] % 24,
+        }
+    )
+
+
+def get_reply_time_stats(replies: pd.DataFrame, by: list[str]) -> pd.DataFrame:
+    """
+    Compute the number of replies and the statistics in REPLY_TIME_QUANTILES for
+    the reply times in each group of the given replies dataframe
+    """
+    reply_times = replies.groupby(by, sort=True)["reply_time"]
+    return pd.DataFrame(
+        {
+            "replies": reply_times.size(),
+            **{
+                stat_name: pd.to_timedelta(
+                    reply_times.quantile(quantile), unit="s"
+                ).dt.round("s")
+                for stat_name, quantile in REPLY_TIME_QUANTILES.items()
+            },
+        }
+    )
+
+
+def analyze(
+    dfs: ica.DataFrameNamespace, cli_args: ResponseTimesCLIArguments
+) -> ica.AnalyzerResult:
+    """
+    Generates the median, 90th percentile, and maximum time each participant
+    took to reply to the other participants' messages
+    """
+    messages: pd.DataFrame = ica.get_feature(dfs, "non_reaction_messages")
+    if not messages["datetime"].is_monotonic_increasing:
+        messages = messages.sort_values("datetime", kind="stable")
+    replies = get_replies(messages)
+    # Ensure all participants (and "Me") are represented, even those who never
+    # replied
+    participants = pd.Index(
+        ["Me"] + ica.get_feature(dfs, "all_participants"), name="participant"
+    )
+
+    if not cli_args.by_hour:
+        reply_time_stats = get_reply_time_stats(replies, ["participant"]).reindex(
+            participants
+        )
+        reply_time_stats["replies"] = reply_time_stats["replies"].fillna(0)
+        return ica.AnalyzerResult(reply_time_stats.astype({"replies": int}))
+
+    # Give every participant their own set of columns, with one row per hour
+    reply_time_stats = get_reply_time_stats(replies, ["participant", "hour"])
+    hours = pd.RangeIndex(24, name="hour")
+    # A participant who never replied has no replies (and no reply times) in
+    # any hour
+    no_reply_stats = pd.DataFrame(index=hours, columns=reply_time_stats.columns).astype(
+        {
+            "replies": float,
+            **{stat_name: "timedelta64[ns]" for stat_name in REPLY_TIME_QUANTILES},
+        }
+    )
+    columns: dict[str, pd.Series] = {}
+    for participant in participants:
+        if participant in reply_time_stats.index:
+            participant_stats = reply_time_stats.loc[participant].reindex(hours)
+        else:
+            participant_stats = no_reply_stats
+        columns[f"replies_by_{participant}"] = (
+            participant_stats["replies"].fillna(0).astype(int)
+        )
+        for stat_name in REPLY_TIME_QUANTILES:
+            columns[f"{stat_name}_by_{participant}"] = participant_stats[stat_name]
+    return ica.AnalyzerResult(
+        pd.DataFrame(columns, index=hours),
+        prettified_label_overrides={
+            f"{stat_name}_by_{participant}": (
+                f"{prettify_header_name(stat_name)} By {participant}"
+            )
+            for participant in participants
+            for stat_name in ("replies", *REPLY_TIME_QUANTILES)
+        },
+    )
+
+
+def main() -> None:
+    """
+    Generates the median, 90th percentile, and maximum time each participant
+    took to reply to the other participants' messages
+    """
+    ica.run_analyzer_module(sys.modules[__name__])
+
+
+if __name__ == "__main__":
+    main()
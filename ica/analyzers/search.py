@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+import tzlocal
+
+import ica
+from ica.message_search import format_found_messages, get_search_scope
+from ica.search_index import get_search_index
+
+
+def main() -> None:
+    """
+    Search every message in the conversation (or in every conversation) for the
+    given term, phrase, or prefix, using the full-text search index built by
+    `ica index build`
+    """
+    parser = ica.get_cli_parser()
+    parser.add_argument(
+        "query",
+        help="the full-text search query; a word (e.g. dinner) matches that "
+        "word, a quoted phrase (e.g. '\"see you soon\"') matches those words in "
+        "that order, a word ending in * (e.g. din*) matches every word which "
+        "starts with it, and queries can be combined with AND, OR, and NOT",
+    )
+    parser.add_argument(
+        "--sort",
+        choices=("date", "relevance"),
+        default="date",
+        help="whether to list the matching messages in the order they were sent "
+        "(the default) or the most relevant messages first",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        help="the maximum number of matching messages to list",
+    )
+    parser.add_argument(
+        "--include-reactions",
+        action="store_true",
+        help="if specified, includes reactions which quote a matching message",
+    )
+    cli_args = parser.parse_args()
+    timezone = cli_args.timezone or tzlocal.get_localzone().key
+
+    with get_search_scope(cli_args) as search_scope:
+        with get_search_index(create=False) as search_index:
+            # Pick up any messages received since the index was last built
+            search_index.update(search_scope.chat_con)
+            messages = search_index.search(
+                cli_args.query,
+                chat_ids=search_scope.chat_ids,
+                include_me=search_scope.include_me,
+                sender_handles=search_scope.sender_handles,
+                from_date=cli_args.from_date,
+                to_date=cli_args.to_date,
+                timezone=timezone,
+                include_reactions=cli_args.include_reactions,
+                sort=cli_args.sort,
+                limit=cli_args.limit,
+            )
+        results = format_found_messages(messages, search_scope, timezone)
+
+    ica.output_results(results, format=cli_args.format, output=cli_args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+import argparse
+import sys
+
+import pandas as pd
+
+import ica
+from ica.sessions import DEFAULT_SESSION_GAP, parse_session_gap
+
+# The derived features used by this analyzer (see ica.features)
+FEATURES = ("all_participants",)
+
+
+class SessionsCLIArguments(ica.TypedCLIArguments):
+    """Additional CLI arguments specific to the sessions analyzer"""
+
+    session_gap: pd.Timedelta
+    list_sessions: bool
+
+
+CLI_ARGUMENTS = SessionsCLIArguments
+
+
+def add_cli_arguments(cli_parser: argparse.ArgumentParser) -> None:
+    """
+    Add the CLI arguments specific to this analyzer
+    """
+    cli_parser.add_argument(
+        "--session-gap",
+        "-g",
+        type=parse_session_gap,
+        default=DEFAULT_SESSION_GAP,
+        help="the length of silence (e.g. '30min' or '2h') after which the next "
+        "message begins a new session; defaults to 1h",
+    )
+    cli_parser.add_argument(
+        "--list-sessions",
+        action="store_true",
+        help="if specified, lists every session (with its start, end, duration, "
+        "message count, and initiator) instead of summarizing them",
+    )
+
+
+def get_sessions(
+    dfs: ica.DataFrameNamespace, session_gap: pd.Timedelta
+) -> pd.DataFrame:
+    """
+    Summarize every session of the conversation, indexed by session ID, with the
+    datetime at which it started and ended, its duration, its number of messages
+    (including reactions), and its initiator (i.e. the sender of its first
+    message)
+    """
+    messages_by_session = dfs.messages.groupby(
+        ica.get_session_ids(dfs, session_gap), sort=True
+    )
+    return (
+        messages_by_session.agg(
+            start=("datetime", "min"),
+            end=("datetime", "max"),
+            messages=("datetime", "size"),
+            initiator=("sender_display_name", "first"),
+        )
+        .assign(duration=lambda df: df["end"] - df["start"])
+        .loc[:, ["start", "end", "duration", "messages", "initiator"]]
+    )
+
+
+def analyze(
+    dfs: ica.DataFrameNamespace, cli_args: SessionsCLIArguments
+) -> ica.AnalyzerResult:
+    """
+    Generates a summary of the sessions of the conversation (i.e. its bursts of
+    messages separated by long silences), including their number, lengths,
+    durations, and initiators
+    """
+    sessions = get_sessions(dfs, cli_args.session_gap)
+    if cli_args.list_sessions:
+        return ica.AnalyzerResult(sessions)
+
+    totals_map = {"sessions": len(sessions)}
+    # Add the number of sessions started by each participant
+    initiator_counts = sessions["initiator"].value_counts()
+    for display_name in ["Me"] + ica.get_feature(dfs, "all_participants"):
+        totals_map[f"sessions_started_by_{display_name.lower()}"] = (
+            initiator_counts.get(display_name, 0)
+        )
+    totals_map.update(
+        {
+            "median_messages_per_session": sessions["messages"].median(),
+            "max_messages_per_session": sessions["messages"].max(),
+            "median_session_duration": sessions["duration"].median(),
+            "max_session_duration": sessions["duration"].max(),
+            "total_session_duration": sessions["duration"].sum(),
+        }
+    )
+
+    return ica.AnalyzerResult(
+        pd.DataFrame(
+            {"metric": tuple(totals_map.keys()), "total": tuple(totals_map.values())},
+        ).set_index("metric")
+    )
+
+
+def main() -> None:
+    """
+    Generates a summary of the sessions of the conversation (i.e. its bursts of
+    messages separated by long silences), including their number, lengths,
+    durations, and initiators
+    """
+    ica.run_analyzer_module(sys.modules[__name__])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+import datetime
+import sys
+
+import numpy as np
+import pandas as pd
+
+import ica
+from ica.rollup import get_local_period_codes, get_period_starts
+from ica.timestamps import DAY_NS
+
+# The derived features used by this analyzer (see ica.features)
+FEATURES = ("all_participants", "daily_rollup")
+
+# The label of the row with the streaks of the conversation as a whole (i.e.
+# the days on which anyone sent a message)
+EVERYONE = "Everyone"
+
+
+def get_runs(is_active: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Run-length encode the given boolean vector, returning the index at which
+    each run starts, the length of each run, and the value of each run
+    """
+    if not len(is_active):
+        return (np.array([], dtype=int),) * 2 + (np.array([], dtype=bool),)
+    run_starts = np.concatenate(([0], np.flatnonzero(np.diff(is_active)) + 1))
+    run_lengths = np.diff(np.append(run_starts, len(is_active)))
+    return run_starts, run_lengths, is_active[run_starts]
+
+
+def get_streaks(is_active: np.ndarray) -> dict[str, int]:
+    """
+    Compute the longest and current streaks of active and inactive days in the
+    given daily activity vector, along with the index of the first day of the
+    longest active streak (or -1 if there are no active days)
+    """
+    run_starts, run_lengths, run_values = get_runs(is_active)
+    active_run_lengths = np.where(run_values, run_lengths, 0)
+    inactive_run_lengths = np.where(run_values, 0, run_lengths)
+    longest_run_index = (
+        int(active_run_lengths.argmax()) if active_run_lengths.any() else -1
+    )
+    return {
+        "longest_streak": int(active_run_lengths.max(initial=0)),
+        "longest_streak_start_index": (
+            int(run_starts[longest_run_index]) if longest_run_index >= 0 else -1
+        ),
+        "current_streak": int(active_run_lengths[-1]) if len(run_lengths) else 0,
+        "longest_gap": int(inactive_run_lengths.max(initial=0)),
+        "current_gap": int(inactive_run_lengths[-1]) if len(run_lengths) else 0,
+    }
+
+
+def get_last_day_code(
+    dfs: ica.DataFrameNamespace, cli_args: ica.TypedCLIArguments
+) -> int:
+    """
+    Compute the day code (see ica.rollup.get_local_period_codes()) of the last
+    day of the analyzed period: today, or the last day before --to-date if
+    that is earlier
+    """
+    now = pd.Timestamp(datetime.datetime.now(dfs.messages["datetime"].dt.tz))
+    last_day_code = int(get_local_period_codes(pd.DatetimeIndex([now]), "day")[0])
+    if cli_args.to_date:
+        # The end date is exclusive, so the last day is the one on which the
+        # final nanosecond before it falls
+        to_date_ns = pd.Timestamp(cli_args.to_date).tz_localize(None).value
+        last_day_code = min(last_day_code, (to_date_ns - 1) // DAY_NS)
+    return last_day_code
+
+
+def analyze(
+    dfs: ica.DataFrameNamespace, cli_args: ica.TypedCLIArguments
+) -> ica.AnalyzerResult:
+    """
+    Generates the longest and current streaks of consecutive days with (and
+    without) messages, for the conversation as a whole and for each participant
+    """
+    participants = [EVERYONE, "Me"] + ica.get_feature(dfs, "all_participants")
+    daily_rollup: pd.DataFrame = ica.get_feature(dfs, "daily_rollup")
+    dates = daily_rollup.index.get_level_values("date")
+    day_codes = get_local_period_codes(dates, "day")
+
+    # Mark the days on which each participant sent at least one message (or
+    # reaction), from the day of the first message through the last day of the
+    # analyzed period
+    if len(day_codes):
+        first_day_code = int(day_codes.min())
+        day_count = max(get_last_day_code(dfs, cli_args) - first_day_code + 1, 0)
+    else:
+        first_day_code = day_count = 0
+    is_active = np.zeros((len(participants), day_count), dtype=bool)
+    participant_indices = pd.Index(participants).get_indexer(
+        daily_rollup.index.get_level_values("sender_display_name")
+    )
+    day_indices = day_codes - first_day_code
+    is_in_range = (participant_indices >= 0) & (day_indices < day_count)
+    is_active[participant_indices[is_in_range], day_indices[is_in_range]] = True
+    is_active[0] = is_active[1:].any(axis=0)
+
+    streaks = pd.DataFrame(
+        [get_streaks(participant_is_active) for participant_is_active in is_active],
+        index=pd.Index(participants, name="participant"),
+    )
+    start_indices = streaks.pop("longest_streak_start_index")
+    has_streak = start_indices.ge(0).to_numpy()
+    start_codes = first_day_code + start_indices.to_numpy()
+    tz = dfs.messages["datetime"].dt.tz
+    streak_starts = pd.Series(
+        get_period_starts(start_codes, "day", tz), index=streaks.index
+    ).where(has_streak)
+    streak_ends = pd.Series(
+        get_period_starts(
+            start_codes + streaks["longest_streak"].to_numpy() - 1, "day", tz
+        ),
+        index=streaks.index,
+    ).where(has_streak)
+    streaks.insert(1, "longest_streak_start", streak_starts)
+    streaks.insert(2, "longest_streak_end", streak_ends)
+
+    return ica.AnalyzerResult(
+        streaks,
+        prettified_label_overrides={
+            "longest_streak": "Longest Streak (Days)",
+            "current_streak": "Current Streak (Days)",
+            "longest_gap": "Longest Gap (Days)",
+            "current_gap": "Current Gap (Days)",
+        },
+    )
+
+
+def main() -> None:
+    """
+    Generates the longest and current streaks of consecutive days with (and
+    without) messages, for the conversation as a whole and for each participant
+    """
+    ica.run_analyzer_module(sys.modules[__name__])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+import argparse
+import sys
+
+import ica
+from ica.top_terms import (
+    TopTermsCLIArguments,
+    add_top_terms_cli_arguments,
+    get_top_terms,
+    get_top_terms_label_overrides,
+    parse_positive_int,
+)
+
+# The derived features used by this analyzer (see ica.features)
+FEATURES = ("non_reaction_messages", "all_participants")
+
+
+class TopNgramsCLIArguments(TopTermsCLIArguments):
+    """Additional CLI arguments specific to the top_ngrams analyzer"""
+
+    ngram_size: int
+
+
+CLI_ARGUMENTS = TopNgramsCLIArguments
+
+
+def add_cli_arguments(cli_parser: argparse.ArgumentParser) -> None:
+    """
+    Add the CLI arguments specific to this analyzer
+    """
+    add_top_terms_cli_arguments(cli_parser)
+    cli_parser.add_argument(
+        "--ngram-size",
+        "-n",
+        type=parse_positive_int,
+        default=2,
+        help="the number of consecutive words in each phrase; defaults to 2",
+    )
+
+
+def analyze(
+    dfs: ica.DataFrameNamespace, cli_args: TopNgramsCLIArguments
+) -> ica.AnalyzerResult:
+    """
+    Generates count data for the most frequently used phrases of consecutive
+    words (i.e. n-grams) across the entire conversation (excluding reactions)
+    """
+    return ica.AnalyzerResult(
+        get_top_terms(dfs, cli_args, ngram_size=cli_args.ngram_size).rename_axis(
+            index="ngram"
+        ),
+        prettified_label_overrides=get_top_terms_label_overrides(dfs),
+    )
+
+
+def main() -> None:
+    """
+    Generates count data for the most frequently used phrases of consecutive
+    words (i.e. n-grams) across the entire conversation (excluding reactions)
+    """
+    ica.run_analyzer_module(sys.modules[__name__])
+
+
+if __name__ == "__main__":
+    main()
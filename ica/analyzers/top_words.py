@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+import sys
+
+import ica
+from ica.top_terms import (
+    TopTermsCLIArguments,
+    add_top_terms_cli_arguments,
+    get_top_terms,
+    get_top_terms_label_overrides,
+)
+
+# The derived features used by this analyzer (see ica.features)
+FEATURES = ("non_reaction_messages", "all_participants")
+
+CLI_ARGUMENTS = TopTermsCLIArguments
+
+add_cli_arguments = add_top_terms_cli_arguments
+
+
+def analyze(
+    dfs: ica.DataFrameNamespace, cli_args: TopTermsCLIArguments
+) -> ica.AnalyzerResult:
+    """
+    Generates count data for the most frequently used words across the entire
+    conversation (excluding reactions)
+    """
+    return ica.AnalyzerResult(
+        get_top_terms(dfs, cli_args, ngram_size=1).rename_axis(index="word"),
+        prettified_label_overrides=get_top_terms_label_overrides(dfs),
+    )
+
+
+def main() -> None:
+    """
+    Generates count data for the most frequently used words across the entire
+    conversation (excluding reactions)
+    """
+    ica.run_analyzer_module(sys.modules[__name__])
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,60 @@
 #!/usr/bin/env python3
+import argparse
+import sys
+
 import ica
+from ica.rollup import GRANULARITIES, get_period_range
 
 # The format to use for all date strings
 DATE_FORMAT = "%Y-%m-%d"
 
+# The derived features used by this analyzer (see ica.features)
+FEATURES = ("all_participants",)
 
-def main() -> None:
+
+class TotalsByDayCLIArguments(ica.TypedCLIArguments):
+    """Additional CLI arguments specific to the totals_by_day analyzer"""
+
+    granularity: str
+    fill_gaps: bool
+
+
+CLI_ARGUMENTS = TotalsByDayCLIArguments
+
+
+def add_cli_arguments(cli_parser: argparse.ArgumentParser) -> None:
     """
-    Generates a comprehensive breakdown of message totals for every day you and
-    the other participants have been messaging in the conversation
+    Add the CLI arguments specific to this analyzer
     """
-    cli_args = ica.get_cli_parser().parse_args(namespace=ica.TypedCLIArguments())
-    dfs = ica.get_dataframes(
-        contacts=cli_args.contacts,
-        timezone=cli_args.timezone,
-        from_date=cli_args.from_date,
-        to_date=cli_args.to_date,
-        from_people=cli_args.from_people,
+    cli_parser.add_argument(
+        "--granularity",
+        "-g",
+        choices=GRANULARITIES,
+        default="day",
+        help="the period by which to break down message totals; defaults to 'day'",
+    )
+    cli_parser.add_argument(
+        "--fill-gaps",
+        action="store_true",
+        help="if specified, includes the periods in which no messages were "
+        "sent (with totals of zero)",
     )
 
-    daily_counts = dfs.messages.assign(
-        date=lambda df: df["datetime"].dt.floor("D")
-    ).pivot_table(
-        index="date",
-        columns="sender_display_name",
-        values="text",
-        aggfunc="count",
-        fill_value=0,
+
+def analyze(
+    dfs: ica.DataFrameNamespace, cli_args: TotalsByDayCLIArguments
+) -> ica.AnalyzerResult:
+    """
+    Generates a comprehensive breakdown of message totals for every day you and
+    the other participants have been messaging in the conversation
+    """
+    rollup = ica.get_rollup(dfs, cli_args.granularity)
+    daily_counts = (rollup["messages"] + rollup["reactions"]).unstack(
+        "sender_display_name", fill_value=0
     )
 
     # Ensure all participants (and "Me") are represented as columns
-    all_participants: list[str] = sorted(dfs.handles["display_name"].unique())
+    all_participants: list[str] = ica.get_feature(dfs, "all_participants")
     expected_cols = ["Me"] + all_participants
     daily_counts = daily_counts.reindex(columns=expected_cols, fill_value=0)
 
@@ -42,8 +66,16 @@ def main() -> None:
     # Calculate total sent
     daily_counts["#_sent"] = daily_counts.sum(axis=1)
 
-    # Filter days with > 0 messages
-    daily_counts = daily_counts[daily_counts["#_sent"] > 0]
+    if cli_args.fill_gaps:
+        # Include every period between the first and last message, even those
+        # without any messages
+        daily_counts = daily_counts.reindex(
+            get_period_range(daily_counts.index, cli_args.granularity),
+            fill_value=0,
+        )
+    else:
+        # Filter days with > 0 messages
+        daily_counts = daily_counts[daily_counts["#_sent"] > 0]
 
     # Reorder columns
     cols = ["#_sent", "#_sent_by_me"] + [
@@ -51,10 +83,13 @@ def main() -> None:
     ]
     daily_counts = daily_counts[cols]
 
-    ica.output_results(
+    # Label each period by its granularity (e.g. "Week" or "Month"), except for
+    # days, which are labeled by date
+    if cli_args.granularity != "day":
+        daily_counts = daily_counts.rename_axis(index=cli_args.granularity)
+
+    return ica.AnalyzerResult(
         daily_counts,
-        format=cli_args.format,
-        output=cli_args.output,
         prettified_label_overrides={
             f"#_sent_by_{display_name}": f"# Sent By {display_name}"
             for display_name in all_participants
@@ -62,5 +97,13 @@ def main() -> None:
     )
 
 
+def main() -> None:
+    """
+    Generates a comprehensive breakdown of message totals for every day you and
+    the other participants have been messaging in the conversation
+    """
+    ica.run_analyzer_module(sys.modules[__name__])
+
+
 if __name__ == "__main__":
     main()
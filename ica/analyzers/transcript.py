@@ -8,16 +8,74 @@ def main() -> None:
     Generates a full, unedited transcript of every message, including reactions,
     between you and the other participants (attachment files not included)
     """
-    cli_args = ica.get_cli_parser().parse_args(namespace=ica.TypedCLIArguments())
-    dfs = ica.get_dataframes(
-        contacts=cli_args.contacts,
-        timezone=cli_args.timezone,
-        from_date=cli_args.from_date,
-        to_date=cli_args.to_date,
-        from_people=cli_args.from_people,
+    cli_parser = ica.get_cli_parser()
+    page_group = cli_parser.add_mutually_exclusive_group()
+    page_group.add_argument(
+        "--limit",
+        type=int,
+        help="the maximum number of messages to list, starting from the first",
     )
+    page_group.add_argument(
+        "--tail",
+        type=int,
+        help="the number of messages to list, ending with the last",
+    )
+    cli_parser.add_argument(
+        "--offset",
+        type=int,
+        default=0,
+        help="the number of messages to skip over before listing any (from the "
+        "last message backwards, if --tail is specified)",
+    )
+    cli_parser.add_argument(
+        "--since-rowid",
+        type=int,
+        help="if specified, only lists the messages added to the chat database "
+        "after the message with this ROWID (e.g. the greatest ROWID of the "
+        "previous page)",
+    )
+    cli_args = cli_parser.parse_args(namespace=ica.TypedCLIArguments())
+    if any(
+        count is not None and count < 0 for count in (cli_args.limit, cli_args.tail)
+    ):
+        cli_parser.error("--limit and --tail cannot be negative")
+    if cli_args.offset < 0:
+        cli_parser.error("--offset cannot be negative")
+    columns = ["timestamp", "sender", "is_reaction", "message"]
+    if (
+        cli_args.limit is None
+        and cli_args.tail is None
+        and not cli_args.offset
+        and cli_args.since_rowid is None
+    ):
+        messages = ica.get_dataframes(
+            contacts=cli_args.contacts,
+            timezone=cli_args.timezone,
+            from_date=cli_args.from_date,
+            to_date=cli_args.to_date,
+            from_people=cli_args.from_people,
+            read_profile=cli_args.read_profile,
+        ).messages
+    else:
+        # Only the requested page of messages is read from the database, in
+        # the order the messages were added to it; each message's ROWID is
+        # listed so that the next page can be requested with --since-rowid
+        messages = ica.get_transcript_page(
+            contacts=cli_args.contacts,
+            timezone=cli_args.timezone,
+            from_date=cli_args.from_date,
+            to_date=cli_args.to_date,
+            from_people=cli_args.from_people,
+            after_rowid=cli_args.since_rowid,
+            limit=cli_args.tail if cli_args.tail is not None else cli_args.limit,
+            offset=cli_args.offset,
+            newest_first=cli_args.tail is not None,
+            read_profile=cli_args.read_profile,
+        )
+        columns.insert(0, "rowid")
     ica.output_results(
-        dfs.messages.assign(
+        messages.assign(
+            rowid=lambda df: df["ROWID"],
             timestamp=lambda df: df["datetime"],
             sender=lambda df: df["sender_display_name"],
             is_reaction=lambda df: df["is_reaction"].map({True: "Yes", False: "No"}),
@@ -28,9 +86,10 @@ def main() -> None:
             ),
         )
         # Output only the following columns and in this particular order
-        .loc[:, ["timestamp", "sender", "is_reaction", "message"]],
+        .loc[:, columns],
         format=cli_args.format,
         output=cli_args.output,
+        prettified_label_overrides={"rowid": "ROWID"},
     )
 
 
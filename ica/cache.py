@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+import weakref
+from collections.abc import Callable, Hashable, Sequence
+from typing import Generic, TypeVar, Union
+
+import pandas as pd
+
+# The type of the values held by a DataFrameCache
+CachedValue = TypeVar("CachedValue")
+
+
+class DataFrameCache(Generic[CachedValue]):
+    """
+    A cache of values computed from one or more dataframes (or series), such as
+    the derived features or the session IDs of a conversation; every value is
+    keyed by the id() of each of its dataframes (followed by any other
+    arguments it was computed from), and is evicted as soon as any of those
+    dataframes is garbage collected, so an id() can never be reused for a stale
+    entry; because dataframes are identified rather than compared, a dataframe
+    must not be modified in place once a value has been cached for it, or the
+    cache will keep returning the value computed from its old contents
+    """
+
+    def __init__(self) -> None:
+        self.values: dict[tuple[Hashable, ...], CachedValue] = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __contains__(self, cache_key: object) -> bool:
+        return cache_key in self.values
+
+    def get(
+        self,
+        dfs: Sequence[Union[pd.DataFrame, pd.Series]],
+        key: tuple[Hashable, ...],
+        compute_value: Callable[[], CachedValue],
+    ) -> CachedValue:
+        """
+        Return the value cached for the given dataframes and key, computing it
+        with the given function (and caching it) if there is none yet
+        """
+        cache_key = (*(id(df) for df in dfs), *key)
+        if cache_key not in self.values:
+            value = compute_value()
+            # setdefault() keeps the cache consistent when concurrent threads
+            # compute the same value; at worst, a value is computed more than
+            # once, but only one value is ever returned
+            if self.values.setdefault(cache_key, value) is value:
+                for df in dfs:
+                    weakref.finalize(df, self.values.pop, cache_key, None)
+        return self.values[cache_key]
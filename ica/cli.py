@@ -2,13 +2,16 @@
 
 import argparse
 import contextlib
+import importlib
 import importlib.machinery
 import importlib.metadata
 import importlib.util
 import sys
 from pathlib import Path
+from types import ModuleType
 from typing import Union
 
+from ica.database import READ_PROFILES, ReadProfile, get_read_profile
 from ica.exceptions import BaseAnalyzerException
 
 # A module-level flag that is set to True if the user invokes the CLI via the
@@ -19,6 +22,15 @@
 # the file being executed
 did_user_invoke_cli_directly = False
 
+# The modules implementing each command of the `ica` CLI which is not an
+# analyzer (e.g. `ica run`), each of which defines a main() function accepting
+# the command's arguments
+SUBCOMMAND_MODULES = {
+    "run": "ica.runner",
+    "index": "ica.search_index",
+    "warehouse": "ica.warehouse",
+}
+
 
 class TypedCLIArguments(object):
     """
@@ -27,11 +39,16 @@ class TypedCLIArguments(object):
     """
 
     analyzer: str
-    contacts: list[str]
+    contacts: Union[list[str], None]
+    all_conversations: bool
+    workers: Union[int, None]
     timezone: Union[str, None]
     from_date: Union[str, None]
     to_date: Union[str, None]
     from_people: Union[list[str], None]
+    read_profile: Union[ReadProfile, None]
+    snapshot: bool
+    snapshot_dir: Union[str, None]
     format: Union[str, None]
     output: Union[str, None]
 
@@ -61,10 +78,10 @@ def get_cli_parser() -> argparse.ArgumentParser:
             type=lambda p: str(Path(p).expanduser()),
             help="the name of a built-in analyzer, or a path to an analyzer file",
         )
-    parser.add_argument(
+    conversation_group = parser.add_mutually_exclusive_group(required=True)
+    conversation_group.add_argument(
         "--contact",
         "-c",
-        required=True,
         action="append",
         dest="contacts",
         help="the full name, phone number, or email address of each "
@@ -72,6 +89,20 @@ def get_cli_parser() -> argparse.ArgumentParser:
         "you will need to specify --contact/-c for each contact in the "
         "conversation (excluding yourself)",
     )
+    conversation_group.add_argument(
+        "--all-conversations",
+        action="store_true",
+        help="analyze every conversation in the chat database, and output the "
+        "results for all of them together, keyed by each conversation's chats "
+        "and participants",
+    )
+    parser.add_argument(
+        "--workers",
+        "-j",
+        type=int,
+        help="the number of processes to analyze conversations in when "
+        "--all-conversations is specified; defaults to the number of CPUs",
+    )
     parser.add_argument(
         "--timezone",
         "-t",
@@ -97,6 +128,28 @@ def get_cli_parser() -> argparse.ArgumentParser:
         "values can be 'me', 'all', or a contact's first name, full name, "
         "phone number, or email address; defaults to 'all'",
     )
+    parser.add_argument(
+        "--read-profile",
+        type=get_read_profile,
+        metavar="{{{}}}".format(",".join(READ_PROFILES)),
+        help="the settings with which to read the chat database: 'tuned' "
+        "memory-maps the database and enlarges SQLite's page cache, while "
+        "'default' uses SQLite's defaults; defaults to 'default'",
+    )
+    parser.add_argument(
+        "--snapshot",
+        action="store_true",
+        help="copy the chat database into memory before analyzing it, so that "
+        "every query reads one consistent copy rather than the live database "
+        "(which the Messages app may be writing to)",
+    )
+    parser.add_argument(
+        "--snapshot-dir",
+        metavar="DIR",
+        type=lambda p: str(Path(p).expanduser()),
+        help="like --snapshot, but copy the chat database into a temporary file "
+        "within the given directory (e.g. a RAM disk) instead of into memory",
+    )
     parser.add_argument(
         "--format",
         "-f",
@@ -142,25 +195,74 @@ def get_cli_args() -> argparse.Namespace:
     return get_cli_parser().parse_args()
 
 
-def run_analyzer(analyzer: str) -> None:
+def resolve_analyzer(analyzer: str) -> tuple[str, Union[str, None]]:
     """
-    Load the given metric file as a Python module, and return the DataFrame
-    provided by its analyze() function
+    Resolve the given analyzer (either the module name of a built-in analyzer or
+    an analyzer path) to the path of its file, along with its module path if it
+    is a built-in analyzer
     """
-    # Check to see if the provided value is the module name of a built-in
-    # analyzer, otherwise the value is an analyzer path
     with contextlib.suppress(ModuleNotFoundError):
-        analyzer = get_file_path_from_module_path(f"ica.analyzers.{analyzer}").replace(
-            "__init__.py", "__main__.py"
+        analyzer_path = get_file_path_from_module_path(f"ica.analyzers.{analyzer}")
+        return (
+            analyzer_path.replace("__init__.py", "__main__.py"),
+            f"ica.analyzers.{analyzer}",
         )
-    loader = importlib.machinery.SourceFileLoader("__main__", analyzer)
+    return analyzer, None
+
+
+def load_analyzer_module(analyzer_path: str, module_name: str) -> ModuleType:
+    """
+    Load the analyzer file at the given path as a Python module with the given
+    name; a script analyzer (i.e. one loaded as __main__) runs as it is loaded
+    """
+    loader = importlib.machinery.SourceFileLoader(module_name, analyzer_path)
     spec = importlib.util.spec_from_loader(loader.name, loader)
     if not spec:
-        raise ImportError(f"Could not create a module spec for {analyzer}")
+        raise ImportError(f"Could not create a module spec for {analyzer_path}")
     analyzer_module = importlib.util.module_from_spec(spec)
     # Expose package information to dynamically-imported module
     analyzer_module.__package__ = __package__
     loader.exec_module(analyzer_module)
+    return analyzer_module
+
+
+def use_snapshot(
+    cli_args: TypedCLIArguments,
+) -> contextlib.AbstractContextManager[object]:
+    """
+    Return a context within which every query reads a snapshot of the chat
+    database, if the given command-line arguments request one (or otherwise a
+    context which does nothing)
+    """
+    import ica.core
+
+    if cli_args.snapshot or cli_args.snapshot_dir:
+        return ica.core.use_chat_database_snapshot(cli_args.snapshot_dir)
+    return contextlib.nullcontext()
+
+
+def run_analyzer(analyzer: str) -> None:
+    """
+    Load the given metric file as a Python module, and return the DataFrame
+    provided by its analyze() function
+    """
+    import ica.analyzer
+
+    # Check to see if the provided value is the module name of a built-in
+    # analyzer, otherwise the value is an analyzer path
+    analyzer_path, built_in_module_name = resolve_analyzer(analyzer)
+    # Analyzers which implement the analyzer interface (i.e. which define an
+    # analyze() function) are loaded like any other module and then run by ICA,
+    # whereas any other analyzer is a script which is executed as if it were
+    # run directly
+    if ica.analyzer.is_analyzer_module_file(analyzer_path):
+        ica.analyzer.run_analyzer_module(
+            load_analyzer_module(
+                analyzer_path, built_in_module_name or Path(analyzer_path).stem
+            )
+        )
+    else:
+        load_analyzer_module(analyzer_path, "__main__")
 
 
 def main() -> None:
@@ -172,13 +274,26 @@ def main() -> None:
     global did_user_invoke_cli_directly
     did_user_invoke_cli_directly = True
 
+    # Commands like `ica run` (which runs several analyzers at once) are not
+    # analyzers, so each has its own set of arguments
+    if sys.argv[1:2] and sys.argv[1] in SUBCOMMAND_MODULES:
+        subcommand_module = importlib.import_module(SUBCOMMAND_MODULES[sys.argv[1]])
+
+        try:
+            subcommand_module.main(sys.argv[2:])
+        except BaseAnalyzerException as error:
+            print(error, file=sys.stderr)
+            sys.exit(1)
+        return
+
     # parse_known_args() is slightly different from parse_args() in that the
     # former returns a two-item tuple, where the first item is the Namespace of
     # known arguments, and the second item is a list of any unknown arguments
     cli_args = get_cli_parser().parse_known_args(namespace=TypedCLIArguments())[0]
 
     try:
-        run_analyzer(cli_args.analyzer)
+        with use_snapshot(cli_args):
+            run_analyzer(cli_args.analyzer)
     except BaseAnalyzerException as error:
         # Print the error message without the traceback
         print(error, file=sys.stderr)
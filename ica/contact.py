@@ -13,6 +13,7 @@
 import pandas as pd
 import phonenumbers
 
+from ica.database import ReadProfile, connect_read_only
 from ica.exceptions import ContactNotFoundError, ContactWithSameNameError
 
 # The glob pattern matching all AddressBook SQL databases to read from
@@ -38,10 +39,14 @@ def normalize_phone_number(phone_number: str) -> Optional[str]:
     """
     if not phone_number:
         return None
-    return phonenumbers.format_number(
-        phonenumbers.parse(phone_number, region=DEFAULT_PHONE_NUMBER_REGION),
-        phonenumbers.PhoneNumberFormat.E164,
-    )
+    # A phone number which cannot be parsed at all (e.g. one made up of words)
+    # cannot appear in the iMessage database either
+    with suppress(phonenumbers.NumberParseException):
+        return phonenumbers.format_number(
+            phonenumbers.parse(phone_number, region=DEFAULT_PHONE_NUMBER_REGION),
+            phonenumbers.PhoneNumberFormat.E164,
+        )
+    return None
 
 
 def normalize_email_address(email_address: str) -> Optional[str]:
@@ -109,15 +114,23 @@ def get_contact_records_for_source(
     """
     contact_identifier = normalize_contact_identifier(contact_identifier)
 
-    rows = pd.read_sql_query(
-        sql=importlib.resources.files("ica")
-        .joinpath(os.path.join("queries", "contact.sql"))
-        .read_text(),
-        con=con,
-        params={"contact_identifier": contact_identifier},
+    return get_contact_records_from_rows(
+        pd.read_sql_query(
+            sql=importlib.resources.files("ica")
+            .joinpath(os.path.join("queries", "contact.sql"))
+            .read_text(),
+            con=con,
+            params={"contact_identifier": contact_identifier},
+        )
     )
 
-    records = []
+
+def get_contact_records_from_rows(rows: pd.DataFrame) -> list[ContactRecord]:
+    """
+    Build a contact record for every contact in the given rows (as returned by
+    contact.sql or all_contacts.sql), where each contact may span several rows
+    """
+    records: list[ContactRecord] = []
     if rows.empty:
         return records
 
@@ -252,18 +265,20 @@ def validate_contact_records(
 
 def get_contact_records(
     contact_identifiers: Sequence[str],
+    read_profile: Optional[ReadProfile] = None,
 ) -> list[ContactRecord]:
     """
     Fetch the attributes for the given contact identifiers; each user-supplied
     identifier could be a full name, phone number, or email address; all
     identifiers may not represent the same contact. Returns a flat list of
-    unique ContactRecord objects.
+    unique ContactRecord objects. Each AddressBook database is read with the
+    given read profile (see ica.database).
     """
     all_records: list[ContactRecord] = []
     found_identifiers: set[str] = set()
 
     for db_path in glob.iglob(str(DB_GLOB)):
-        with closing(sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)) as con:
+        with closing(connect_read_only(db_path, read_profile)) as con:
             for contact_identifier in contact_identifiers:
                 records_for_source = get_contact_records_for_source(
                     con, contact_identifier
@@ -282,3 +297,27 @@ def get_contact_records(
     unique_records = coalesce_contact_records(all_records)
     validate_contact_records(unique_records)
     return unique_records
+
+
+def get_all_contact_records(
+    read_profile: Optional[ReadProfile] = None,
+) -> list[ContactRecord]:
+    """
+    Fetch the attributes of every contact across all AddressBook sources
+    (read with the given read profile), with contacts that share an identifier
+    coalesced into a single record
+    """
+    all_records: list[ContactRecord] = []
+    for db_path in glob.iglob(str(DB_GLOB)):
+        with closing(connect_read_only(db_path, read_profile)) as con:
+            all_records.extend(
+                get_contact_records_from_rows(
+                    pd.read_sql_query(
+                        sql=importlib.resources.files("ica")
+                        .joinpath(os.path.join("queries", "all_contacts.sql"))
+                        .read_text(),
+                        con=con,
+                    )
+                )
+            )
+    return coalesce_contact_records(all_records)
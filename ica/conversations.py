@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+import functools
+import os
+import sqlite3
+import tempfile
+from collections.abc import Generator, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing, contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from types import ModuleType
+from typing import Optional, Union
+
+import pandas as pd
+
+import ica.analyzer
+import ica.cli
+import ica.core
+from ica.contact import ContactRecord, get_all_contact_records
+from ica.database import (
+    DatabaseSnapshot,
+    ReadProfile,
+    connect_read_only,
+    snapshot_database,
+)
+from ica.exceptions import ContactNotFoundError, ConversationNotFoundError
+from ica.features import get_feature
+
+# The number of partitions to split the conversations into for each worker
+# process; having several partitions per worker keeps every worker busy even
+# when some partitions take much longer to analyze than others
+PARTITIONS_PER_WORKER = 4
+
+# The names of the columns which identify the conversation of each row of the
+# merged results
+CONVERSATION_KEY_COLUMNS = ["chat_ids", "participants"]
+
+
+@dataclass
+class Conversation:
+    """
+    A conversation in the chat database, i.e. every chat with exactly the same
+    participants (such as an iMessage chat and an SMS chat with the same
+    person), along with the number of messages across those chats
+    """
+
+    chat_ids: list[str]
+    contact_records: list[ContactRecord]
+    message_count: int = 0
+
+    @property
+    def participants(self) -> str:
+        """
+        The names of the conversation's participants (other than yourself), or
+        their phone numbers or email addresses if they are not in your contacts
+        """
+        return ", ".join(
+            sorted(
+                record.full_name or min(record.get_identifiers())
+                for record in self.contact_records
+            )
+        )
+
+
+def get_all_conversations(
+    con: sqlite3.Connection, read_profile: Optional[ReadProfile] = None
+) -> list[Conversation]:
+    """
+    Enumerate every conversation in the chat database, resolving the handles of
+    each chat to their contacts (read with the given read profile), and grouping
+    the chats whose participants are the same contacts (in the same way as
+    get_chat_ids_for_contacts()); return the conversations sorted by their
+    participants
+    """
+    records_by_identifier = {
+        identifier: record
+        for record in get_all_contact_records(read_profile)
+        for identifier in record.get_identifiers()
+    }
+    handles_by_chat_id: dict[str, list[str]] = {}
+    for chat_id, handle_identifier in con.execute(
+        """
+        SELECT chat_handle_join.chat_id, handle.id
+        FROM chat_handle_join
+        JOIN handle ON chat_handle_join.handle_id = handle.ROWID
+        ORDER BY chat_handle_join.chat_id
+        """
+    ):
+        handles_by_chat_id.setdefault(chat_id, []).append(handle_identifier)
+    message_counts = dict(
+        con.execute(
+            "SELECT chat_id, COUNT(*) FROM chat_message_join GROUP BY chat_id"
+        ).fetchall()
+    )
+
+    conversations: dict[tuple[str, ...], Conversation] = {}
+    for chat_id, handle_identifiers in handles_by_chat_id.items():
+        contact_records: dict[str, ContactRecord] = {}
+        for handle_identifier in handle_identifiers:
+            # A handle which does not belong to any contact represents a
+            # participant of its own, identified by the handle itself
+            record = records_by_identifier.get(handle_identifier) or ContactRecord(
+                id=handle_identifier,
+                first_name=handle_identifier,
+                last_name="",
+                phone_numbers=[] if "@" in handle_identifier else [handle_identifier],
+                email_addresses=[handle_identifier] if "@" in handle_identifier else [],
+            )
+            contact_records[record.id] = record
+        conversation = conversations.setdefault(
+            tuple(sorted(contact_records)),
+            Conversation(chat_ids=[], contact_records=list(contact_records.values())),
+        )
+        conversation.chat_ids.append(chat_id)
+        conversation.message_count += message_counts.get(chat_id, 0)
+
+    return sorted(
+        conversations.values(), key=lambda conversation: conversation.participants
+    )
+
+
+def partition_conversations(
+    conversations: Sequence[Conversation], partition_count: int
+) -> list[list[int]]:
+    """
+    Split the given conversations into (at most) the given number of partitions
+    with roughly the same number of messages in each, returning the indices of
+    the conversations in each partition
+    """
+    partitions: list[list[int]] = [[] for _ in range(partition_count)]
+    partition_message_counts = [0] * partition_count
+    # Assigning the largest conversations first (each to the partition with the
+    # fewest messages so far) keeps any one partition from being much larger
+    # than the others
+    for index in sorted(
+        range(len(conversations)),
+        key=lambda index: conversations[index].message_count,
+        reverse=True,
+    ):
+        smallest_partition = partition_message_counts.index(
+            min(partition_message_counts)
+        )
+        partitions[smallest_partition].append(index)
+        partition_message_counts[smallest_partition] += conversations[
+            index
+        ].message_count
+    return [sorted(partition) for partition in partitions if partition]
+
+
+def analyze_conversations(
+    module: ModuleType,
+    cli_args: ica.cli.TypedCLIArguments,
+    conversations: Sequence[tuple[int, Conversation]],
+    db_path: Union[str, Path, DatabaseSnapshot],
+) -> list[tuple[int, ica.analyzer.AnalyzerResult]]:
+    """
+    Run the analyze() function of the given analyzer module over each of the
+    given (numbered) conversations in turn, returning the number of each
+    conversation alongside its result; only one conversation is loaded at a
+    time, so memory use is bounded by the largest conversation rather than the
+    size of the chat database; conversations with no messages to analyze (e.g.
+    within the given date range) are skipped
+    """
+    results: list[tuple[int, ica.analyzer.AnalyzerResult]] = []
+    with closing(connect_read_only(db_path, cli_args.read_profile)) as con:
+        for index, conversation in conversations:
+            try:
+                dfs = ica.core.get_conversation_dataframes(
+                    con,
+                    conversation.chat_ids,
+                    conversation.contact_records,
+                    timezone=cli_args.timezone,
+                    from_date=cli_args.from_date,
+                    to_date=cli_args.to_date,
+                    from_people=cli_args.from_people,
+                    **getattr(module, "DATAFRAME_OPTIONS", {}),
+                )
+            except ContactNotFoundError:
+                # The conversation does not include any person to filter
+                # messages by
+                continue
+            if dfs.messages.empty:
+                continue
+            for feature_name in getattr(module, "FEATURES", ()):
+                get_feature(dfs, feature_name)
+            results.append((index, module.analyze(dfs, cli_args)))
+    return results
+
+
+def analyze_conversations_in_process(
+    analyzer_path: str,
+    module_name: str,
+    args: Sequence[str],
+    did_user_invoke_cli_directly: bool,
+    conversations: Sequence[tuple[int, Conversation]],
+    db_path: Union[str, Path, DatabaseSnapshot],
+) -> list[tuple[int, ica.analyzer.AnalyzerResult]]:
+    """
+    Run the analyze() function of the given analyzer module over each of the
+    given conversations within a worker process; the module is loaded (and its
+    arguments parsed) afresh, since neither can be sent between processes
+    """
+    ica.cli.did_user_invoke_cli_directly = did_user_invoke_cli_directly
+    module = ica.cli.load_analyzer_module(analyzer_path, module_name)
+    cli_args = ica.analyzer.get_analyzer_cli_args(module, args)
+    return analyze_conversations(module, cli_args, conversations, db_path)
+
+
+def merge_conversation_results(
+    conversations: Sequence[Conversation],
+    results: Sequence[tuple[int, ica.analyzer.AnalyzerResult]],
+) -> ica.analyzer.AnalyzerResult:
+    """
+    Merge the result of every conversation into a single result, where each row
+    of each conversation's result is prefixed with the columns identifying that
+    conversation (and any named index becomes a regular column, whose labels
+    are prettified just as output_results() prettifies the labels of an index)
+    """
+    merged_dfs: list[pd.DataFrame] = []
+    prettified_label_overrides: dict[str, str] = {}
+    for index, result in results:
+        df = result.df
+        if df.index.name:
+            df = df.set_axis(
+                df.index.map(
+                    functools.partial(
+                        ica.core.prettify_header_name,
+                        prettified_label_overrides=result.prettified_label_overrides,
+                    )
+                ).rename(df.index.name)
+            )
+        df = df.reset_index(drop=not df.index.name)
+        df.insert(0, "chat_ids", ", ".join(map(str, conversations[index].chat_ids)))
+        df.insert(1, "participants", conversations[index].participants)
+        merged_dfs.append(df)
+        prettified_label_overrides.update(result.prettified_label_overrides or {})
+    return ica.analyzer.AnalyzerResult(
+        (
+            pd.concat(merged_dfs, ignore_index=True)
+            if merged_dfs
+            else pd.DataFrame(columns=pd.Index(CONVERSATION_KEY_COLUMNS))
+        ),
+        prettified_label_overrides=prettified_label_overrides or None,
+    )
+
+
+@contextmanager
+def get_worker_db_path(
+    db_path: Union[str, Path, DatabaseSnapshot],
+) -> Generator[Union[str, Path, DatabaseSnapshot], None, None]:
+    """
+    Yield the path to the chat database (or snapshot) at the given path as it
+    can be read by worker processes: an in-memory snapshot only exists within
+    this process, so it is copied to a temporary file for the duration of the
+    context
+    """
+    if isinstance(db_path, DatabaseSnapshot) and db_path.in_memory:
+        with snapshot_database(db_path, directory=tempfile.gettempdir()) as snapshot:
+            yield snapshot
+    else:
+        yield db_path
+
+
+def analyze_all_conversations(
+    module: ModuleType,
+    cli_args: ica.cli.TypedCLIArguments,
+    args: Sequence[str],
+    workers: Optional[int] = None,
+) -> ica.analyzer.AnalyzerResult:
+    """
+    Run the given analyzer module (whose arguments, as given, were parsed into
+    cli_args) over every conversation in the chat database, split into
+    partitions which are analyzed by a pool of worker processes (by default,
+    cli_args.workers or one for each CPU), and merge the results into one
+    """
+    ica.core.validate_date_range(cli_args.from_date, cli_args.to_date)
+    ica.analyzer.validate_analyzer_features(module)
+    db_path = ica.core.get_chat_database_path()
+    with closing(connect_read_only(db_path, cli_args.read_profile)) as con:
+        conversations = get_all_conversations(con, cli_args.read_profile)
+    if not conversations:
+        raise ConversationNotFoundError("No conversations found")
+
+    workers = min(
+        workers or cli_args.workers or os.cpu_count() or 1, len(conversations)
+    )
+    numbered_conversations = list(enumerate(conversations))
+    if workers == 1:
+        results = analyze_conversations(
+            module, cli_args, numbered_conversations, db_path
+        )
+        return merge_conversation_results(conversations, results)
+
+    partitions = partition_conversations(conversations, workers * PARTITIONS_PER_WORKER)
+    # An analyzer run directly (e.g. via `python -m`) is named __main__, but
+    # must not be loaded as such by the workers, since it would run again
+    module_name = (
+        module.__name__
+        if module.__name__ != "__main__"
+        else Path(str(module.__file__)).stem
+    )
+    with get_worker_db_path(db_path) as worker_db_path:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(
+                    analyze_conversations_in_process,
+                    str(module.__file__),
+                    module_name,
+                    args,
+                    ica.cli.did_user_invoke_cli_directly,
+                    [numbered_conversations[index] for index in partition],
+                    worker_db_path,
+                )
+                for partition in partitions
+            ]
+            results = sorted(
+                (result for future in futures for result in future.result()),
+                key=lambda numbered_result: numbered_result[0],
+            )
+    return merge_conversation_results(conversations, results)
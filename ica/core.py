@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import contextlib
+import dataclasses
 import functools
 import importlib.machinery
 import importlib.resources
@@ -8,8 +9,9 @@
 import os
 import sqlite3
 import sys
-from collections.abc import Generator, Sequence
+from collections.abc import Collection, Generator, Sequence
 from contextlib import closing, contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from io import BytesIO, StringIO
@@ -18,11 +20,19 @@
 
 import duckdb
 import pandas as pd
+import pyarrow as pa
 import tzlocal
 from typedstream.stream import TypedStreamReader
 
 import ica.contact
+from ica.cache import DataFrameCache
 from ica.contact import ContactRecord, get_contact_records
+from ica.database import (
+    DatabaseSnapshot,
+    ReadProfile,
+    connect_read_only,
+    snapshot_database,
+)
 from ica.exceptions import (
     ContactNotFoundError,
     ContactWithSameNameError,
@@ -30,6 +40,7 @@
     DateRangeInvalidError,
     FormatNotSupportedError,
 )
+from ica.timestamps import S_TO_NS, get_wall_datetimes
 
 # In order to interpolate the user-specified list of chat identifiers into the
 # SQL queries, we must join the list into a string delimited by a common
@@ -54,21 +65,68 @@
 }
 
 
+# While several analyzers are run together (see ica.runner), the dataframes
+# returned by get_dataframes() are cached here so that every analyzer shares a
+# single load of the chat database; each key is the tuple of arguments passed
+# to get_dataframes(), and each value is a tuple of whether attachments were
+# loaded, the file extensions by which attachments were counted (if they were
+# counted), and the dataframes themselves
+SHARED_DATAFRAMES: ContextVar[
+    Optional[
+        dict[Hashable, tuple[bool, Optional[tuple[str, ...]], "DataFrameNamespace"]]
+    ]
+] = ContextVar("SHARED_DATAFRAMES", default=None)
+
+
+# While a snapshot of the chat database is in use (see
+# use_chat_database_snapshot()), every query reads the snapshot rather than the
+# live database, so that every query sees the database as it was at one moment
+CHAT_DB_SNAPSHOT: ContextVar[Optional[DatabaseSnapshot]] = ContextVar(
+    "CHAT_DB_SNAPSHOT", default=None
+)
+
+
+# While several analyzers are run together (see ica.runner), output_results()
+# appends the results of the current analyzer (and any label overrides) to
+# this list, so that the runner can decide where to output them
+COLLECTED_RESULTS: ContextVar[
+    Optional[list[tuple[pd.DataFrame, Optional[dict[str, str]]]]]
+] = ContextVar("COLLECTED_RESULTS", default=None)
+
+
+# The Arrow table converted from each dataframe registered by
+# get_sql_connection()
+ARROW_TABLE_CACHE: DataFrameCache[pa.Table] = DataFrameCache()
+
+
 @dataclass
 class DataFrameNamespace:
     """
     The namespace containing the relevant dataframes for the specified user in
-    the chat database
+    the chat database; attachment_counts is only populated when the attachments
+    were counted as the dataframes were loaded (see get_dataframes())
     """
 
     messages: pd.DataFrame
     attachments: pd.DataFrame
     handles: pd.DataFrame
+    attachment_counts: Optional[pd.DataFrame] = None
+
+
+# The number of messages in each page yielded by iter_transcript_pages()
+TRANSCRIPT_PAGE_SIZE = 1_000
+
+
+# A regex-based heuristic for whether the text of a message is a reaction (i.e.
+# a tapback) to another message
+REACTION_PATTERN = (
+    r"^(Loved|Liked|Disliked|Laughed at|Emphasized|Questioned|Reacted)"
+    r" (“(.*?)”|an \w+|(.*?) to “(.*?)”)$"
+)
 
 
 # iMessage stores dates as nanoseconds since 2001-01-01 (Apple's Core Data
 # epoch), so we must precompute the difference between that and the Unix epoch
-S_TO_NS = 1_000_000_000
 IMESSAGE_EPOCH_NS_OFFSET = int(
     (
         datetime(2001, 1, 1, tzinfo=timezone.utc)
@@ -78,6 +136,24 @@ class DataFrameNamespace:
 )
 
 
+def get_datetimes_from_imessage_dates(
+    dates: pd.Series, timezone: Optional[str] = None
+) -> pd.Series:
+    """
+    Convert the given iMessage dates (i.e. nanoseconds since 2001-01-01 UTC) to
+    timezone-aware datetimes in the given timezone (or to timezone-naive UTC
+    datetimes if no timezone is given), to the whole second; since a
+    timezone-aware datetime is stored as nanoseconds since the Unix epoch in
+    UTC, no local time is computed until one is needed
+    """
+    return (
+        (dates.astype("int64") // S_TO_NS * S_TO_NS + IMESSAGE_EPOCH_NS_OFFSET)
+        .astype("datetime64[ns]")
+        .dt.tz_localize("UTC")
+        .dt.tz_convert(timezone)
+    )
+
+
 def build_date_filter_clause(
     from_date: Optional[str] = None,
     to_date: Optional[str] = None,
@@ -108,6 +184,39 @@ def build_date_filter_clause(
     return " ".join(clauses)
 
 
+def build_sender_filter_clause(
+    include_me: bool = True,
+    sender_handles: Optional[Collection[str]] = None,
+    sender_handle_column: str = '"handle"."id"',
+) -> tuple[str, list[str]]:
+    """
+    Build a SQL WHERE clause fragment (and its parameters) to filter messages by
+    sender; messages from you are kept if include_me is True, and messages from
+    anyone else are kept if they were sent by one of the given sender handles
+    (or by anyone, if sender_handles is None)
+    """
+    if include_me and sender_handles is None:
+        return "", []
+    sender_clauses = ['"message"."is_from_me" = 1'] if include_me else []
+    params: list[str] = []
+    if sender_handles is None:
+        sender_clauses.append('"message"."is_from_me" = 0')
+    elif sender_handles:
+        # In the macOS Messages database, the handle_id (and thus sender
+        # handle) for outgoing messages (is_from_me=1) in 1-on-1 chats refers
+        # to the recipient, not the sender. Therefore, we must explicitly
+        # exclude messages from "me" when filtering by a specific contact
+        # handle, otherwise we will inadvertently include messages sent TO that
+        # contact.
+        sender_clauses.append(
+            '("message"."is_from_me" = 0 AND {} IN ({}))'.format(
+                sender_handle_column, ", ".join("?" for _ in sender_handles)
+            )
+        )
+        params.extend(sender_handles)
+    return "AND ({})".format(" OR ".join(sender_clauses) or "0"), params
+
+
 def decode_message_attributedbody(data: bytes) -> str:
     """
     The textual contents of some messages are encoded in a special
@@ -176,10 +285,22 @@ def get_messages_dataframe(
     timezone: Optional[str] = None,
     from_date: Optional[str] = None,
     to_date: Optional[str] = None,
+    after_rowid: Optional[int] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    newest_first: bool = False,
+    include_me: bool = True,
+    sender_handles: Optional[Collection[str]] = None,
 ) -> pd.DataFrame:
     """
     Return a pandas dataframe representing all messages in a particular
-    conversation (identified by the given phone number or email address)
+    conversation (identified by the given phone number or email address),
+    sorted by date; only the messages whose ROWID is greater than after_rowid
+    (if given) are included, and only the messages from the given senders (see
+    build_sender_filter_clause()); if a limit, an offset, or newest_first is
+    given, only that page of the messages is read, in order of ROWID (i.e. the
+    order in which the messages were added to the chat database), counting from
+    the newest message if newest_first is True
     """
     # If no IANA timezone name is specified, default to the name of the system's
     # local timezone
@@ -202,26 +323,82 @@ def get_messages_dataframe(
         for identifier in record.get_identifiers():
             identifier_to_display_name[identifier] = display_name
 
-    return (
-        pd.read_sql_query(
-            sql=importlib.resources.files("ica")
-            .joinpath(os.path.join("queries", "messages.sql"))
-            .read_text()
-            .format(
+    query = (
+        importlib.resources.files("ica")
+        .joinpath(os.path.join("queries", "messages.sql"))
+        .read_text()
+    )
+    sender_filter_clause, sender_params = build_sender_filter_clause(
+        include_me, sender_handles
+    )
+    query_params = [after_rowid] if after_rowid is not None else []
+    query_params.extend(sender_params)
+    query = functools.partial(
+        query.format,
+        date_filter_clause=date_filter_clause,
+        rowid_filter_clause=(
+            'AND "message"."ROWID" > ?' if after_rowid is not None else ""
+        ),
+        sender_filter_clause=sender_filter_clause,
+    )
+    if limit is None and not offset and not newest_first:
+        messages = pd.read_sql_query(
+            sql=query(
                 chat_ids_placeholder=chat_ids_placeholder,
-                date_filter_clause=date_filter_clause,
+                order_clause='"message"."date"',
+                limit_clause="",
             ),
             con=con,
-            parse_dates={"datetime": "ISO8601"},
+            params=query_params,
         )
-        # SQL provides each date/time as a Unix timestamp (which is implicitly
-        # UTC), but the timestamp is timezone-naive when parsed by pandas; so
-        # first, we must add the missing timezone information, then we must
-        # convert the datetime to the specified timezone
+    else:
+        # SQLite can only read the messages of one chat at a time in order of
+        # ROWID (by walking the chat's index), so the first offset+limit
+        # messages of every chat are read, and the page is taken from those;
+        # with only one chat, SQLite can skip over the offset by itself
+        chat_offset = offset if len(chat_ids) == 1 else 0
+        messages = (
+            pd.concat(
+                [
+                    pd.read_sql_query(
+                        sql=query(
+                            chat_ids_placeholder=f"'{chat_id}'",
+                            order_clause='"chat_message_join"."message_id" {}'.format(
+                                "DESC" if newest_first else "ASC"
+                            ),
+                            limit_clause="LIMIT ? OFFSET ?",
+                        ),
+                        con=con,
+                        params=query_params
+                        + [
+                            # A negative LIMIT means that there is no limit
+                            offset - chat_offset + limit if limit is not None else -1,
+                            chat_offset,
+                        ],
+                    )
+                    for chat_id in chat_ids
+                ],
+                ignore_index=True,
+            )
+            .sort_values("ROWID", ascending=not newest_first)
+            .iloc[
+                offset - chat_offset : (
+                    offset - chat_offset + limit if limit is not None else None
+                )
+            ]
+            .sort_values(["datetime", "ROWID"])
+            .reset_index(drop=True)
+        )
+
+    return (
+        messages
+        # SQL provides each date/time as iMessage's raw integer date (rather
+        # than a string which pandas would have to parse), which is converted
+        # to a timezone-aware datetime without computing any local time
         .assign(
-            datetime=lambda df: df["datetime"]
-            .dt.tz_localize("UTC")
-            .dt.tz_convert(timezone)
+            datetime=lambda df: get_datetimes_from_imessage_dates(
+                df["datetime"], timezone
+            )
         )
         # Decode any 'attributedBody' values and merge them into the 'text'
         # column
@@ -236,12 +413,7 @@ def get_messages_dataframe(
         # 'text' column
         .drop(columns="attributedBody")
         # Use a regex-based heuristic to determine which messages are reactions
-        .assign(
-            is_reaction=lambda df: df["text"].str.match(
-                r"^(Loved|Liked|Disliked|Laughed at|Emphasized|Questioned|Reacted)"
-                r" (“(.*?)”|an \w+|(.*?) to “(.*?)”)$"
-            )
-        )
+        .assign(is_reaction=lambda df: df["text"].str.match(REACTION_PATTERN))
         # Convert 'is_from_me' values from integers to proper booleans
         .assign(is_from_me=lambda df: df["is_from_me"].astype(bool))
         # Add sender display name
@@ -307,37 +479,19 @@ def resolve_sender_identifiers(
     return include_me, allowed_handles
 
 
-def filter_dataframe(
-    df: pd.DataFrame,
+def resolve_sender_filter(
     contact_records: Sequence[ContactRecord],
     from_people: Optional[Sequence[str]] = None,
-) -> pd.DataFrame:
+) -> tuple[bool, Optional[set[str]]]:
     """
-    Return a copy of the messages dataframe that has been filtered by the
-    user-supplied from_people filter. Date filtering is handled at the SQL level.
+    Resolve the user-supplied 'from_people' filters into whether to include
+    messages from you, and the handles of the other senders whose messages to
+    include (or None to include messages from every other sender), as accepted
+    by build_sender_filter_clause()
     """
-
-    # If no person filter is supplied, or if "all" is specified, return values
-    # from all senders
     if not from_people or "all" in (p.lower() for p in from_people):
-        return df
-
-    include_me, allowed_handles = resolve_sender_identifiers(
-        contact_records, from_people
-    )
-
-    return df.pipe(
-        lambda df: df[
-            (df["is_from_me"] & include_me)
-            # In the macOS Messages database, the handle_id (and thus
-            # sender_handle) for outgoing messages (is_from_me=1) in 1-on-1
-            # chats refers to the recipient, not the sender. Therefore, we
-            # must explicitly exclude messages from "me" when filtering by a
-            # specific contact handle, otherwise we will inadvertently
-            # include messages sent TO that contact.
-            | (df["sender_handle"].isin(allowed_handles) & ~df["is_from_me"])
-        ]
-    )
+        return True, None
+    return resolve_sender_identifiers(contact_records, from_people)
 
 
 def get_attachments_dataframe(
@@ -346,10 +500,13 @@ def get_attachments_dataframe(
     timezone: Optional[str] = None,
     from_date: Optional[str] = None,
     to_date: Optional[str] = None,
+    include_me: bool = True,
+    sender_handles: Optional[Collection[str]] = None,
 ) -> pd.DataFrame:
     """
     Return a pandas dataframe representing all attachments in a particular
-    conversation (identified by the given phone number)
+    conversation (identified by the given phone number), sent by the given
+    senders (see build_sender_filter_clause())
     """
     chat_ids_placeholder = ", ".join(f"'{cid}'" for cid in chat_ids)
     date_filter_clause = build_date_filter_clause(
@@ -357,6 +514,9 @@ def get_attachments_dataframe(
         to_date,
         timezone=timezone,
     )
+    sender_filter_clause, sender_params = build_sender_filter_clause(
+        include_me, sender_handles
+    )
 
     return (
         pd.read_sql_query(
@@ -366,21 +526,80 @@ def get_attachments_dataframe(
             .format(
                 chat_ids_placeholder=chat_ids_placeholder,
                 date_filter_clause=date_filter_clause,
+                sender_filter_clause=sender_filter_clause,
             ),
             con=con,
-            parse_dates={"datetime": "ISO8601"},
+            params=sender_params,
         )
         # Expose the date/time of the message alongside each attachment record,
         # for convenience
         .assign(
-            datetime=lambda df: df["datetime"]
-            .dt.tz_localize("UTC")
-            .dt.tz_convert(timezone)
+            datetime=lambda df: get_datetimes_from_imessage_dates(
+                df["datetime"], timezone
+            )
         )
         .assign(is_from_me=lambda df: df["is_from_me"].astype(bool))
     )
 
 
+def get_attachment_counts_dataframe(
+    con: sqlite3.Connection,
+    chat_ids: Sequence[str],
+    timezone: Optional[str] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    extensions: Sequence[str] = (),
+    include_me: bool = True,
+    sender_handles: Optional[Collection[str]] = None,
+) -> pd.DataFrame:
+    """
+    Return a pandas dataframe with the number of attachments in a particular
+    conversation (sent by the given senders) for every combination of sender,
+    MIME type, and extension class (i.e. which of the given file extensions the
+    filename ends with, if any); the counting is done entirely by SQLite, so
+    the size of the dataframe does not grow with the number of attachments
+    """
+    chat_ids_placeholder = ", ".join(f"'{cid}'" for cid in chat_ids)
+    date_filter_clause = build_date_filter_clause(
+        from_date,
+        to_date,
+        timezone=timezone,
+    )
+    # LIKE is used rather than comparing the end of the filename, because
+    # SQLite must otherwise count characters from the start of every filename;
+    # note that LIKE is case-insensitive
+    extension_class_clause = (
+        "CASE {} END".format(
+            " ".join(
+                """WHEN "attachment"."filename" LIKE '%.' || ? THEN ?"""
+                for _ in extensions
+            )
+        )
+        if extensions
+        else "NULL"
+    )
+    sender_filter_clause, sender_params = build_sender_filter_clause(
+        include_me, sender_handles
+    )
+
+    return pd.read_sql_query(
+        sql=importlib.resources.files("ica")
+        .joinpath(os.path.join("queries", "attachment_counts.sql"))
+        .read_text()
+        .format(
+            chat_ids_placeholder=chat_ids_placeholder,
+            date_filter_clause=date_filter_clause,
+            sender_filter_clause=sender_filter_clause,
+            extension_class_clause=extension_class_clause,
+        ),
+        con=con,
+        # The extension parameters come first, since the extension class is
+        # selected before the messages are filtered
+        params=[param for extension in extensions for param in (extension,) * 2]
+        + sender_params,
+    ).assign(is_from_me=lambda df: df["is_from_me"].astype(bool))
+
+
 def get_handles_dataframe(
     con: sqlite3.Connection,
     contact_records: Sequence[ContactRecord],
@@ -442,23 +661,70 @@ def get_handles_dataframe(
     )
 
 
-def get_dataframes(
+def validate_date_range(
+    from_date: Optional[str] = None, to_date: Optional[str] = None
+) -> None:
+    """
+    Raise an error if the given date range is backwards (i.e. the start date is
+    after the end date)
+    """
+    if from_date and to_date and pd.Timestamp(from_date) > pd.Timestamp(to_date):
+        raise DateRangeInvalidError("Date range is backwards")
+
+
+def get_chat_database_path() -> Union[Path, DatabaseSnapshot]:
+    """
+    Return the snapshot of the chat database currently in use, or else the path
+    to the live chat database
+    """
+    return CHAT_DB_SNAPSHOT.get() or DB_PATH
+
+
+@contextmanager
+def use_chat_database_snapshot(
+    directory: Optional[Union[str, Path]] = None,
+    tables: Optional[Sequence[str]] = None,
+) -> Generator[DatabaseSnapshot, None, None]:
+    """
+    Take a snapshot of the chat database (in memory, or in the given directory;
+    see ica.database.snapshot_database()) which every query within the context
+    reads instead of the live database; if a snapshot is already in use, it is
+    reused, so that nested contexts all read the same snapshot
+    """
+    snapshot = CHAT_DB_SNAPSHOT.get()
+    if snapshot is not None:
+        yield snapshot
+        return
+    with snapshot_database(DB_PATH, directory, tables) as snapshot:
+        snapshot_token = CHAT_DB_SNAPSHOT.set(snapshot)
+        try:
+            yield snapshot
+        finally:
+            CHAT_DB_SNAPSHOT.reset(snapshot_token)
+
+
+@contextmanager
+def get_conversation(
     contacts: Sequence[str],
-    timezone: Optional[str] = None,
     from_date: Optional[str] = None,
     to_date: Optional[str] = None,
-    from_people: Optional[Sequence[str]] = None,
-) -> DataFrameNamespace:
+    read_profile: Optional[ReadProfile] = None,
+) -> Generator[tuple[sqlite3.Connection, list[str], list[ContactRecord]], None, None]:
     """
-    Return all dataframes for a specific macOS Messages conversation
+    Open a read-only connection to the chat database (with the given read
+    profile), and yield it along with the chat IDs and contact records for the
+    conversation involving exactly the given contacts
     """
-    # Validate date range before querying
-    if from_date and to_date and pd.Timestamp(from_date) > pd.Timestamp(to_date):
-        raise DateRangeInvalidError("Date range is backwards")
+    validate_date_range(from_date, to_date)
+    if not contacts:
+        raise ConversationNotFoundError(
+            "No contacts were specified; analyzing every conversation is only "
+            "supported by analyzers which define an analyze() function"
+        )
 
-    contact_records = get_contact_records(contacts)
+    contact_records = get_contact_records(contacts, read_profile=read_profile)
 
-    with closing(sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)) as con:
+    with closing(connect_read_only(get_chat_database_path(), read_profile)) as con:
         chat_ids = get_chat_ids_for_contacts(con, contact_records)
         if not chat_ids:
             raise ConversationNotFoundError(
@@ -466,31 +732,269 @@ def get_dataframes(
                     ", ".join(contacts)
                 )
             )
+        yield con, chat_ids, contact_records
 
-        dfs = DataFrameNamespace(
-            messages=get_messages_dataframe(
-                con, chat_ids, contact_records, timezone, from_date, to_date
-            ),
-            attachments=get_attachments_dataframe(
-                con, chat_ids, timezone, from_date, to_date
-            ),
-            handles=get_handles_dataframe(con, contact_records),
-        )
-        # Date filtering is now done in SQL; filter_dataframe only handles
-        # from_people filtering
-        dfs.messages = filter_dataframe(
-            dfs.messages,
+
+def get_conversation_dataframes(
+    con: sqlite3.Connection,
+    chat_ids: Sequence[str],
+    contact_records: Sequence[ContactRecord],
+    timezone: Optional[str] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    from_people: Optional[Sequence[str]] = None,
+    include_attachments: bool = True,
+    attachment_count_extensions: Optional[Sequence[str]] = None,
+) -> DataFrameNamespace:
+    """
+    Return all dataframes for the conversation made up of the given chats (with
+    the given participants), using an already-open connection to the chat
+    database; if attachment_count_extensions is given, the attachments are also
+    counted (see get_attachment_counts_dataframe()) over the same connection
+    """
+    # Filter by sender in SQL, so that the messages and attachments from
+    # everyone else are never read (let alone decoded)
+    include_me, sender_handles = resolve_sender_filter(contact_records, from_people)
+    return DataFrameNamespace(
+        messages=get_messages_dataframe(
+            con,
+            chat_ids,
             contact_records,
-            from_people=from_people,
-        )
-        dfs.attachments = filter_dataframe(
-            dfs.attachments,
+            timezone,
+            from_date,
+            to_date,
+            include_me=include_me,
+            sender_handles=sender_handles,
+        ),
+        attachments=get_attachments_dataframe(
+            con,
+            # An empty list of chat IDs matches no attachments at all
+            chat_ids if include_attachments else [],
+            timezone,
+            from_date,
+            to_date,
+            include_me=include_me,
+            sender_handles=sender_handles,
+        ),
+        handles=get_handles_dataframe(con, contact_records),
+        attachment_counts=(
+            get_attachment_counts_dataframe(
+                con,
+                chat_ids,
+                timezone,
+                from_date,
+                to_date,
+                attachment_count_extensions,
+                include_me=include_me,
+                sender_handles=sender_handles,
+            )
+            if attachment_count_extensions is not None
+            else None
+        ),
+    )
+
+
+def get_dataframes(
+    contacts: Sequence[str],
+    timezone: Optional[str] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    from_people: Optional[Sequence[str]] = None,
+    include_attachments: bool = True,
+    read_profile: Optional[ReadProfile] = None,
+    attachment_count_extensions: Optional[Sequence[str]] = None,
+) -> DataFrameNamespace:
+    """
+    Return all dataframes for a specific macOS Messages conversation; if
+    include_attachments is False, the attachments dataframe is left empty (for
+    analyzers which only need aggregate counts), and if
+    attachment_count_extensions is given, the attachment_counts dataframe holds
+    the same counts as get_attachment_counts(), read over the same connection
+    as the other dataframes; the chat database is read with the given read
+    profile (see ica.database)
+    """
+    shared_dataframes = SHARED_DATAFRAMES.get()
+    shared_key = (
+        tuple(contacts or ()),
+        timezone,
+        from_date,
+        to_date,
+        tuple(from_people) if from_people is not None else None,
+    )
+    count_extensions = (
+        tuple(attachment_count_extensions)
+        if attachment_count_extensions is not None
+        else None
+    )
+    if shared_dataframes is not None and shared_key in shared_dataframes:
+        has_attachments, shared_count_extensions, shared_dfs = shared_dataframes[
+            shared_key
+        ]
+        if has_attachments or not include_attachments:
+            if count_extensions not in (None, shared_count_extensions):
+                # Only the attachments still need to be counted, rather than
+                # the whole conversation being loaded again
+                shared_dfs = dataclasses.replace(
+                    shared_dfs,
+                    attachment_counts=get_attachment_counts(
+                        contacts,
+                        timezone,
+                        from_date,
+                        to_date,
+                        from_people,
+                        count_extensions or (),
+                        read_profile,
+                    ),
+                )
+                shared_dataframes[shared_key] = (
+                    has_attachments,
+                    count_extensions,
+                    shared_dfs,
+                )
+            # A new namespace is returned so that an analyzer reassigning one of
+            # its dataframes does not affect the other analyzers
+            return dataclasses.replace(shared_dfs)
+    with get_conversation(contacts, from_date, to_date, read_profile) as (
+        con,
+        chat_ids,
+        contact_records,
+    ):
+        dfs = get_conversation_dataframes(
+            con,
+            chat_ids,
             contact_records,
+            timezone=timezone,
+            from_date=from_date,
+            to_date=to_date,
             from_people=from_people,
+            include_attachments=include_attachments,
+            attachment_count_extensions=count_extensions,
         )
+        if shared_dataframes is not None:
+            shared_dataframes[shared_key] = (include_attachments, count_extensions, dfs)
+            return dataclasses.replace(dfs)
         return dfs
 
 
+def get_transcript_page(
+    contacts: Sequence[str],
+    timezone: Optional[str] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    from_people: Optional[Sequence[str]] = None,
+    after_rowid: Optional[int] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    newest_first: bool = False,
+    read_profile: Optional[ReadProfile] = None,
+) -> pd.DataFrame:
+    """
+    Return a single page of the messages in a specific macOS Messages
+    conversation (see get_messages_dataframe()), such as the last 100 messages,
+    without reading any other messages; the sender filter is applied before the
+    page is taken, so that the page is always full
+    """
+    with get_conversation(contacts, from_date, to_date, read_profile) as (
+        con,
+        chat_ids,
+        contact_records,
+    ):
+        include_me, sender_handles = resolve_sender_filter(contact_records, from_people)
+        return get_messages_dataframe(
+            con,
+            chat_ids,
+            contact_records,
+            timezone=timezone,
+            from_date=from_date,
+            to_date=to_date,
+            after_rowid=after_rowid,
+            limit=limit,
+            offset=offset,
+            newest_first=newest_first,
+            include_me=include_me,
+            sender_handles=sender_handles,
+        )
+
+
+def iter_transcript_pages(
+    contacts: Sequence[str],
+    page_size: int = TRANSCRIPT_PAGE_SIZE,
+    timezone: Optional[str] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    from_people: Optional[Sequence[str]] = None,
+    after_rowid: Optional[int] = None,
+    read_profile: Optional[ReadProfile] = None,
+) -> Generator[pd.DataFrame, None, None]:
+    """
+    Yield the messages in a specific macOS Messages conversation one page (of
+    at most page_size messages) at a time, in order of ROWID; each page resumes
+    after the greatest ROWID of the previous page (rather than skipping over
+    the messages before it), so reading any one page costs about as much as
+    reading page_size messages, however large the conversation is
+    """
+    with get_conversation(contacts, from_date, to_date, read_profile) as (
+        con,
+        chat_ids,
+        contact_records,
+    ):
+        include_me, sender_handles = resolve_sender_filter(contact_records, from_people)
+        while True:
+            page = get_messages_dataframe(
+                con,
+                chat_ids,
+                contact_records,
+                timezone=timezone,
+                from_date=from_date,
+                to_date=to_date,
+                after_rowid=after_rowid,
+                limit=page_size,
+                include_me=include_me,
+                sender_handles=sender_handles,
+            )
+            if page.empty:
+                return
+            yield page
+            if len(page) < page_size:
+                return
+            # Convert from a NumPy integer, which sqlite3 cannot bind
+            after_rowid = max(page["ROWID"].tolist())
+
+
+def get_attachment_counts(
+    contacts: Sequence[str],
+    timezone: Optional[str] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    from_people: Optional[Sequence[str]] = None,
+    extensions: Sequence[str] = (),
+    read_profile: Optional[ReadProfile] = None,
+) -> pd.DataFrame:
+    """
+    Return the number of attachments in a specific macOS Messages conversation
+    for every combination of sender ('is_from_me' and 'sender_handle'),
+    'mime_type', and 'extension_class' (the first of the given file extensions,
+    such as "caf", which the filename ends with), without loading the
+    individual attachments into memory
+    """
+    with get_conversation(contacts, from_date, to_date, read_profile) as (
+        con,
+        chat_ids,
+        contact_records,
+    ):
+        include_me, sender_handles = resolve_sender_filter(contact_records, from_people)
+        return get_attachment_counts_dataframe(
+            con,
+            chat_ids,
+            timezone,
+            from_date,
+            to_date,
+            extensions,
+            include_me=include_me,
+            sender_handles=sender_handles,
+        )
+
+
 def prettify_header_name(
     header_name: Hashable, prettified_label_overrides: Optional[dict[str, str]] = None
 ) -> Hashable:
@@ -527,13 +1031,13 @@ def make_dataframe_tz_naive(df: pd.DataFrame) -> pd.DataFrame:
     """
     return df.pipe(
         lambda df: (
-            df.set_index(df.index.tz_localize(None))
-            if isinstance(df.index, pd.DatetimeIndex)
+            df.set_index(get_wall_datetimes(df.index))
+            if isinstance(df.index, pd.DatetimeIndex) and df.index.tz is not None
             else df
         )
     ).assign(
         **{
-            col: df[col].dt.tz_localize(None)
+            col: pd.Series(get_wall_datetimes(df[col]), index=df.index)
             for col in df.select_dtypes(include=["datetime64[ns, UTC]"])
         }
     )
@@ -583,6 +1087,11 @@ def output_results(
     """
     Print the dataframe provided by an analyzer module
     """
+    collected_results = COLLECTED_RESULTS.get()
+    if collected_results is not None:
+        collected_results.append((analyzer_df, prettified_label_overrides))
+        return
+
     # Set the locale to the user's default setting to ensure that numbers are
     # formatted correctly (e.g. with thousands separators); however, if the
     # locale has already been set (e.g. by a test), do not override it
@@ -648,7 +1157,11 @@ def output_results(
                 # Format numbers with thousands separators
                 formatters={
                     col: "{:n}".format
-                    for col in output_df.select_dtypes(include="number").columns
+                    # Durations count as numbers to pandas, but cannot be
+                    # formatted as such
+                    for col in output_df.select_dtypes(
+                        include="number", exclude="timedelta"
+                    ).columns
                 },
             )
         )
@@ -660,19 +1173,85 @@ def output_results(
         print(output.getvalue(), flush=True)
 
 
+def get_arrow_table(df: pd.DataFrame) -> Union[pa.Table, pd.DataFrame]:
+    """
+    Convert the given dataframe to an Arrow table, once per dataframe; columns
+    which are already backed by Arrow are not copied, while any other column is
+    converted once, rather than by DuckDB on every query which scans it; a
+    dataframe with a column which Arrow cannot represent (such as one mixing
+    strings and numbers) is returned as-is, for DuckDB to scan directly; like
+    any value cached for a dataframe (see ica.cache), the table goes stale if
+    the dataframe is modified in place
+    """
+    try:
+        return ARROW_TABLE_CACHE.get(
+            [df], (), lambda: pa.Table.from_pandas(df, preserve_index=False)
+        )
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        return df
+
+
 @contextmanager
 def get_sql_connection(
     dfs: DataFrameNamespace,
+    session_gap: Optional[pd.Timedelta] = None,
+    warehouse_path: Optional[Path] = None,
+    session_ids: Optional[pd.Series] = None,
 ) -> Generator[duckdb.DuckDBPyConnection, None, None]:
     """
     Create an in-memory DuckDB database containing all ICA dataframes, and yield
-    a connection to that database; using DuckDB over sqlite3 ensures that the
-    data is exposed virtually rather than copied, improving performance for
-    large conversations
+    a connection to that database; the dataframes are registered as Arrow
+    tables (see get_arrow_table()), which DuckDB scans in place rather than
+    copying, improving performance for large conversations; the
+    message_details view adds a session_id column, which DuckDB computes with
+    sessions split by the given session gap (unless the session IDs are given,
+    e.g. as returned by ica.get_session_ids()), along with other helper columns
+    (such as the local date and hour of each message), all of which are only
+    computed by the queries which read the view; if a warehouse path is given,
+    the warehouse at that path (see ica.warehouse) is also attached, so that
+    its tables can be queried alongside the dataframes
     """
+    from ica.sessions import DEFAULT_SESSION_GAP
+    from ica.warehouse import attach_warehouse
+
     with duckdb.connect(":memory:") as con:
-        con.register("messages", dfs.messages)
-        con.register("attachments", dfs.attachments)
+        con.register("messages", get_arrow_table(dfs.messages))
+        if session_ids is None:
+            con.execute(
+                importlib.resources.files("ica")
+                .joinpath(os.path.join("queries", "message_sessions.sql"))
+                .read_text()
+                .format(
+                    session_gap_us=pd.Timedelta(
+                        DEFAULT_SESSION_GAP if session_gap is None else session_gap
+                    ).value
+                    // 1_000
+                )
+            )
+        else:
+            con.register("_message_session_ids", session_ids.to_frame())
+            # A positional join lines up the rows of both tables without
+            # copying either of them
+            con.execute(
+                'CREATE VIEW "_message_sessions" AS SELECT * FROM "messages"'
+                ' POSITIONAL JOIN "_message_session_ids"'
+            )
+        con.register("attachments", get_arrow_table(dfs.attachments))
+        con.register("handles", get_arrow_table(dfs.handles))
+        # Dates and times are read in the timezone of the messages
+        timezone = getattr(dfs.messages["datetime"].dt, "tz", None)
+        if timezone is not None:
+            con.execute(
+                "SET TimeZone = ?", [getattr(timezone, "key", None) or str(timezone)]
+            )
+        con.execute(
+            importlib.resources.files("ica")
+            .joinpath(os.path.join("queries", "message_details.sql"))
+            .read_text()
+            .format(reaction_pattern=REACTION_PATTERN.replace("'", "''"))
+        )
+        if warehouse_path is not None:
+            attach_warehouse(con, warehouse_path)
         yield con
 
 
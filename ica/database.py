@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import sqlite3
+import tempfile
+import uuid
+from collections.abc import Generator, Sequence
+from contextlib import closing, contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Union
+
+
+@dataclass(frozen=True)
+class ReadProfile:
+    """
+    The settings with which a SQLite database (i.e. chat.db or an AddressBook
+    database) is opened for reading: the number of bytes of the database file
+    to memory-map (or 0 to read it with ordinary system calls), the size of the
+    page cache in KiB (or 0 for SQLite's default of 2 MiB), whether to keep any
+    temporary tables and indices (such as those built for sorting) in memory,
+    whether to reject any statement which would modify the database, and
+    whether the database is immutable; an immutable database is never checked
+    for changes (or for a write-ahead log), so it must only be used for a copy
+    of a database which nothing else writes to
+    """
+
+    mmap_size: int = 0
+    cache_size: int = 0
+    temp_store_memory: bool = False
+    query_only: bool = False
+    immutable: bool = False
+
+
+# The read profiles which can be selected by name (e.g. with --read-profile);
+# the tuned profile memory-maps up to 1 GiB of the database and caches up to 64
+# MiB of its pages; it is opt-in, since a full load of a large conversation
+# (which reads each page only once) measured no faster with it than without
+READ_PROFILES = {
+    "tuned": ReadProfile(
+        mmap_size=1024 * 1024 * 1024,
+        cache_size=64 * 1024,
+        temp_store_memory=True,
+        query_only=True,
+    ),
+    "default": ReadProfile(),
+}
+
+# The read profile used when none is specified
+DEFAULT_READ_PROFILE = READ_PROFILES["default"]
+
+
+def get_read_profile(name: str) -> ReadProfile:
+    """
+    Retrieve the read profile with the given name (see READ_PROFILES), as given
+    on the command line
+    """
+    try:
+        return READ_PROFILES[name]
+    except KeyError as error:
+        raise argparse.ArgumentTypeError(
+            '"{}" is not a read profile (choose from {})'.format(
+                name, ", ".join(f'"{profile_name}"' for profile_name in READ_PROFILES)
+            )
+        ) from error
+
+
+@dataclass(frozen=True)
+class DatabaseSnapshot:
+    """
+    A consistent copy of a database, taken by snapshot_database(), which
+    nothing writes to for as long as it exists: either a file, or an in-memory
+    database (identified by the given path) which can only be opened within the
+    process that took the snapshot
+    """
+
+    path: str
+    in_memory: bool = False
+
+
+def connect_read_only(
+    db_path: Union[str, Path, DatabaseSnapshot],
+    read_profile: Optional[ReadProfile] = None,
+) -> sqlite3.Connection:
+    """
+    Open a read-only connection to the SQLite database at the given path (or
+    to the given snapshot, which is always opened as immutable), with the
+    settings of the given read profile (or of DEFAULT_READ_PROFILE)
+    """
+    read_profile = read_profile or DEFAULT_READ_PROFILE
+    if isinstance(db_path, DatabaseSnapshot):
+        uri = "file:{}?mode=ro&immutable=1{}".format(
+            db_path.path, "&vfs=memdb" if db_path.in_memory else ""
+        )
+    else:
+        uri = (
+            f"file:{db_path}?mode=ro{'&immutable=1' if read_profile.immutable else ''}"
+        )
+    con = sqlite3.connect(uri, uri=True)
+    if read_profile.mmap_size:
+        con.execute(f"PRAGMA mmap_size = {int(read_profile.mmap_size)}")
+    if read_profile.cache_size:
+        # A negative cache size is a number of KiB rather than of pages
+        con.execute(f"PRAGMA cache_size = {-abs(int(read_profile.cache_size))}")
+    if read_profile.temp_store_memory:
+        con.execute("PRAGMA temp_store = MEMORY")
+    if read_profile.query_only:
+        con.execute("PRAGMA query_only = ON")
+    return con
+
+
+def copy_tables(
+    source_path: Union[str, Path, DatabaseSnapshot],
+    target_con: sqlite3.Connection,
+    tables: Sequence[str],
+) -> None:
+    """
+    Copy the given tables (along with their indices) from the database at the
+    given path into the (empty) database of the given connection, within a
+    single read transaction so that the tables are consistent with each other
+    """
+    if isinstance(source_path, DatabaseSnapshot):
+        source_path = source_path.path
+    tables_placeholder = ", ".join("?" for _ in tables)
+    # An attached database inherits the VFS of the main database, so the tables
+    # are copied into a private in-memory database (which uses the default VFS)
+    # before being backed up into the target database
+    with closing(sqlite3.connect(":memory:", isolation_level=None)) as copy_con:
+        copy_con.execute(
+            "ATTACH DATABASE ? AS source", (f"file:{source_path}?mode=ro",)
+        )
+        copy_con.execute("BEGIN")
+        for (table_sql,) in copy_con.execute(
+            "SELECT sql FROM source.sqlite_master"
+            f" WHERE type = 'table' AND name IN ({tables_placeholder})",
+            tables,
+        ).fetchall():
+            copy_con.execute(table_sql)
+        for table in tables:
+            copy_con.execute(
+                'INSERT INTO main."{0}" SELECT * FROM source."{0}"'.format(
+                    table.replace('"', '""')
+                )
+            )
+        # Indices are created after the rows have been copied, which is faster
+        # than updating them for every row; the automatic indices of UNIQUE
+        # constraints (which have no SQL) are created along with their tables
+        for (index_sql,) in copy_con.execute(
+            "SELECT sql FROM source.sqlite_master WHERE type = 'index'"
+            f" AND sql IS NOT NULL AND tbl_name IN ({tables_placeholder})",
+            tables,
+        ).fetchall():
+            copy_con.execute(index_sql)
+        copy_con.execute("COMMIT")
+        copy_con.execute("DETACH DATABASE source")
+        copy_con.backup(target_con)
+
+
+@contextmanager
+def snapshot_database(
+    db_path: Union[str, Path, DatabaseSnapshot],
+    directory: Optional[Union[str, Path]] = None,
+    tables: Optional[Sequence[str]] = None,
+) -> Generator[DatabaseSnapshot, None, None]:
+    """
+    Copy the database at the given path (or only the given tables of it) into
+    memory, or into a temporary file within the given directory (such as a
+    tmpfs like /dev/shm), and yield the copy for the duration of the context;
+    the whole database is copied page by page with SQLite's backup API, within
+    a single read transaction, so every query of the snapshot sees the
+    database exactly as it was at one moment, however much is written to the
+    database in the meantime
+    """
+    if directory is None:
+        # A path starting with a slash names an in-memory database which every
+        # connection within this process can open, for as long as at least one
+        # connection to it stays open
+        snapshot = DatabaseSnapshot(
+            path=f"/ica-snapshot-{uuid.uuid4().hex}", in_memory=True
+        )
+        target_uri = f"file:{snapshot.path}?vfs=memdb"
+    else:
+        fd, snapshot_path = tempfile.mkstemp(
+            prefix="ica-snapshot-", suffix=".db", dir=directory
+        )
+        os.close(fd)
+        snapshot = DatabaseSnapshot(path=snapshot_path)
+        target_uri = f"file:{snapshot_path}"
+    try:
+        with closing(sqlite3.connect(target_uri, uri=True)) as target_con:
+            if tables is None:
+                with closing(
+                    connect_read_only(db_path, READ_PROFILES["default"])
+                ) as source_con:
+                    source_con.backup(target_con)
+            else:
+                copy_tables(db_path, target_con, tables)
+            # The connection which took the snapshot keeps an in-memory
+            # snapshot alive until the context exits
+            yield snapshot
+    finally:
+        if not snapshot.in_memory:
+            os.unlink(snapshot.path)
@@ -48,3 +48,36 @@ class FormatNotSupportedError(BaseAnalyzerException):
     """
 
     pass
+
+
+class FeatureNotFoundError(BaseAnalyzerException):
+    """
+    Raised when an analyzer requests a derived feature which has not been
+    registered
+    """
+
+    pass
+
+
+class SearchIndexNotFoundError(BaseAnalyzerException):
+    """
+    Raised when searching messages before the search index has been built
+    """
+
+    pass
+
+
+class SearchQueryInvalidError(BaseAnalyzerException):
+    """
+    Raised when the specified full-text search query is malformed
+    """
+
+    pass
+
+
+class WarehouseNotFoundError(BaseAnalyzerException):
+    """
+    Raised when querying the warehouse before it has been built
+    """
+
+    pass
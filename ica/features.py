@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+from collections.abc import Callable
+from typing import Any, TypeVar
+
+import pandas as pd
+
+from ica.cache import DataFrameCache
+from ica.core import DataFrameNamespace
+from ica.exceptions import FeatureNotFoundError
+from ica.rollup import get_daily_rollup
+from ica.sessions import get_session_ids
+from ica.text import get_emoji_occurrences, get_link_occurrences
+
+# The type of a function which computes a derived feature from a dataset
+FeatureFunction = TypeVar("FeatureFunction", bound=Callable[[DataFrameNamespace], Any])
+
+# The function which computes each registered feature, keyed by feature name
+FEATURE_REGISTRY: dict[str, Callable[[DataFrameNamespace], Any]] = {}
+
+# The features computed so far for each dataset (i.e. for its messages,
+# attachments, and handles dataframes), keyed by feature name
+FEATURE_CACHE: DataFrameCache[dict[str, Any]] = DataFrameCache()
+
+
+def register_feature(name: str) -> Callable[[FeatureFunction], FeatureFunction]:
+    """
+    Register the decorated function as the means of computing the derived
+    feature with the given name; the function receives the dataset (i.e. the
+    DataFrameNamespace) and may itself call get_feature() for other features
+    """
+
+    def decorator(compute_feature: FeatureFunction) -> FeatureFunction:
+        FEATURE_REGISTRY[name] = compute_feature
+        return compute_feature
+
+    return decorator
+
+
+def get_feature(dfs: DataFrameNamespace, name: str) -> Any:
+    """
+    Return the derived feature with the given name for the given dataset,
+    computing it only the first time it is requested for that dataset; because
+    the same value is returned to every caller, it must not be modified in place
+    """
+    if name not in FEATURE_REGISTRY:
+        raise FeatureNotFoundError(f'No feature named "{name}" has been registered')
+    features = FEATURE_CACHE.get([dfs.messages, dfs.attachments, dfs.handles], (), dict)
+    # setdefault() keeps the features consistent when analyzers running in
+    # concurrent threads request the same feature
+    if name not in features:
+        features.setdefault(name, FEATURE_REGISTRY[name](dfs))
+    return features[name]
+
+
+@register_feature("non_reaction_messages")
+def get_non_reaction_messages(dfs: DataFrameNamespace) -> pd.DataFrame:
+    """
+    The messages which are not reactions (e.g. "Loved ...")
+    """
+    return dfs.messages[~dfs.messages["is_reaction"]]
+
+
+@register_feature("reaction_messages")
+def get_reaction_messages(dfs: DataFrameNamespace) -> pd.DataFrame:
+    """
+    The messages which are reactions (e.g. "Loved ...")
+    """
+    return dfs.messages[dfs.messages["is_reaction"]]
+
+
+@register_feature("all_participants")
+def get_all_participants(dfs: DataFrameNamespace) -> list[str]:
+    """
+    The sorted display names of every participant (other than you)
+    """
+    return sorted(dfs.handles["display_name"].unique())
+
+
+@register_feature("display_names_by_handle")
+def get_display_names_by_handle(dfs: DataFrameNamespace) -> dict[str, str]:
+    """
+    The display name of the participant who owns each handle
+    """
+    return dict(zip(dfs.handles["identifier"], dfs.handles["display_name"]))
+
+
+@register_feature("emojis")
+def get_emojis(dfs: DataFrameNamespace) -> pd.Series:
+    """
+    Every emoji (with skin tones removed) within the non-reaction messages,
+    labeled with the index of the message it was found in
+    """
+    return get_emoji_occurrences(
+        get_feature(dfs, "non_reaction_messages")["text"]
+    ).rename("emoji")
+
+
+@register_feature("links")
+def get_links(dfs: DataFrameNamespace) -> pd.DataFrame:
+    """
+    Every link (with its normalized domain) within the non-reaction messages,
+    labeled with the index of the message it was found in
+    """
+    return get_link_occurrences(get_feature(dfs, "non_reaction_messages")["text"])
+
+
+@register_feature("daily_rollup")
+def get_daily_rollup_feature(dfs: DataFrameNamespace) -> pd.DataFrame:
+    """
+    The number of messages and reactions by each sender on each day
+    """
+    return get_daily_rollup(dfs)
+
+
+@register_feature("session_ids")
+def get_session_ids_feature(dfs: DataFrameNamespace) -> pd.Series:
+    """
+    The ID of the session each message belongs to, where sessions are split by
+    the default session gap
+    """
+    return get_session_ids(dfs)
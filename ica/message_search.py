@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+import sqlite3
+from collections.abc import Generator, Sequence
+from contextlib import closing, contextmanager
+from dataclasses import dataclass
+from typing import Optional
+
+import pandas as pd
+
+import ica.contact
+import ica.core
+from ica.cli import TypedCLIArguments
+from ica.contact import ContactRecord
+from ica.conversations import get_all_conversations
+from ica.database import connect_read_only
+
+
+@dataclass
+class SearchScope:
+    """
+    The messages to be searched by the search and grep analyzers: the chat
+    database, the chats within it (or None for every chat), the contacts of
+    those chats (along with the display name of each of their handles), and
+    the senders whose messages to include (see get_sender_filter())
+    """
+
+    chat_con: sqlite3.Connection
+    chat_ids: Optional[list[str]]
+    contact_records: list[ContactRecord]
+    display_names: dict[str, str]
+    include_me: bool
+    sender_handles: Optional[set[str]]
+
+
+def get_sender_filter(
+    from_people: Optional[Sequence[str]], contact_records: Sequence[ContactRecord]
+) -> tuple[bool, Optional[set[str]]]:
+    """
+    Resolve the user-supplied 'from_people' filters into whether to include
+    messages from you, and the handles of the other senders whose messages to
+    include (or None to include messages from anyone else, including people who
+    are not in your contacts)
+    """
+    people = [person.lower() for person in from_people or ()]
+    if not people or "all" in people:
+        return True, None
+    if "them" in people:
+        return "me" in people, None
+    return ica.core.resolve_sender_identifiers(contact_records, from_people or ())
+
+
+@contextmanager
+def get_search_scope(
+    cli_args: TypedCLIArguments,
+) -> Generator[SearchScope, None, None]:
+    """
+    Open the chat database and resolve the conversation (or, with
+    --all-conversations, every conversation) and senders to search, according
+    to the given command-line arguments
+    """
+    ica.core.validate_date_range(cli_args.from_date, cli_args.to_date)
+    if cli_args.all_conversations:
+        with closing(
+            connect_read_only(ica.core.get_chat_database_path(), cli_args.read_profile)
+        ) as chat_con:
+            contact_records = ica.contact.get_all_contact_records(cli_args.read_profile)
+            include_me, sender_handles = get_sender_filter(
+                cli_args.from_people, contact_records
+            )
+            yield SearchScope(
+                chat_con=chat_con,
+                chat_ids=None,
+                contact_records=contact_records,
+                display_names={
+                    identifier: record.full_name or identifier
+                    for record in contact_records
+                    for identifier in record.get_identifiers()
+                },
+                include_me=include_me,
+                sender_handles=sender_handles,
+            )
+    else:
+        with ica.core.get_conversation(
+            cli_args.contacts,
+            cli_args.from_date,
+            cli_args.to_date,
+            cli_args.read_profile,
+        ) as (chat_con, chat_ids, contact_records):
+            include_me, sender_handles = get_sender_filter(
+                cli_args.from_people, contact_records
+            )
+            yield SearchScope(
+                chat_con=chat_con,
+                chat_ids=chat_ids,
+                contact_records=contact_records,
+                display_names={
+                    identifier: ica.contact.get_unique_contact_display_name(
+                        contact_records, record
+                    )
+                    for record in contact_records
+                    for identifier in record.get_identifiers()
+                },
+                include_me=include_me,
+                sender_handles=sender_handles,
+            )
+
+
+def format_found_messages(
+    messages: pd.DataFrame,
+    search_scope: SearchScope,
+    timezone: str,
+    columns: Sequence[str] = ("timestamp", "sender", "message"),
+) -> pd.DataFrame:
+    """
+    Convert the given messages (with the chat_id, sender_handle, is_from_me,
+    date, and text of each) into the given output columns; when every
+    conversation is searched, the participants of each message's conversation
+    are listed after its timestamp
+    """
+    columns = list(columns)
+    if search_scope.chat_ids is None:
+        participants = {
+            chat_id: conversation.participants
+            for conversation in get_all_conversations(search_scope.chat_con)
+            for chat_id in conversation.chat_ids
+        }
+        messages = messages.assign(
+            participants=lambda df: df["chat_id"].map(participants)
+        )
+        columns.insert(columns.index("timestamp") + 1, "participants")
+    return messages.assign(
+        timestamp=lambda df: ica.core.get_datetimes_from_imessage_dates(
+            df["date"], timezone
+        ),
+        sender=lambda df: (
+            df["sender_handle"]
+            .map(search_scope.display_names)
+            .fillna(df["sender_handle"])
+            .where(~df["is_from_me"].astype(bool), "Me")
+        ),
+        # U+FFFC is the object replacement character, which appears as the
+        # textual message for every attachment
+        message=lambda df: df["text"].replace(r"\ufffc", "(attachment)", regex=True),
+    ).loc[:, columns]
@@ -0,0 +1,11 @@
+-- Every contact in the database, with one row for every combination of the
+-- contact's phone numbers and email addresses (see contact.sql)
+SELECT
+    "ZABCDRECORD"."Z_PK" AS "contact_id",
+    "ZABCDRECORD"."ZFIRSTNAME",
+    "ZABCDRECORD"."ZLASTNAME",
+    "ZABCDPHONENUMBER"."ZFULLNUMBER",
+    "ZABCDEMAILADDRESS"."ZADDRESS"
+FROM "ZABCDRECORD"
+LEFT JOIN "ZABCDPHONENUMBER" ON "ZABCDRECORD"."Z_PK" = "ZABCDPHONENUMBER"."ZOWNER"
+LEFT JOIN "ZABCDEMAILADDRESS" ON "ZABCDRECORD"."Z_PK" = "ZABCDEMAILADDRESS"."ZOWNER"
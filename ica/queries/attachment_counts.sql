@@ -0,0 +1,35 @@
+-- Count the attachments in a conversation by sender, MIME type, and file
+-- extension class, so that attachment totals never require materializing every
+-- attachment row
+SELECT
+    "is_from_me",
+    "sender_handle",
+    "mime_type",
+    "extension_class",
+    COUNT(*) AS "count"
+FROM (
+    SELECT
+        "message"."is_from_me",
+        "handle"."id" AS "sender_handle",
+        "attachment"."mime_type",
+        -- The extension class of each attachment is the first of the requested
+        -- file extensions which its filename ends with, if any
+        {extension_class_clause} AS "extension_class"
+    FROM "attachment"
+    INNER JOIN "message_attachment_join"
+        ON "attachment"."ROWID" = "attachment_id"
+    INNER JOIN "message"
+        ON "message"."ROWID" = "message_id"
+    LEFT JOIN "handle"
+        ON "message"."handle_id" = "handle"."ROWID"
+    WHERE
+        "message_id" IN (
+            -- Get all messages tied to chat
+            SELECT "message_id"
+            FROM "chat_message_join"
+            WHERE "chat_id" IN ({chat_ids_placeholder})
+        )
+    {date_filter_clause}
+    {sender_filter_clause}
+)
+GROUP BY "is_from_me", "sender_handle", "mime_type", "extension_class"
@@ -3,7 +3,7 @@ SELECT
     "mime_type",
     "filename",
     "message_id",
-    datetime("message"."date" / 1000000000 + strftime("%s", "2001-01-01") ,"unixepoch") as "datetime",
+    "message"."date" AS "datetime",
     "is_from_me",
     "handle"."id" as "sender_handle"
 FROM "attachment"
@@ -21,3 +21,4 @@ WHERE
         WHERE "chat_id" IN ({chat_ids_placeholder})
     )
 {date_filter_clause}
+{sender_filter_clause}
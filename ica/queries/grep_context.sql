@@ -0,0 +1,19 @@
+-- Read the given number of messages immediately before or after the message
+-- with the given ROWID in the given chat (along with the same columns as
+-- grep_messages.sql); only the chat's primary key index is walked, so that the
+-- rest of the conversation is never read
+SELECT
+    "message"."ROWID",
+    "chat_message_join"."chat_id",
+    "handle"."id" AS "sender_handle",
+    "message"."is_from_me",
+    "message"."date",
+    "message"."text",
+    "message"."attributedBody"
+FROM "chat_message_join"
+JOIN "message" ON "message"."ROWID" = "chat_message_join"."message_id"
+LEFT JOIN "handle" ON "message"."handle_id" = "handle"."ROWID"
+WHERE "chat_message_join"."chat_id" = :chat_id
+AND "chat_message_join"."message_id" {comparison_operator} :message_rowid
+ORDER BY "chat_message_join"."message_id" {sort_direction}
+LIMIT :message_count
@@ -0,0 +1,21 @@
+-- Read the messages (within the given chats and the given date range) which
+-- might match the user's pattern; the literal filter, if any, rules out the
+-- messages which cannot match without decoding their attributedBody
+SELECT
+    "message"."ROWID",
+    "chat_message_join"."chat_id",
+    "handle"."id" AS "sender_handle",
+    "message"."is_from_me",
+    "message"."date",
+    "message"."text",
+    "message"."attributedBody"
+FROM "chat_message_join"
+JOIN "message" ON "message"."ROWID" = "chat_message_join"."message_id"
+-- Use a left join to keep messages from "me" (which often have handle_id=0 and
+-- no corresponding row in the handle table)
+LEFT JOIN "handle" ON "message"."handle_id" = "handle"."ROWID"
+WHERE {chat_filter_clause}
+{literal_filter_clause}
+{sender_filter_clause}
+{date_filter_clause}
+ORDER BY "message"."date"
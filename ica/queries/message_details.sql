@@ -0,0 +1,21 @@
+-- The messages of the conversation along with their session IDs (see
+-- message_sessions.sql) and other helper columns derived from them; as a
+-- view, the session IDs and helper columns are only computed by the queries
+-- which read message_details (rather than messages); every date and time is local to the connection's timezone (i.e. the
+-- timezone of the conversation's datetimes)
+CREATE VIEW "message_details" AS
+SELECT
+    *,
+    CAST("datetime" AS DATE) AS "local_date",
+    hour("datetime") AS "hour",
+    -- As in pandas, 0 is Monday and 6 is Sunday
+    isodow("datetime") - 1 AS "weekday",
+    len(regexp_extract_all(coalesce("text", ''), '\S+')) AS "word_count",
+    -- Sessions are numbered in chronological order, so a session starts
+    -- wherever the session ID changes
+    "session_id" IS DISTINCT FROM lag("session_id") OVER (
+        ORDER BY "datetime", "ROWID"
+    ) AS "is_session_start",
+    -- The kind of reaction (e.g. "Loved") of every reaction
+    nullif(regexp_extract("text", '{reaction_pattern}', 1), '') AS "reaction_type"
+FROM "_message_sessions"
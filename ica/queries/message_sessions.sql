@@ -0,0 +1,21 @@
+-- The messages of the conversation along with the ID of the session each
+-- message belongs to (see ica.get_session_ids()), where a new session begins
+-- after every silence of more than the session gap; like pandas, sessions are
+-- numbered from 0 in chronological order
+CREATE VIEW "_message_sessions" AS
+SELECT
+    * EXCLUDE ("follows_gap"),
+    sum("follows_gap") OVER (ORDER BY "datetime", "ROWID") - 1 AS "session_id"
+FROM (
+    SELECT
+        *,
+        -- The first message follows no other message, so it always begins a
+        -- session
+        coalesce(
+            epoch_us("datetime") - lag(epoch_us("datetime")) OVER (
+                ORDER BY "datetime", "ROWID"
+            ) > {session_gap_us},
+            TRUE
+        )::INTEGER AS "follows_gap"
+    FROM "messages"
+)
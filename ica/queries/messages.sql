@@ -4,17 +4,19 @@ SELECT
     "handle_id",
     "handle"."id" AS "sender_handle",
     "attributedBody",
-    datetime("message"."date" / 1000000000 + strftime("%s", "2001-01-01") ,"unixepoch") as "datetime",
+    "message"."date" AS "datetime",
     "is_from_me"
-FROM "message"
+-- Get all messages tied to chat; reading the messages by way of the chat's
+-- index (rather than the other way around) also allows a page of messages to
+-- be read without reading the rest of the chat
+FROM "chat_message_join"
+JOIN "message" ON "message"."ROWID" = "chat_message_join"."message_id"
 -- Use a left join to keep messages from "me" (which often have handle_id=0 and
 -- no corresponding row in the handle table)
 LEFT JOIN "handle" ON "message"."handle_id" = "handle"."ROWID"
-WHERE "message"."ROWID" IN (
-    -- Get all messages tied to chat
-    SELECT "message_id"
-    FROM "chat_message_join"
-    WHERE "chat_id" IN ({chat_ids_placeholder})
-)
+WHERE "chat_message_join"."chat_id" IN ({chat_ids_placeholder})
 {date_filter_clause}
-ORDER BY "datetime"
+{rowid_filter_clause}
+{sender_filter_clause}
+ORDER BY {order_clause}
+{limit_clause}
@@ -0,0 +1,38 @@
+-- The schema of the sidecar database which persists the full-text search index
+-- between runs; the decoded text of every message is stored alongside the
+-- metadata used to filter search results, and indexed by an FTS5 table which
+-- reads its content from the same table
+CREATE TABLE IF NOT EXISTS "indexed_message" (
+    "entry_id" INTEGER PRIMARY KEY,
+    "message_rowid" NOT NULL UNIQUE,
+    "chat_id",
+    "sender_handle" TEXT,
+    "is_from_me" INTEGER NOT NULL,
+    "is_reaction" INTEGER NOT NULL,
+    -- The time the message was sent, in nanoseconds since 2001-01-01 (UTC), as
+    -- stored in chat.db
+    "date" INTEGER NOT NULL,
+    "text" TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS "indexed_message_chat_id_date"
+ON "indexed_message" ("chat_id", "date");
+
+CREATE INDEX IF NOT EXISTS "indexed_message_date"
+ON "indexed_message" ("date");
+
+-- Prefix indexes of 2 and 3 characters make prefix queries (e.g. "din*") as
+-- fast as queries for whole words
+CREATE VIRTUAL TABLE IF NOT EXISTS "message_fts" USING fts5(
+    "text",
+    content="indexed_message",
+    content_rowid="entry_id",
+    tokenize="unicode61 remove_diacritics 2",
+    prefix="2 3"
+);
+
+-- The ROWID of the last message in chat.db which has been read into the index
+-- (including messages without any text, which are not indexed)
+CREATE TABLE IF NOT EXISTS "index_state" (
+    "last_message_rowid" NOT NULL
+);
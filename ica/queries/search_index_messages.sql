@@ -0,0 +1,20 @@
+-- Read the next batch of messages to add to the full-text search index, in
+-- order of ROWID (so that each batch can resume where the previous one ended)
+SELECT
+    "message"."ROWID",
+    (
+        SELECT "chat_id"
+        FROM "chat_message_join"
+        WHERE "message_id" = "message"."ROWID"
+        LIMIT 1
+    ) AS "chat_id",
+    "handle"."id" AS "sender_handle",
+    "is_from_me",
+    "date",
+    "text",
+    "attributedBody"
+FROM "message"
+LEFT JOIN "handle" ON "message"."handle_id" = "handle"."ROWID"
+WHERE "message"."ROWID" > :last_message_rowid
+ORDER BY "message"."ROWID"
+LIMIT :batch_size
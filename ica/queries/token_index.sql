@@ -0,0 +1,26 @@
+-- The schema of the sidecar database which persists the inverted token index
+-- between runs; the index maps every case-folded word to the messages (by
+-- ROWID in chat.db) containing it
+CREATE TABLE IF NOT EXISTS "indexed_message" (
+    "message_rowid" PRIMARY KEY,
+    "sender_handle" TEXT,
+    "is_from_me" INTEGER NOT NULL,
+    -- The time the message was sent, in nanoseconds since the Unix epoch (UTC)
+    "timestamp" INTEGER NOT NULL,
+    -- A hash of the text the message was indexed with, which differs from the
+    -- hash of its current text if the message has since been edited
+    "text_hash" INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS "token" (
+    "token_id" INTEGER PRIMARY KEY,
+    "token" TEXT NOT NULL UNIQUE
+);
+
+-- Each posting records how many times a token appears within a message
+CREATE TABLE IF NOT EXISTS "posting" (
+    "token_id" INTEGER NOT NULL,
+    "message_rowid" NOT NULL,
+    "frequency" INTEGER NOT NULL,
+    PRIMARY KEY ("token_id", "message_rowid")
+) WITHOUT ROWID;
@@ -0,0 +1,20 @@
+-- Read the next batch of attachments to add to the warehouse, in order of
+-- ROWID (so that each batch can resume where the previous one ended)
+SELECT
+    "attachment"."ROWID",
+    "message_id",
+    "mime_type",
+    "filename",
+    "message"."date" AS "datetime",
+    "is_from_me",
+    "handle"."id" AS "sender_handle"
+FROM "attachment"
+INNER JOIN "message_attachment_join"
+    ON "attachment"."ROWID" = "attachment_id"
+INNER JOIN "message"
+    ON "message"."ROWID" = "message_id"
+LEFT JOIN "handle"
+    ON "message"."handle_id" = "handle"."ROWID"
+WHERE "attachment"."ROWID" > :last_rowid
+ORDER BY "attachment"."ROWID", "message_id"
+LIMIT :batch_size
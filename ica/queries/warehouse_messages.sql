@@ -0,0 +1,16 @@
+-- Read the next batch of messages to add to the warehouse, in order of ROWID
+-- (so that each batch can resume where the previous one ended)
+SELECT
+    "message"."ROWID",
+    "handle"."id" AS "sender_handle",
+    "is_from_me",
+    "message"."date" AS "datetime",
+    "text",
+    "attributedBody"
+FROM "message"
+-- Use a left join to keep messages from "me" (which often have handle_id=0 and
+-- no corresponding row in the handle table)
+LEFT JOIN "handle" ON "message"."handle_id" = "handle"."ROWID"
+WHERE "message"."ROWID" > :last_rowid
+ORDER BY "message"."ROWID"
+LIMIT :batch_size
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+import datetime
+from typing import Union
+
+import numpy as np
+import pandas as pd
+
+from ica.cache import DataFrameCache
+from ica.core import DataFrameNamespace
+from ica.timestamps import DAY_NS, HOUR_NS, get_local_codes, get_local_wall_ns
+
+# The periods by which messages can be rolled up, from finest to coarsest
+GRANULARITIES = ("hour", "day", "week", "month", "year")
+
+# The rollups which are computed directly from a messages dataframe; every
+# coarser rollup is derived from the daily rollup instead
+BASE_GRANULARITIES = ("hour", "day")
+
+# The base rollups computed for each messages dataframe, keyed by the
+# granularity
+ROLLUP_CACHE: DataFrameCache[pd.DataFrame] = DataFrameCache()
+
+
+def get_local_period_codes(
+    datetimes: Union[pd.Series, pd.DatetimeIndex], granularity: str = "day"
+) -> np.ndarray:
+    """
+    Convert the given timezone-aware datetimes to integer period codes, where
+    each code numbers the local hour, day, week (starting on Monday), month, or
+    year of the datetime (i.e. in the datetime's own timezone) since 1970
+    """
+    # The nanoseconds of the local wall time since the epoch can be
+    # floor-divided into whole hours or days without any calendar logic
+    datetimes = pd.DatetimeIndex(datetimes)
+    wall_ns = get_local_wall_ns(datetimes.as_unit("ns").asi8, datetimes.tz)
+    if granularity == "hour":
+        return wall_ns // HOUR_NS
+    day_codes = wall_ns // DAY_NS
+    if granularity == "day":
+        return day_codes
+    if granularity == "week":
+        # 1970-01-01 was a Thursday, so shift every day code such that each
+        # week begins on a Monday
+        return (day_codes + 3) // 7
+    if granularity in ("month", "year"):
+        return (
+            day_codes.astype("datetime64[D]")
+            .astype("datetime64[M]" if granularity == "month" else "datetime64[Y]")
+            .astype("int64")
+        )
+    raise ValueError(f'Unsupported granularity "{granularity}"')
+
+
+def get_period_starts(
+    period_codes: np.ndarray,
+    granularity: str,
+    timezone: Union[str, datetime.tzinfo, None],
+) -> pd.DatetimeIndex:
+    """
+    Convert the given integer period codes (see get_local_period_codes()) to
+    the timezone-aware datetimes at which those periods begin
+    """
+    if granularity == "hour":
+        wall_ns = period_codes * HOUR_NS
+    elif granularity == "day":
+        wall_ns = period_codes * DAY_NS
+    elif granularity == "week":
+        wall_ns = (period_codes * 7 - 3) * DAY_NS
+    elif granularity in ("month", "year"):
+        wall_ns = (
+            period_codes.astype(
+                "datetime64[M]" if granularity == "month" else "datetime64[Y]"
+            )
+            .astype("datetime64[ns]")
+            .astype("int64")
+        )
+    else:
+        raise ValueError(f'Unsupported granularity "{granularity}"')
+    return pd.DatetimeIndex(np.asarray(wall_ns, dtype="int64")).tz_localize(
+        timezone,
+        # Some timezones skip midnight when daylight saving time begins, in
+        # which case the period starts at the first valid time; when a local
+        # hour occurs twice, it is labeled with the first occurrence
+        nonexistent="shift_forward",
+        ambiguous=np.ones(len(wall_ns), dtype=bool),
+    )
+
+
+def get_period_range(
+    period_starts: pd.DatetimeIndex, granularity: str
+) -> pd.DatetimeIndex:
+    """
+    Return the start of every period between the earliest and latest of the
+    given period starts (inclusive), so that a rollup can be reindexed to fill
+    the periods with no messages
+    """
+    if period_starts.empty:
+        return period_starts
+    period_codes = get_local_period_codes(period_starts, granularity)
+    return get_period_starts(
+        np.arange(period_codes.min(), period_codes.max() + 1),
+        granularity,
+        period_starts.tz,
+    ).rename(period_starts.name)
+
+
+def get_rollup(dfs: DataFrameNamespace, granularity: str = "day") -> pd.DataFrame:
+    """
+    Return a dataframe with the number of messages and reactions sent by each
+    sender in each (local) hour, day, week, month, or year of the conversation,
+    indexed by 'date' (the start of the period) and 'sender_display_name'; only
+    the (period, sender) pairs with at least one message are included
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f'Unsupported granularity "{granularity}"')
+    if granularity in BASE_GRANULARITIES:
+        messages = dfs.messages
+        # The cached rollup is copied so that callers can freely modify it
+        return ROLLUP_CACHE.get(
+            [messages], (granularity,), lambda: build_rollup(messages, granularity)
+        ).copy()
+
+    # Coarser periods are always whole numbers of days, so they can be summed
+    # from the (much smaller) daily rollup rather than from every message
+    daily_rollup = get_rollup(dfs, "day")
+    dates = daily_rollup.index.get_level_values("date")
+    return daily_rollup.groupby(
+        [
+            get_period_starts(
+                get_local_period_codes(dates, granularity), granularity, dates.tz
+            ).rename("date"),
+            daily_rollup.index.get_level_values("sender_display_name"),
+        ]
+    ).sum()
+
+
+def get_daily_rollup(dfs: DataFrameNamespace) -> pd.DataFrame:
+    """
+    Return a dataframe with the number of messages and reactions sent by each
+    sender on each (local) day of the conversation, indexed by 'date' and
+    'sender_display_name'; only the (day, sender) pairs with at least one
+    message are included; the rollup is computed once per messages dataframe,
+    so any number of analyzers can derive their daily metrics from it
+    """
+    return get_rollup(dfs, "day")
+
+
+def build_rollup(messages: pd.DataFrame, granularity: str) -> pd.DataFrame:
+    """
+    Compute the rollup of the given messages dataframe for the given
+    granularity (see get_rollup()) by counting every combination of integer
+    period code and sender code in a single pass
+    """
+    # The local hour and day codes of the messages are cached, since other
+    # analyzers may group the same messages by hour or by day
+    unique_period_codes, period_indices = np.unique(
+        get_local_codes(messages, granularity), return_inverse=True
+    )
+    sender_codes, senders = pd.factorize(messages["sender_display_name"])
+    # Number every (period, sender) pair so that all of them can be counted at
+    # once; the result has one slot per period per sender
+    pair_codes = period_indices * len(senders) + sender_codes
+    pair_count = len(unique_period_codes) * len(senders)
+    is_reaction = messages["is_reaction"].eq(True).to_numpy()
+    total_counts = np.bincount(pair_codes, minlength=pair_count)
+    reaction_counts = np.bincount(pair_codes[is_reaction], minlength=pair_count)
+    return (
+        pd.DataFrame(
+            {
+                "messages": total_counts - reaction_counts,
+                "reactions": reaction_counts,
+            },
+            index=pd.MultiIndex.from_product(
+                [
+                    get_period_starts(
+                        unique_period_codes,
+                        granularity,
+                        messages["datetime"].dt.tz,
+                    ),
+                    senders,
+                ],
+                names=["date", "sender_display_name"],
+            ),
+        )
+        .loc[total_counts > 0]
+        .sort_index()
+    )
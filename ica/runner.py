@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+import argparse
+import contextlib
+import contextvars
+import shlex
+import sys
+import time
+from collections.abc import Sequence
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from io import BytesIO
+from pathlib import Path
+from types import ModuleType
+from typing import Optional, Union
+
+import pandas as pd
+
+import ica.analyzer
+import ica.cli
+import ica.conversations
+from ica.analyzer import AnalyzerResult
+from ica.core import (
+    COLLECTED_RESULTS,
+    SHARED_DATAFRAMES,
+    SUPPORTED_OUTPUT_FORMAT_MAP,
+    DataFrameNamespace,
+    output_results,
+    prepare_df_for_output,
+    use_chat_database_snapshot,
+)
+from ica.exceptions import FormatNotSupportedError
+from ica.features import get_feature
+
+# The maximum length of an Excel worksheet name
+MAX_SHEET_NAME_LENGTH = 31
+
+# The kinds of worker pool which analyzers can be run concurrently in
+EXECUTOR_TYPES = {"thread": ThreadPoolExecutor, "process": ProcessPoolExecutor}
+
+
+@dataclass
+class AnalyzerSpec:
+    """
+    An analyzer to run as part of a multi-analyzer run, along with any
+    arguments specific to that analyzer
+    """
+
+    analyzer: str
+    args: list[str] = field(default_factory=list)
+    # The unique name under which the analyzer's results are output (e.g. the
+    # file name or Excel sheet name)
+    name: str = ""
+
+
+@dataclass
+class AnalyzerRun:
+    """
+    A single analyzer's run within a multi-analyzer run, along with the
+    results it output
+    """
+
+    spec: AnalyzerSpec
+    results: list[tuple[pd.DataFrame, Optional[dict[str, str]]]]
+    # The number of seconds the analyzer took to run, including the time spent
+    # loading any data which was not already loaded by a previous analyzer
+    seconds: float = 0.0
+
+
+class RunCLIArguments(object):
+    """
+    The CLI arguments specific to the `ica run` command; every other argument is
+    passed through to each analyzer
+    """
+
+    analyzers: list[AnalyzerSpec]
+    workers: int
+    executor: str
+    timings: bool
+    snapshot: bool
+    snapshot_dir: Optional[str]
+    format: Optional[str]
+    output: Optional[str]
+
+
+def parse_analyzer_specs(value: str) -> list[AnalyzerSpec]:
+    """
+    Parse a comma-separated list of analyzers, where each analyzer may be
+    followed by its own arguments (e.g. "message_totals,totals_by_day -g week")
+    """
+    specs: list[AnalyzerSpec] = []
+    for spec_str in value.split(","):
+        analyzer, *args = shlex.split(spec_str) or [""]
+        if not analyzer:
+            raise argparse.ArgumentTypeError(f'"{value}" contains an empty analyzer')
+        specs.append(AnalyzerSpec(analyzer=analyzer, args=args))
+    # Give each analyzer a unique name based on its module or file name
+    name_counts: dict[str, int] = {}
+    for spec in specs:
+        base_name = Path(spec.analyzer).stem
+        name_counts[base_name] = name_counts.get(base_name, 0) + 1
+        spec.name = (
+            base_name
+            if name_counts[base_name] == 1
+            else f"{base_name}_{name_counts[base_name]}"
+        )
+    return specs
+
+
+def get_run_cli_parser() -> argparse.ArgumentParser:
+    """
+    Retrieve the parser for the arguments specific to the `ica run` command
+    """
+    parser = argparse.ArgumentParser(
+        prog="ica run",
+        description="run several analyzers over a single load of the "
+        "conversation; every unrecognized argument (e.g. --contact) is passed "
+        "to each analyzer",
+    )
+    parser.add_argument(
+        "analyzers",
+        type=parse_analyzer_specs,
+        help="a comma-separated list of built-in analyzer names or analyzer "
+        "paths, each optionally followed by arguments for that analyzer only "
+        '(e.g. "message_totals,totals_by_day -g week")',
+    )
+    parser.add_argument(
+        "--workers",
+        "-j",
+        type=int,
+        default=1,
+        help="the number of analyzers to run at once; defaults to 1 (i.e. "
+        "running each analyzer in turn); with --all-conversations, the number "
+        "of processes to analyze conversations in instead",
+    )
+    parser.add_argument(
+        "--executor",
+        choices=tuple(EXECUTOR_TYPES),
+        default="thread",
+        help="whether to run analyzers concurrently in threads (the default) or "
+        "in separate processes, which suits CPU-bound analyzers but requires "
+        "copying the conversation to each process",
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="include the number of seconds each analyzer took to run as an "
+        'additional "timings" result',
+    )
+    parser.add_argument(
+        "--snapshot",
+        action="store_true",
+        help="copy the chat database into memory before running any analyzer, "
+        "so that every analyzer reads one consistent copy of it",
+    )
+    parser.add_argument(
+        "--snapshot-dir",
+        metavar="DIR",
+        type=lambda p: str(Path(p).expanduser()),
+        help="like --snapshot, but copy the chat database into a temporary file "
+        "within the given directory (e.g. a RAM disk) instead of into memory",
+    )
+    parser.add_argument(
+        "--format",
+        "-f",
+        choices=("csv", "md", "markdown", "xlsx", "excel", "json"),
+        help="the format to output the results of each analyzer as",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        help="the path of an Excel (xlsx) file to write each analyzer's results "
+        "to as a separate sheet, or of a directory to write each analyzer's "
+        "results to as a separate file",
+    )
+    return parser
+
+
+def analyze_in_process(
+    analyzer_path: str,
+    module_name: str,
+    args: Sequence[str],
+    dfs: DataFrameNamespace,
+) -> tuple[AnalyzerResult, float]:
+    """
+    Run the analyze() function of the given analyzer module within a worker
+    process, returning its result and the number of seconds it took; the module
+    is loaded (and its arguments parsed) afresh, since neither can be sent
+    between processes
+    """
+    start_time = time.perf_counter()
+    ica.cli.did_user_invoke_cli_directly = True
+    module = ica.cli.load_analyzer_module(analyzer_path, module_name)
+    cli_args = ica.analyzer.get_analyzer_cli_args(module, args)
+    for feature_name in getattr(module, "FEATURES", ()):
+        get_feature(dfs, feature_name)
+    return module.analyze(dfs, cli_args), time.perf_counter() - start_time
+
+
+def analyze_in_thread(
+    module: ModuleType, cli_args: ica.cli.TypedCLIArguments, dfs: DataFrameNamespace
+) -> tuple[AnalyzerResult, float]:
+    """
+    Run the analyze() function of the given analyzer module, returning its
+    result and the number of seconds it took
+    """
+    start_time = time.perf_counter()
+    return module.analyze(dfs, cli_args), time.perf_counter() - start_time
+
+
+def run_script_analyzer(
+    spec: AnalyzerSpec, common_args: Sequence[str]
+) -> list[tuple[pd.DataFrame, Optional[dict[str, str]]]]:
+    """
+    Run the given script analyzer (i.e. one which loads and outputs its own
+    data), returning the results it outputs
+    """
+    results: list[tuple[pd.DataFrame, Optional[dict[str, str]]]] = []
+    collected_results_token = COLLECTED_RESULTS.set(results)
+    original_argv = sys.argv
+    # A script analyzer parses its arguments from sys.argv, exactly as if it had
+    # been invoked through the `ica` command on its own
+    sys.argv = [original_argv[0], spec.analyzer, *spec.args, *common_args]
+    try:
+        ica.cli.run_analyzer(spec.analyzer)
+    finally:
+        sys.argv = original_argv
+        COLLECTED_RESULTS.reset(collected_results_token)
+    return results
+
+
+def run_analyzers(
+    specs: Sequence[AnalyzerSpec],
+    common_args: Sequence[str],
+    workers: int = 1,
+    executor: str = "thread",
+) -> list[AnalyzerRun]:
+    """
+    Run the given analyzers with the given arguments, sharing the dataframes
+    loaded by the first analyzer with every subsequent analyzer; when workers is
+    greater than 1, the analyze() functions of up to that many analyzers run at
+    once (in threads or processes, per executor), while script analyzers and all
+    data loading still run in turn on the calling thread; return the results
+    output by each analyzer, in order
+    """
+    pending_results: list[
+        tuple[AnalyzerSpec, float, "Future[tuple[AnalyzerResult, float]]"]
+    ] = []
+    analyzer_runs: dict[str, AnalyzerRun] = {}
+    shared_dataframes_token = SHARED_DATAFRAMES.set({})
+    original_did_user_invoke_cli_directly = ica.cli.did_user_invoke_cli_directly
+    # Each analyzer must expect the analyzer argument in its arguments below
+    ica.cli.did_user_invoke_cli_directly = True
+    pool: Optional[Executor] = (
+        EXECUTOR_TYPES[executor](max_workers=workers) if workers > 1 else None
+    )
+    try:
+        for spec in specs:
+            start_time = time.perf_counter()
+            analyzer_path, built_in_module_name = ica.cli.resolve_analyzer(
+                spec.analyzer
+            )
+            if not ica.analyzer.is_analyzer_module_file(analyzer_path):
+                results = run_script_analyzer(spec, common_args)
+                analyzer_runs[spec.name] = AnalyzerRun(
+                    spec=spec,
+                    results=results,
+                    seconds=time.perf_counter() - start_time,
+                )
+                continue
+            module_name = built_in_module_name or Path(analyzer_path).stem
+            args = [spec.analyzer, *spec.args, *common_args]
+            module = ica.cli.load_analyzer_module(analyzer_path, module_name)
+            cli_args = ica.analyzer.get_analyzer_cli_args(module, args)
+            if cli_args.all_conversations:
+                # Each analyzer spreads the conversations across its own pool of
+                # worker processes, so the analyzers themselves run in turn
+                result = ica.conversations.analyze_all_conversations(
+                    module, cli_args, args, workers=workers
+                )
+                analyzer_runs[spec.name] = AnalyzerRun(
+                    spec=spec,
+                    results=[(result.df, result.prettified_label_overrides)],
+                    seconds=time.perf_counter() - start_time,
+                )
+                continue
+            # Data is always loaded here, one analyzer at a time, so that every
+            # analyzer shares the same dataframes (and derived features)
+            dfs = ica.analyzer.get_analyzer_dataframes(
+                module, cli_args, compute_features=executor != "process"
+            )
+            if pool is None:
+                future: Future[tuple[AnalyzerResult, float]] = Future()
+                future.set_result(analyze_in_thread(module, cli_args, dfs))
+            elif executor == "process":
+                future = pool.submit(
+                    analyze_in_process, analyzer_path, module_name, args, dfs
+                )
+            else:
+                # Run the analyzer within a copy of the current context so that
+                # it shares the dataframes loaded by every other analyzer
+                future = pool.submit(
+                    contextvars.copy_context().run,
+                    analyze_in_thread,
+                    module,
+                    cli_args,
+                    dfs,
+                )
+            pending_results.append((spec, time.perf_counter() - start_time, future))
+        for spec, setup_seconds, future in pending_results:
+            result, analyze_seconds = future.result()
+            analyzer_runs[spec.name] = AnalyzerRun(
+                spec=spec,
+                results=[(result.df, result.prettified_label_overrides)],
+                seconds=setup_seconds + analyze_seconds,
+            )
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        ica.cli.did_user_invoke_cli_directly = original_did_user_invoke_cli_directly
+        SHARED_DATAFRAMES.reset(shared_dataframes_token)
+    return [analyzer_runs[spec.name] for spec in specs]
+
+
+def get_timings_result(analyzer_runs: Sequence[AnalyzerRun]) -> AnalyzerRun:
+    """
+    Summarize the number of seconds each analyzer took to run as a result of
+    its own
+    """
+    return AnalyzerRun(
+        spec=AnalyzerSpec(analyzer="timings", name="timings"),
+        results=[
+            (
+                pd.DataFrame(
+                    {
+                        "analyzer": [
+                            analyzer_run.spec.name for analyzer_run in analyzer_runs
+                        ],
+                        "seconds": [
+                            round(analyzer_run.seconds, 3)
+                            for analyzer_run in analyzer_runs
+                        ],
+                    }
+                ).set_index("analyzer"),
+                None,
+            )
+        ],
+    )
+
+
+def get_result_names(analyzer_run: AnalyzerRun) -> list[str]:
+    """
+    Name each of the results output by an analyzer; an analyzer which outputs
+    more than one result has each result numbered
+    """
+    if len(analyzer_run.results) == 1:
+        return [analyzer_run.spec.name]
+    return [
+        f"{analyzer_run.spec.name}_{index}"
+        for index in range(1, len(analyzer_run.results) + 1)
+    ]
+
+
+def write_excel_workbook(
+    analyzer_runs: Sequence[AnalyzerRun], output: Union[str, BytesIO]
+) -> None:
+    """
+    Write the results of every analyzer to a separate sheet of a single Excel
+    workbook
+    """
+    with pd.ExcelWriter(output) as writer:
+        for analyzer_run in analyzer_runs:
+            for (df, prettified_label_overrides), name in zip(
+                analyzer_run.results, get_result_names(analyzer_run)
+            ):
+                prepare_df_for_output(df, prettified_label_overrides).to_excel(
+                    writer,
+                    sheet_name=name[:MAX_SHEET_NAME_LENGTH],
+                    index=bool(df.index.name),
+                )
+
+
+def output_analyzer_results(
+    analyzer_runs: Sequence[AnalyzerRun],
+    format: Optional[str] = None,
+    output: Optional[str] = None,
+) -> None:
+    """
+    Output the results of every analyzer, either as sheets of a single Excel
+    workbook, as separate files within a directory, or printed one after the
+    other (when no output path is specified)
+    """
+    if not format and output and Path(output).suffix == ".xlsx":
+        format = "xlsx"
+    if format in ("xlsx", "excel"):
+        if output:
+            write_excel_workbook(analyzer_runs, output)
+        else:
+            workbook = BytesIO()
+            write_excel_workbook(analyzer_runs, workbook)
+            sys.stdout.buffer.write(workbook.getvalue())
+        return
+
+    if output:
+        output_dir = Path(output)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        format = format or "csv"
+        if format not in SUPPORTED_OUTPUT_FORMAT_MAP:
+            format = next(
+                (
+                    name
+                    for name, ext in SUPPORTED_OUTPUT_FORMAT_MAP.items()
+                    if ext == format
+                ),
+                format,
+            )
+        if format not in SUPPORTED_OUTPUT_FORMAT_MAP:
+            raise FormatNotSupportedError(
+                f'The format "{format}" is not supported for output'
+            )
+        for analyzer_run in analyzer_runs:
+            for (df, prettified_label_overrides), name in zip(
+                analyzer_run.results, get_result_names(analyzer_run)
+            ):
+                output_results(
+                    df,
+                    format=format,
+                    output=str(
+                        output_dir / f"{name}.{SUPPORTED_OUTPUT_FORMAT_MAP[format]}"
+                    ),
+                    prettified_label_overrides=prettified_label_overrides,
+                )
+        return
+
+    for analyzer_index, analyzer_run in enumerate(analyzer_runs):
+        for result_index, ((df, prettified_label_overrides), name) in enumerate(
+            zip(analyzer_run.results, get_result_names(analyzer_run))
+        ):
+            # Separate the results of each analyzer with a blank line and a
+            # heading
+            if analyzer_index or result_index:
+                print("", flush=True)
+            print(f"# {name}\n", flush=True)
+            output_results(
+                df,
+                format=format,
+                prettified_label_overrides=prettified_label_overrides,
+            )
+
+
+def main(argv: Sequence[str]) -> None:
+    """
+    Entry point for the `ica run` command, which runs several analyzers over a
+    single load of the conversation
+    """
+    cli_parser = get_run_cli_parser()
+    cli_args, common_args = cli_parser.parse_known_args(
+        argv, namespace=RunCLIArguments()
+    )
+    if cli_args.workers < 1:
+        cli_parser.error("--workers must be at least 1")
+    with (
+        use_chat_database_snapshot(cli_args.snapshot_dir)
+        if cli_args.snapshot or cli_args.snapshot_dir
+        else contextlib.nullcontext()
+    ):
+        analyzer_runs = run_analyzers(
+            cli_args.analyzers,
+            common_args,
+            workers=cli_args.workers,
+            executor=cli_args.executor,
+        )
+    if cli_args.timings:
+        analyzer_runs.append(get_timings_result(analyzer_runs))
+    output_analyzer_results(
+        analyzer_runs,
+        format=cli_args.format,
+        output=cli_args.output,
+    )
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+import argparse
+import importlib.resources
+import os
+import sqlite3
+from collections.abc import Collection, Generator, Sequence
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+import ica.core
+from ica.database import connect_read_only
+from ica.exceptions import SearchIndexNotFoundError, SearchQueryInvalidError
+
+# The path to the sidecar database which persists the full-text search index
+# between runs (chat.db itself is only ever opened read-only)
+SEARCH_INDEX_PATH = Path.home() / "Library" / "Caches" / "ica" / "search_index.db"
+
+# The number of messages read from chat.db (and decoded) at a time while
+# updating the index, which bounds the memory used by an update
+SEARCH_INDEX_BATCH_SIZE = 10_000
+
+# Every ROWID in chat.db is greater than this, so an empty index resumes from it
+INITIAL_MESSAGE_ROWID = 0
+
+
+class SearchIndex:
+    """
+    A persistent SQLite FTS5 index of the decoded text of every message in the
+    chat database, along with the chat, sender, and date of each message;
+    messages are added in order of ROWID, so that updating the index only ever
+    reads the messages added to chat.db since the last update
+    """
+
+    def __init__(self, con: sqlite3.Connection) -> None:
+        self.con = con
+        self.con.executescript(
+            importlib.resources.files("ica")
+            .joinpath(os.path.join("queries", "search_index.sql"))
+            .read_text()
+        )
+
+    @property
+    def last_message_rowid(self) -> int:
+        """
+        The ROWID of the last message in chat.db which has been read into the
+        index
+        """
+        row = self.con.execute(
+            'SELECT "last_message_rowid" FROM "index_state"'
+        ).fetchone()
+        return row[0] if row else INITIAL_MESSAGE_ROWID
+
+    @property
+    def message_count(self) -> int:
+        """
+        The number of messages in the index
+        """
+        return self.con.execute('SELECT COUNT(*) FROM "indexed_message"').fetchone()[0]
+
+    def update(
+        self, chat_con: sqlite3.Connection, batch_size: int = SEARCH_INDEX_BATCH_SIZE
+    ) -> int:
+        """
+        Index every message in the given chat database whose ROWID is greater
+        than that of the last message read into the index, one batch at a time,
+        returning the number of newly-indexed messages
+        """
+        query = (
+            importlib.resources.files("ica")
+            .joinpath(os.path.join("queries", "search_index_messages.sql"))
+            .read_text()
+        )
+        indexed_message_count = 0
+        while True:
+            batch = pd.read_sql_query(
+                sql=query,
+                con=chat_con,
+                params={
+                    "last_message_rowid": self.last_message_rowid,
+                    "batch_size": batch_size,
+                },
+            )
+            if batch.empty:
+                return indexed_message_count
+            last_message_rowid = batch["ROWID"].tolist()[-1]
+            batch = (
+                batch.assign(
+                    text=lambda df: df["text"].fillna(
+                        df.loc[df["text"].isna(), "attributedBody"]
+                        .dropna()
+                        .apply(ica.core.decode_message_attributedbody)
+                    )
+                )
+                # Only the messages with any text can be found by a search
+                .pipe(lambda df: df[df["text"].fillna("").str.strip().ne("")])
+                .assign(
+                    is_reaction=lambda df: (
+                        df["text"].str.match(ica.core.REACTION_PATTERN).astype(int)
+                    ),
+                    sender_handle=lambda df: (
+                        df["sender_handle"]
+                        .astype(object)
+                        .where(df["sender_handle"].notna(), None)
+                    ),
+                )
+            )
+            first_entry_id = self.con.execute(
+                'SELECT ifnull(MAX("entry_id"), 0) + 1 FROM "indexed_message"'
+            ).fetchone()[0]
+            self.con.executemany(
+                """
+                INSERT OR IGNORE INTO "indexed_message" (
+                    "message_rowid",
+                    "chat_id",
+                    "sender_handle",
+                    "is_from_me",
+                    "is_reaction",
+                    "date",
+                    "text"
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                batch.loc[
+                    :,
+                    [
+                        "ROWID",
+                        "chat_id",
+                        "sender_handle",
+                        "is_from_me",
+                        "is_reaction",
+                        "date",
+                        "text",
+                    ],
+                ].itertuples(index=False, name=None),
+            )
+            self.con.execute(
+                """
+                INSERT INTO "message_fts" ("rowid", "text")
+                SELECT "entry_id", "text"
+                FROM "indexed_message"
+                WHERE "entry_id" >= ?
+                """,
+                (first_entry_id,),
+            )
+            self.con.execute('DELETE FROM "index_state"')
+            self.con.execute(
+                'INSERT INTO "index_state" VALUES (?)', (last_message_rowid,)
+            )
+            self.con.commit()
+            indexed_message_count += len(batch)
+
+    def search(
+        self,
+        query: str,
+        chat_ids: Optional[Collection] = None,
+        include_me: bool = True,
+        sender_handles: Optional[Collection[str]] = None,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        timezone: Optional[str] = None,
+        include_reactions: bool = False,
+        sort: str = "date",
+        limit: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Find the indexed messages matching the given FTS5 query (e.g. a term
+        like hello, a phrase like "see you soon", or a prefix like din*), within
+        the given chats (or all chats, if chat_ids is None); messages from you
+        are included if include_me is True, and messages from anyone else are
+        included if they were sent by one of the given sender handles (or by
+        anyone, if sender_handles is None); results are sorted by date or by
+        relevance
+        """
+        clauses = ['"message_fts" MATCH ?']
+        params: list = [query]
+        if chat_ids is not None:
+            clauses.append(
+                '"message"."chat_id" IN ({})'.format(", ".join("?" for _ in chat_ids))
+            )
+            params.extend(chat_ids)
+        if not include_reactions:
+            clauses.append('"message"."is_reaction" = 0')
+        sender_filter_clause, sender_params = ica.core.build_sender_filter_clause(
+            include_me,
+            sender_handles,
+            sender_handle_column='"message"."sender_handle"',
+        )
+
+        try:
+            return pd.read_sql_query(
+                sql="""
+                SELECT
+                    "message"."message_rowid" AS "ROWID",
+                    "message"."chat_id",
+                    "message"."sender_handle",
+                    "message"."is_from_me",
+                    "message"."date",
+                    "message"."text"
+                FROM "message_fts"
+                -- A CROSS JOIN makes SQLite find the matching messages first,
+                -- rather than testing every message within the chats against
+                -- the query (which is orders of magnitude slower)
+                CROSS JOIN "indexed_message" AS "message"
+                    ON "message"."entry_id" = "message_fts"."rowid"
+                WHERE {where_clause}
+                {sender_filter_clause}
+                {date_filter_clause}
+                ORDER BY {order_clause}
+                {limit_clause}
+                """.format(
+                    where_clause=" AND ".join(clauses),
+                    sender_filter_clause=sender_filter_clause,
+                    # The index stores the same dates as chat.db, so the same
+                    # date filter applies to both
+                    date_filter_clause=ica.core.build_date_filter_clause(
+                        from_date, to_date, timezone=timezone
+                    ),
+                    order_clause=(
+                        '"message_fts"."rank"'
+                        if sort == "relevance"
+                        else '"message"."date"'
+                    ),
+                    limit_clause="LIMIT ?" if limit is not None else "",
+                ),
+                con=self.con,
+                params=params + sender_params + ([limit] if limit is not None else []),
+            ).assign(is_from_me=lambda df: df["is_from_me"].astype(bool))
+        except pd.errors.DatabaseError as error:
+            # FTS5 reports any malformed query as an error when the query runs
+            raise SearchQueryInvalidError(
+                f'The search query "{query}" is invalid: {error.__cause__ or error}'
+            ) from error
+
+
+@contextmanager
+def get_search_index(
+    path: Optional[Path] = None, create: bool = True
+) -> Generator[SearchIndex, None, None]:
+    """
+    Open the persistent search index (creating it if it does not exist yet and
+    create is True), and yield it for the duration of the context
+    """
+    path = Path(path or SEARCH_INDEX_PATH)
+    if not create and not path.exists():
+        raise SearchIndexNotFoundError(
+            'No search index has been built yet; run "ica index build" first'
+        )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with closing(sqlite3.connect(path)) as con:
+        yield SearchIndex(con)
+
+
+def build_search_index(path: Optional[Path] = None, rebuild: bool = False) -> int:
+    """
+    Add every message in chat.db which has not been indexed yet to the search
+    index (or, if rebuild is True, discard the index and index every message
+    again), returning the number of newly-indexed messages
+    """
+    path = Path(path or SEARCH_INDEX_PATH)
+    if rebuild:
+        path.unlink(missing_ok=True)
+    with closing(connect_read_only(ica.core.get_chat_database_path())) as chat_con:
+        with get_search_index(path) as search_index:
+            return search_index.update(chat_con)
+
+
+def get_index_cli_parser() -> argparse.ArgumentParser:
+    """
+    Retrieve the parser for the arguments of the `ica index` command
+    """
+    parser = argparse.ArgumentParser(
+        prog="ica index",
+        description="manage the full-text search index used by the search analyzer",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser(
+        "build",
+        help="index every message added to the chat database since the index "
+        "was last built",
+    )
+    build_parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="discard the existing index and index every message again (e.g. "
+        "to pick up messages which have since been edited or deleted)",
+    )
+    return parser
+
+
+def main(argv: Sequence[str]) -> None:
+    """
+    Entry point for the `ica index` command, which builds or updates the
+    full-text search index
+    """
+    cli_args = get_index_cli_parser().parse_args(argv)
+    if cli_args.command == "build":
+        indexed_message_count = build_search_index(rebuild=cli_args.rebuild)
+        with get_search_index() as search_index:
+            print(
+                f"Indexed {indexed_message_count} new messages "
+                f"({search_index.message_count} in total)"
+            )
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from ica.cache import DataFrameCache
+from ica.core import DataFrameNamespace
+
+# The default length of the silence after which the next message begins a new
+# session of the conversation
+DEFAULT_SESSION_GAP = pd.Timedelta(hours=1)
+
+# The session IDs computed for each messages dataframe, keyed by the session
+# gap (in nanoseconds)
+SESSION_ID_CACHE: DataFrameCache[pd.Series] = DataFrameCache()
+
+
+def parse_session_gap(value: str) -> pd.Timedelta:
+    """
+    Parse a session gap given on the command line as a duration string (e.g.
+    "90min" or "2h")
+    """
+    try:
+        gap = pd.Timedelta(value)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(
+            f'"{value}" is not a valid duration (e.g. "30min" or "2h")'
+        ) from error
+    if gap <= pd.Timedelta(0):
+        raise argparse.ArgumentTypeError(f'"{value}" is not a positive duration')
+    return gap
+
+
+def get_session_ids(
+    dfs: DataFrameNamespace, gap: pd.Timedelta = DEFAULT_SESSION_GAP
+) -> pd.Series:
+    """
+    Return a series (aligned with dfs.messages) with the ID of the session each
+    message belongs to, where a new session begins whenever more than the given
+    gap has passed since the previous message; sessions are numbered from 0 in
+    chronological order, so the IDs can be used to group messages by session
+    """
+    messages = dfs.messages
+    # The cached session IDs are copied so that callers can freely modify them
+    return SESSION_ID_CACHE.get(
+        [messages],
+        (pd.Timedelta(gap).value,),
+        lambda: build_session_ids(messages["datetime"], gap),
+    ).copy()
+
+
+def build_session_ids(datetimes: pd.Series, gap: pd.Timedelta) -> pd.Series:
+    """
+    Compute the session ID of every one of the given datetimes (see
+    get_session_ids()) by marking each datetime which follows a gap, then
+    numbering the sessions with a cumulative sum of those marks
+    """
+    datetime_ns = pd.DatetimeIndex(datetimes).as_unit("ns").asi8
+    # Messages are usually already in chronological order, but if not, the
+    # sessions are computed in that order and then mapped back
+    order = (
+        None
+        if datetimes.is_monotonic_increasing
+        else np.argsort(datetime_ns, kind="stable")
+    )
+    sorted_ns = datetime_ns if order is None else datetime_ns[order]
+    is_session_start = np.empty(len(sorted_ns), dtype=bool)
+    is_session_start[:1] = True
+    is_session_start[1:] = np.diff(sorted_ns) > pd.Timedelta(gap).value
+    sorted_session_ids = np.cumsum(is_session_start) - 1
+    if order is None:
+        session_ids = sorted_session_ids
+    else:
+        session_ids = np.empty_like(sorted_session_ids)
+        session_ids[order] = sorted_session_ids
+    return pd.Series(session_ids, index=datetimes.index, name="session_id")
@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+import contextlib
+import functools
+import re
+from collections.abc import Iterable, Iterator, Sequence
+from typing import Optional
+
+import emoji
+import numpy as np
+import pandas as pd
+
+try:
+    from re import _parser as sre_parse  # type: ignore[attr-defined]
+except ImportError:  # pragma: no cover (Python < 3.11)
+    import sre_parse  # type: ignore[no-redef]
+
+# User-supplied regular expressions which use backreferences or conditional
+# groups cannot be merged into a combined pattern, because doing so would shift
+# the numbering of every group after the first phrase
+UNCOMBINABLE_REGEX_PATTERN = re.compile(r"\\[1-9]|\(\?P=|\(\?\(")
+
+# The pattern used to split message text into words for indexing; a "word" is
+# any maximal run of Unicode word characters
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# The characters which re.IGNORECASE treats as equal to a lowercase letter
+# other than their own lowercase form (e.g. "ſ" and "s"), mapped to that
+# letter; the capital sigma is mapped too, since str.lower() would otherwise
+# turn it into a final sigma at the end of a word, and the dotted capital I,
+# since str.lower() would otherwise turn it into two characters
+IGNORECASE_TRANSLATION_TABLE = str.maketrans(
+    {
+        "ı": "i",
+        "İ": "i",
+        "ſ": "s",
+        "µ": "μ",
+        "\u0345": "ι",
+        "\u1fbe": "ι",
+        "\u1fd3": "\u0390",
+        "\u1fe3": "\u03b0",
+        "ϐ": "β",
+        "ϵ": "ε",
+        "ϑ": "θ",
+        "ϰ": "κ",
+        "ϖ": "π",
+        "ϱ": "ρ",
+        "Σ": "σ",
+        "ς": "σ",
+        "ϕ": "φ",
+        "ᲀ": "в",
+        "ᲁ": "д",
+        "ᲂ": "о",
+        "ᲃ": "с",
+        "ᲄ": "т",
+        "ᲅ": "т",
+        "ᲆ": "ъ",
+        "ᲇ": "ѣ",
+        "ᲈ": "ꙋ",
+        "ẛ": "ṡ",
+        "ﬆ": "ﬅ",
+    }
+)
+
+# The modifier characters representing the skin tones of an emoji, which are
+# removed from every emoji that is extracted from a message
+SKIN_TONE_MODIFIERS = ("🏻", "🏼", "🏽", "🏾", "🏿")
+
+# The translation table used to remove skin tones from an extracted emoji
+SKIN_TONE_TRANSLATION_TABLE = str.maketrans("", "", "".join(SKIN_TONE_MODIFIERS))
+
+# The zero-width joiner character which combines multiple emojis into one
+ZERO_WIDTH_JOINER = "\u200d"
+
+# The pattern used to extract every link from message text; a link runs until
+# the next whitespace character, and the domain is captured for classification
+LINK_PATTERN = re.compile(r"(?P<url>https?://(?P<domain>[^/\s]+)/\S*)")
+
+# The character used to join many messages into a single string so that literal
+# phrases can be located across all of them with one regex scan; the NUL
+# character never appears in a literal phrase typed on the command line
+JOINED_SCAN_SEPARATOR = "\x00"
+
+# The number of messages joined together per scan, which bounds the size of the
+# temporary joined string for very large conversations
+JOINED_SCAN_CHUNK_SIZE = 10_000
+
+
+class PhraseMatcher:
+    """
+    Count the occurrences of any number of phrases within a series of messages,
+    scanning each message only once regardless of how many phrases there are
+    """
+
+    def __init__(
+        self,
+        phrases: Sequence[str],
+        use_regex: bool = False,
+        case_sensitive: bool = False,
+        whole_words: bool = False,
+    ) -> None:
+        self.phrases = list(phrases)
+        self.use_regex = use_regex
+        self.case_sensitive = case_sensitive
+        self.whole_words = whole_words
+        patterns = [phrase if use_regex else re.escape(phrase) for phrase in phrases]
+        if whole_words:
+            patterns = [rf"\b(?:{pattern})\b" for pattern in patterns]
+        flags = 0 if case_sensitive else re.IGNORECASE
+        # Every phrase is wrapped in an optional lookahead with a named group,
+        # so that a single zero-width match reports every phrase that occurs at
+        # a given position (including phrases which overlap one another); the
+        # leading lookahead ensures that the pattern only matches at positions
+        # where at least one phrase occurs, keeping the scan within the regex
+        # engine rather than in Python
+        group_names = [f"phrase_{index}" for index in range(len(patterns))]
+        self.combined_pattern: Optional[re.Pattern] = None
+        if patterns and not any(
+            UNCOMBINABLE_REGEX_PATTERN.search(pattern) for pattern in patterns
+        ):
+            # Phrases that cannot be combined (e.g. regular expressions which
+            # reuse the same group name) are scanned individually instead
+            with contextlib.suppress(re.error):
+                self.combined_pattern = re.compile(
+                    "(?={}){}".format(
+                        "|".join(f"(?:{pattern})" for pattern in patterns),
+                        "".join(
+                            f"(?=(?P<{group_name}>{pattern})|)"
+                            for group_name, pattern in zip(group_names, patterns)
+                        ),
+                    ),
+                    flags=flags,
+                )
+        self.separate_patterns: list[re.Pattern] = (
+            []
+            if self.combined_pattern
+            else [re.compile(pattern, flags=flags) for pattern in patterns]
+        )
+        self.group_indices = (
+            [self.combined_pattern.groupindex[name] for name in group_names]
+            if self.combined_pattern
+            else []
+        )
+        # Literal phrases can be located across many messages at once (see
+        # get_phrase_hits()), provided that no phrase could ever match the
+        # separator placed between messages
+        self.is_joinable = not use_regex and all(
+            phrase and JOINED_SCAN_SEPARATOR not in phrase for phrase in phrases
+        )
+
+    def iter_occurrences(self, text: str) -> Iterator[tuple[int, int]]:
+        """
+        Yield a (start position, phrase index) pair for every non-overlapping
+        occurrence of each phrase within the given text; occurrences of
+        different phrases may overlap one another
+        """
+        if not self.combined_pattern:
+            for phrase_index, pattern in enumerate(self.separate_patterns):
+                for match in pattern.finditer(text):
+                    yield match.start(), phrase_index
+            return
+        # The end position of the last accepted occurrence of each phrase
+        last_ends = [-1] * len(self.phrases)
+        for match in self.combined_pattern.finditer(text):
+            # Match.regs exposes the spans of every group in one call, which is
+            # considerably faster than calling Match.span() for each group
+            spans = match.regs
+            for phrase_index, group_index in enumerate(self.group_indices):
+                start, end = spans[group_index]
+                # Like re.findall(), only count an occurrence if it does not
+                # overlap the previous occurrence of the same phrase
+                if start != -1 and start >= last_ends[phrase_index]:
+                    last_ends[phrase_index] = end
+                    yield start, phrase_index
+
+    def count_phrases(self, text: str) -> list[int]:
+        """
+        Count the non-overlapping occurrences of each phrase within the given
+        text, returning the counts in the same order as the phrases; the counts
+        are identical to calling str.count() (or re.findall()) once per phrase
+        """
+        counts = [0] * len(self.phrases)
+        for _, phrase_index in self.iter_occurrences(text):
+            counts[phrase_index] += 1
+        return counts
+
+    def get_phrase_hits(self, texts: pd.Series) -> pd.DataFrame:
+        """
+        Scan every text in the given series once, returning a sparse dataframe
+        with one row per (message, phrase) pair that has at least one
+        occurrence; the 'position' column is the positional index of the
+        message within the series, and the 'phrase_index' column is the index
+        of the phrase within the matcher's list of phrases
+        """
+        positions: list[int] = []
+        phrase_indices: list[int] = []
+        text_list = [text if isinstance(text, str) else "" for text in texts]
+        if self.is_joinable:
+            # Literal phrases can never match across the separator, so we can
+            # scan a whole chunk of messages with a single call into the regex
+            # engine, then map each occurrence back to its message by offset
+            for chunk_start in range(0, len(text_list), JOINED_SCAN_CHUNK_SIZE):
+                chunk = text_list[chunk_start : chunk_start + JOINED_SCAN_CHUNK_SIZE]
+                text_offsets = np.cumsum([0] + [len(text) + 1 for text in chunk])
+                chunk_starts: list[int] = []
+                for start, phrase_index in self.iter_occurrences(
+                    JOINED_SCAN_SEPARATOR.join(chunk)
+                ):
+                    chunk_starts.append(start)
+                    phrase_indices.append(phrase_index)
+                positions.extend(
+                    (
+                        np.searchsorted(text_offsets, chunk_starts, side="right")
+                        - 1
+                        + chunk_start
+                    ).tolist()
+                )
+        else:
+            for position, text in enumerate(text_list):
+                for _, phrase_index in self.iter_occurrences(text):
+                    positions.append(position)
+                    phrase_indices.append(phrase_index)
+        return (
+            pd.DataFrame(
+                {
+                    "position": pd.Series(positions, dtype="int64"),
+                    "phrase_index": pd.Series(phrase_indices, dtype="int64"),
+                }
+            )
+            .groupby(["position", "phrase_index"], sort=True)
+            .size()
+            .rename("count")
+            .reset_index()
+        )
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Split the given text into a list of case-folded words, in the order they
+    appear
+    """
+    return TOKEN_PATTERN.findall(text.casefold())
+
+
+def fold_case(text: str) -> str:
+    """
+    Lowercase the given text such that two strings are equal once lowercased if
+    and only if they match each other under re.IGNORECASE; unlike
+    str.casefold(), "ß" is not equated with "ss" (nor the "ﬁ" ligature with
+    "fi"), since re.IGNORECASE only ever compares one character to another
+    """
+    return text.translate(IGNORECASE_TRANSLATION_TABLE).lower()
+
+
+def get_required_literal(pattern: str, flags: int = 0) -> Optional[str]:
+    """
+    Find the longest literal string which every match of the given regular
+    expression must contain (e.g. "dinner" for "dinners?"), so that most text
+    can be ruled out by a plain substring search before the expression itself
+    is applied; return None if there is no such string (e.g. if the expression
+    is an alternation, or is invalid)
+    """
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except re.error:
+        return None
+
+    def get_longest_literal(subpattern: Iterable) -> str:
+        longest_literal = ""
+        current_literal: list[str] = []
+        for opcode, argument in subpattern:
+            if opcode == sre_parse.LITERAL:
+                current_literal.append(chr(argument))
+                continue
+            # Anything other than a literal character ends the current run of
+            # literal characters, although a group (or a repetition of at least
+            # once) must still contain its own longest literal
+            inner_literal = ""
+            if opcode == sre_parse.SUBPATTERN:
+                _, add_flags, del_flags, group_subpattern = argument
+                # A literal within a group which changes the flags (e.g.
+                # (?i:...)) may match differently from the rest of the pattern
+                if not add_flags and not del_flags:
+                    inner_literal = get_longest_literal(group_subpattern)
+            elif opcode in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+                min_count, _, repeated_subpattern = argument
+                if min_count >= 1:
+                    inner_literal = get_longest_literal(repeated_subpattern)
+            longest_literal = max(
+                longest_literal, "".join(current_literal), inner_literal, key=len
+            )
+            current_literal = []
+        return max(longest_literal, "".join(current_literal), key=len)
+
+    return get_longest_literal(parsed) or None
+
+
+def get_character_class_pattern(chars: Iterable[str]) -> str:
+    """
+    Build a regular expression character class matching any of the given
+    characters, collapsing consecutive code points into ranges; the regex engine
+    checks characters outside the Basic Multilingual Plane (i.e. most emojis)
+    against each member of a class in turn, so fewer members is much faster
+    """
+    code_points = sorted({ord(char) for char in chars})
+    ranges: list[list[int]] = []
+    for code_point in code_points:
+        if ranges and code_point == ranges[-1][1] + 1:
+            ranges[-1][1] = code_point
+        else:
+            ranges.append([code_point, code_point])
+    return "[{}]".format(
+        "".join(
+            re.escape(chr(start))
+            if start == end
+            else f"{re.escape(chr(start))}-{re.escape(chr(end))}"
+            for start, end in ranges
+        )
+    )
+
+
+def get_emoji_trie_node_pattern(node: dict, has_zero_width_joiner: bool) -> str:
+    """
+    Recursively build the regular expression for the given node of the emoji
+    trie; like the tokenizer of the emoji package, a match must follow the trie
+    for as long as the next character continues a known emoji, and it only
+    succeeds if it stops on a complete emoji
+    """
+    # Characters which complete an emoji and continue no further emoji can be
+    # merged into a single character class
+    leaf_chars = []
+    alternatives = []
+    for char, child in node.items():
+        if char is None:
+            continue
+        if child.keys() == {None}:
+            leaf_chars.append(char)
+        else:
+            alternatives.append(
+                re.escape(char)
+                + get_emoji_trie_node_pattern(
+                    child,
+                    has_zero_width_joiner or char == ZERO_WIDTH_JOINER,
+                )
+            )
+    if leaf_chars:
+        alternatives.append(get_character_class_pattern(leaf_chars))
+    if None in node and alternatives:
+        # A complete emoji may only end here if the next character does not
+        # continue it; the emoji package also falls back to the emoji preceding
+        # the first zero-width joiner of a sequence it does not recognize
+        continuation_chars = [
+            char
+            for char in node
+            if char is not None and (has_zero_width_joiner or char != ZERO_WIDTH_JOINER)
+        ]
+        alternatives.append(
+            f"(?!{get_character_class_pattern(continuation_chars)})"
+            if continuation_chars
+            else ""
+        )
+    if not alternatives:
+        return ""
+    return "(?:{})".format("|".join(alternatives))
+
+
+@functools.lru_cache(maxsize=None)
+def get_emoji_pattern() -> re.Pattern:
+    """
+    Compile (once) a single regular expression which matches every emoji known
+    to the emoji package, by building a trie of every emoji's characters
+    """
+    # Each node of the trie is a dictionary mapping the next character to the
+    # child node; the None key marks a node which completes an emoji
+    trie: dict = {}
+    for emoji_str in emoji.EMOJI_DATA:
+        node = trie
+        for char in emoji_str:
+            node = node.setdefault(char, {})
+        node[None] = True
+    # The leading lookahead lets the regex engine skip quickly past every
+    # character that cannot begin an emoji, before trying the (very large)
+    # alternation of the trie
+    return re.compile(
+        "(?={}){}".format(
+            get_character_class_pattern(char for char in trie if char is not None),
+            get_emoji_trie_node_pattern(trie, False),
+        )
+    )
+
+
+def get_emoji_occurrences(texts: pd.Series) -> pd.Series:
+    """
+    Extract every emoji from the given series of texts, returning a series with
+    one row per emoji occurrence (labeled with the index of the message it was
+    found in), with any skin tones removed from each emoji
+    """
+    return (
+        texts.str.findall(get_emoji_pattern())
+        .explode()
+        .dropna()
+        .str.translate(SKIN_TONE_TRANSLATION_TABLE)
+    )
+
+
+def get_link_occurrences(texts: pd.Series) -> pd.DataFrame:
+    """
+    Extract every link from the given series of texts in a single pass,
+    returning a dataframe with one row per link (labeled with the index of the
+    message it was found in); the 'domain' column is lowercased and has any
+    leading "www." removed, so that it can be classified with a lookup table
+    """
+    links = texts.str.extractall(LINK_PATTERN).droplevel("match")
+    return links.assign(domain=links["domain"].str.lower().str.removeprefix("www."))
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+import datetime
+import functools
+from typing import Union
+
+import numpy as np
+import pandas as pd
+
+from ica.cache import DataFrameCache
+
+# The number of nanoseconds in a second, an hour, and a 24-hour day
+S_TO_NS = 1_000_000_000
+HOUR_NS = 60 * 60 * S_TO_NS
+DAY_NS = 24 * HOUR_NS
+
+# The number of seconds between consecutive samples of a timezone's UTC offset
+# when searching for its transitions; no timezone has ever changed its offset
+# twice within a single day
+TRANSITION_SAMPLE_INTERVAL_S = 24 * 60 * 60
+
+# The local hour and day codes computed for each messages dataframe, keyed by
+# the granularity
+LOCAL_CODE_CACHE: DataFrameCache[np.ndarray] = DataFrameCache()
+
+
+def get_utc_offset_s(tz: datetime.tzinfo, timestamp_s: int) -> int:
+    """
+    Return the UTC offset (in seconds) of the given timezone at the given Unix
+    timestamp
+    """
+    offset = datetime.datetime.fromtimestamp(timestamp_s, tz).utcoffset()
+    return int(offset.total_seconds()) if offset is not None else 0
+
+
+@functools.lru_cache(maxsize=None)
+def get_utc_offset_transitions(
+    tz: datetime.tzinfo, start_year: int, end_year: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Return the transition table of the given timezone between the start of the
+    given start year and the end of the given end year (in UTC): an array of the
+    UTC nanoseconds at which each UTC offset takes effect (the first of which is
+    the start of the range), and an array of those offsets in nanoseconds; the
+    offset is sampled once a day, and each change is narrowed down to the second
+    at which it happens by bisection
+    """
+    start_s = int(
+        datetime.datetime(start_year, 1, 1, tzinfo=datetime.timezone.utc).timestamp()
+    )
+    end_s = int(
+        datetime.datetime(end_year + 1, 1, 1, tzinfo=datetime.timezone.utc).timestamp()
+    )
+    transition_s = [start_s]
+    offsets_s = [get_utc_offset_s(tz, start_s)]
+    for sample_s in range(
+        start_s + TRANSITION_SAMPLE_INTERVAL_S, end_s, TRANSITION_SAMPLE_INTERVAL_S
+    ):
+        offset_s = get_utc_offset_s(tz, sample_s)
+        if offset_s == offsets_s[-1]:
+            continue
+        # The offset changed at some second after the previous sample and no
+        # later than this one
+        low_s, high_s = sample_s - TRANSITION_SAMPLE_INTERVAL_S, sample_s
+        while high_s - low_s > 1:
+            middle_s = (low_s + high_s) // 2
+            if get_utc_offset_s(tz, middle_s) == offsets_s[-1]:
+                low_s = middle_s
+            else:
+                high_s = middle_s
+        transition_s.append(high_s)
+        offsets_s.append(offset_s)
+    return (
+        np.array(transition_s, dtype="int64") * S_TO_NS,
+        np.array(offsets_s, dtype="int64") * S_TO_NS,
+    )
+
+
+def get_local_wall_ns(
+    utc_ns: np.ndarray, tz: Union[datetime.tzinfo, str, None]
+) -> np.ndarray:
+    """
+    Convert the given UTC nanoseconds since the Unix epoch to the nanoseconds of
+    the local wall time in the given timezone (i.e. as though the local time
+    were in UTC), by looking up the UTC offset of every timestamp in the
+    timezone's transition table
+    """
+    utc_ns = np.asarray(utc_ns, dtype="int64")
+    if tz is None or not len(utc_ns):
+        return utc_ns
+    if isinstance(tz, str):
+        tz = pd.Timestamp(0, tz=tz).tzinfo
+    # The transition table spans whole years, so that it can be shared by
+    # every conversation within them
+    transition_ns, offsets_ns = get_utc_offset_transitions(
+        tz, pd.Timestamp(utc_ns.min()).year, pd.Timestamp(utc_ns.max()).year
+    )
+    if len(offsets_ns) == 1:
+        return utc_ns + offsets_ns[0]
+    return utc_ns + offsets_ns[np.searchsorted(transition_ns, utc_ns, side="right") - 1]
+
+
+def get_local_codes(messages: pd.DataFrame, granularity: str = "day") -> np.ndarray:
+    """
+    Return the local hour or day code (i.e. the number of whole local hours or
+    days since 1970) of every message in the given messages dataframe, in the
+    timezone of its 'datetime' column; the codes are computed once per
+    dataframe, so every analyzer which groups the same messages by hour or by
+    day shares them
+    """
+    if granularity not in ("hour", "day"):
+        raise ValueError(f'Unsupported granularity "{granularity}"')
+
+    def compute_local_codes() -> np.ndarray:
+        datetimes = pd.DatetimeIndex(messages["datetime"])
+        return get_local_wall_ns(datetimes.as_unit("ns").asi8, datetimes.tz) // (
+            HOUR_NS if granularity == "hour" else DAY_NS
+        )
+
+    # The cached codes are copied so that callers can freely modify them
+    return LOCAL_CODE_CACHE.get([messages], (granularity,), compute_local_codes).copy()
+
+
+def get_wall_datetimes(
+    datetimes: Union[pd.Series, pd.DatetimeIndex],
+) -> pd.DatetimeIndex:
+    """
+    Strip the timezone from the given timezone-aware datetimes, keeping their
+    local wall times (like tz_localize(None), but by way of the timezone's
+    transition table); any missing datetimes remain missing
+    """
+    datetimes = pd.DatetimeIndex(datetimes)
+    utc_ns = datetimes.as_unit("ns").asi8
+    is_present = ~datetimes.isna()
+    wall_ns = utc_ns.copy()
+    wall_ns[is_present] = get_local_wall_ns(utc_ns[is_present], datetimes.tz)
+    return pd.DatetimeIndex(
+        wall_ns.view("datetime64[ns]"), name=datetimes.name
+    ).as_unit(datetimes.unit)
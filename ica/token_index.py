@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+import importlib.resources
+import os
+import sqlite3
+from collections import Counter
+from collections.abc import Generator
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from ica.text import TOKEN_PATTERN, PhraseMatcher, fold_case
+
+# The path to the sidecar database which persists the token index between runs
+# (chat.db itself is only ever opened read-only)
+TOKEN_INDEX_PATH = Path.home() / "Library" / "Caches" / "ica" / "token_index.db"
+
+# The version of the token index's schema and tokens, which is recorded in the
+# sidecar database; an index recorded with an older version (e.g. one whose
+# tokens were folded differently) is rebuilt from scratch
+TOKEN_INDEX_VERSION = 2
+
+
+def get_tokens(text: str) -> list[str]:
+    """
+    Split the given text into a list of the words by which it is indexed, in
+    the order they appear; each word is lowercased with fold_case(), so that
+    words are equal if and only if they match each other under re.IGNORECASE
+    (which is how phrases are matched when counting them without the index)
+    """
+    return TOKEN_PATTERN.findall(fold_case(text))
+
+
+class TokenIndex:
+    """
+    A persistent inverted index which maps every case-folded word to the list of
+    messages (by ROWID) containing it, along with the sender and date of each
+    indexed message, and a hash of the text it was indexed with (so that an
+    edited message is indexed again)
+    """
+
+    def __init__(self, con: sqlite3.Connection) -> None:
+        self.con = con
+        ((version,),) = self.con.execute("PRAGMA user_version")
+        if version < TOKEN_INDEX_VERSION:
+            self.con.executescript(
+                """
+                DROP TABLE IF EXISTS "indexed_message";
+                DROP TABLE IF EXISTS "token";
+                DROP TABLE IF EXISTS "posting";
+                PRAGMA user_version = {version};
+                """.format(version=TOKEN_INDEX_VERSION)
+            )
+        self.con.executescript(
+            importlib.resources.files("ica")
+            .joinpath(os.path.join("queries", "token_index.sql"))
+            .read_text()
+        )
+
+    def update(self, messages_df: pd.DataFrame) -> int:
+        """
+        Index every message in the given dataframe which has not been indexed
+        already, or whose text has changed (i.e. been edited) since it was
+        indexed, returning the number of newly-indexed messages
+        """
+        # The hashes are computed with a fixed key, so they are the same from
+        # one run to the next
+        text_hashes = pd.util.hash_pandas_object(
+            messages_df["text"], index=False
+        ).astype("int64")
+        indexed_messages = pd.read_sql_query(
+            'SELECT "message_rowid", "text_hash" FROM "indexed_message"', self.con
+        )
+        # The hashes are nullable integers, so that the hashes of messages which
+        # have not been indexed are missing (rather than converting every hash
+        # to an imprecise float)
+        is_new = (
+            messages_df["ROWID"]
+            .map(
+                indexed_messages.set_index("message_rowid")["text_hash"].astype("Int64")
+            )
+            .ne(text_hashes.to_numpy())
+            .fillna(True)
+            .to_numpy(dtype=bool)
+        )
+        new_messages = messages_df[is_new]
+        if new_messages.empty:
+            return 0
+
+        rowids = new_messages["ROWID"].tolist()
+        edited_rowids = new_messages["ROWID"][
+            new_messages["ROWID"].isin(indexed_messages["message_rowid"])
+        ].tolist()
+        if edited_rowids:
+            # The postings are keyed by token first, so the postings of every
+            # edited message are removed in a single pass
+            self.con.execute(
+                'CREATE TEMP TABLE IF NOT EXISTS "edited_message"'
+                ' ("message_rowid" PRIMARY KEY)'
+            )
+            self.con.execute('DELETE FROM "edited_message"')
+            self.con.executemany(
+                'INSERT INTO "edited_message" VALUES (?)',
+                ((rowid,) for rowid in edited_rowids),
+            )
+            self.con.execute(
+                'DELETE FROM "posting" WHERE "message_rowid" IN'
+                ' (SELECT "message_rowid" FROM "edited_message")'
+            )
+
+        token_counts = [
+            Counter(get_tokens(text)) if isinstance(text, str) else Counter()
+            for text in new_messages["text"]
+        ]
+        self.con.executemany(
+            'INSERT OR IGNORE INTO "token" ("token") VALUES (?)',
+            ((token,) for token in set().union(*token_counts)),
+        )
+        token_ids = dict(self.con.execute('SELECT "token", "token_id" FROM "token"'))
+        self.con.executemany(
+            'INSERT INTO "posting" VALUES (?, ?, ?)',
+            (
+                (token_ids[token], rowid, frequency)
+                for rowid, counts in zip(rowids, token_counts)
+                for token, frequency in counts.items()
+            ),
+        )
+        self.con.executemany(
+            'INSERT OR REPLACE INTO "indexed_message" VALUES (?, ?, ?, ?, ?)',
+            zip(
+                rowids,
+                new_messages["sender_handle"]
+                .astype(object)
+                .where(new_messages["sender_handle"].notna(), None),
+                new_messages["is_from_me"].astype(int).tolist(),
+                new_messages["datetime"].astype("int64").tolist(),
+                text_hashes[is_new].tolist(),
+            ),
+        )
+        self.con.commit()
+        return len(new_messages)
+
+    def get_postings(self, token: str, exact: bool = True) -> pd.DataFrame:
+        """
+        Retrieve the postings (message ROWID and frequency) for the given
+        case-folded token; if exact is False, the postings for every indexed
+        word containing the token are returned instead
+        """
+        return pd.read_sql_query(
+            sql="""
+            SELECT "message_rowid", "frequency"
+            FROM "posting"
+            WHERE "token_id" IN (
+                SELECT "token_id"
+                FROM "token"
+                WHERE {token_clause}
+            )
+            """.format(
+                token_clause='"token" = ?' if exact else 'instr("token", ?) > 0'
+            ),
+            con=self.con,
+            params=(token,),
+        )
+
+    def get_candidate_rowids(
+        self, phrase: str, whole_words: bool = False
+    ) -> Optional[set]:
+        """
+        Retrieve the ROWIDs of every indexed message which could possibly
+        contain the given literal phrase, by intersecting the postings of each
+        word in the phrase; return None if the phrase contains no words (and
+        therefore cannot be narrowed down by the index)
+        """
+        tokens = get_tokens(phrase)
+        if not tokens:
+            return None
+        candidate_rowids: Optional[set] = None
+        for token in dict.fromkeys(tokens):
+            # Unless the phrase must match whole words, a word of the phrase may
+            # only be part of a larger word in the message (e.g. "hey" within
+            # "they"), so every indexed word containing it must be considered
+            token_rowids = set(
+                self.get_postings(token, exact=whole_words)["message_rowid"]
+            )
+            candidate_rowids = (
+                token_rowids
+                if candidate_rowids is None
+                else candidate_rowids & token_rowids
+            )
+            if not candidate_rowids:
+                break
+        return candidate_rowids
+
+    def get_phrase_hits(
+        self, messages_df: pd.DataFrame, matcher: PhraseMatcher
+    ) -> pd.DataFrame:
+        """
+        Compute the same sparse (message, phrase) hits as
+        PhraseMatcher.get_phrase_hits(), using the index to avoid scanning
+        messages which cannot contain any of the phrases; the messages must
+        already have been indexed via TokenIndex.update()
+        """
+        message_rowids = pd.Index(messages_df["ROWID"])
+        # Start with an empty set of hits so that the result always has the
+        # correct columns
+        hits_list = [matcher.get_phrase_hits(messages_df["text"].iloc[:0])]
+        # The phrases whose counts must be verified against the message text,
+        # and the positions of the messages which could contain them (or None
+        # if every message must be scanned)
+        verified_phrase_indices: list[int] = []
+        verified_positions: Optional[set] = set()
+        for phrase_index, phrase in enumerate(matcher.phrases):
+            if (
+                matcher.whole_words
+                and not matcher.use_regex
+                and not matcher.case_sensitive
+                and TOKEN_PATTERN.fullmatch(phrase)
+            ):
+                # The number of whole-word, case-insensitive occurrences of a
+                # single word is exactly the frequency recorded by its postings
+                postings = self.get_postings(fold_case(phrase))
+                hits_list.append(
+                    pd.DataFrame(
+                        {
+                            "position": message_rowids.get_indexer(
+                                postings["message_rowid"]
+                            ),
+                            "phrase_index": phrase_index,
+                            "count": postings["frequency"].astype("int64"),
+                        }
+                    ).pipe(lambda df: df[df["position"] != -1])
+                )
+                continue
+            verified_phrase_indices.append(phrase_index)
+            candidate_rowids = (
+                None
+                if matcher.use_regex
+                else self.get_candidate_rowids(phrase, whole_words=matcher.whole_words)
+            )
+            if candidate_rowids is None:
+                verified_positions = None
+            elif verified_positions is not None:
+                positions = message_rowids.get_indexer(list(candidate_rowids))
+                verified_positions.update(positions[positions != -1].tolist())
+
+        if verified_phrase_indices:
+            candidate_positions = (
+                np.arange(len(messages_df))
+                if verified_positions is None
+                else np.array(sorted(verified_positions), dtype="int64")
+            )
+            verified_hits = PhraseMatcher(
+                [matcher.phrases[index] for index in verified_phrase_indices],
+                use_regex=matcher.use_regex,
+                case_sensitive=matcher.case_sensitive,
+                whole_words=matcher.whole_words,
+            ).get_phrase_hits(messages_df["text"].iloc[candidate_positions])
+            hits_list.append(
+                verified_hits.assign(
+                    position=candidate_positions[verified_hits["position"]],
+                    phrase_index=np.array(verified_phrase_indices, dtype="int64")[
+                        verified_hits["phrase_index"]
+                    ],
+                )
+            )
+
+        return (
+            pd.concat(hits_list, ignore_index=True)
+            .sort_values(["position", "phrase_index"])
+            .reset_index(drop=True)
+        )
+
+
+@contextmanager
+def get_token_index(
+    path: Optional[Path] = None,
+) -> Generator[TokenIndex, None, None]:
+    """
+    Open the persistent token index (creating it if it does not exist yet), and
+    yield it for the duration of the context
+    """
+    path = Path(path or TOKEN_INDEX_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with closing(sqlite3.connect(path)) as con:
+        yield TokenIndex(con)
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+import argparse
+from collections.abc import Iterable, Sequence
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from ica.cli import TypedCLIArguments
+from ica.core import DataFrameNamespace
+from ica.features import get_feature
+from ica.text import TOKEN_PATTERN
+
+# Common English words which are excluded from the results by default, since
+# they would otherwise crowd out every other word
+STOP_WORDS = frozenset(
+    (
+        "a about after again all also am an and any are as at be because been "
+        "before being but by can could did do does doing don for from get got "
+        "had has have having he her here him his how i if in into is it its "
+        "just ll m me more most my no not now of on one only or other our out "
+        "re s she so some than that the their them then there these they this "
+        "to too up us ve very was we were what when where which who why will "
+        "with would you your"
+    ).split()
+)
+
+# The number of messages whose terms are counted exactly before being merged
+# into the sketch; this bounds the memory used by each batch of counting
+TOP_TERMS_CHUNK_SIZE = 10_000
+
+# The default amount of memory (in megabytes) which the counts of all tracked
+# terms may occupy
+DEFAULT_MEMORY_BUDGET_MB = 64
+
+# The approximate number of bytes used to track a single term (i.e. the term
+# string, its index entry, and its overall count and overcount), excluding the
+# count for each sender
+BYTES_PER_TRACKED_TERM = 160
+
+
+class TopTermsCLIArguments(TypedCLIArguments):
+    """Additional CLI arguments shared by the top_words and top_ngrams analyzers"""
+
+    result_count: int
+    memory_budget: float
+    exact: bool
+    include_stop_words: bool
+    stop_words: Optional[list[str]]
+
+
+class TermSketch(object):
+    """
+    A Space-Saving sketch of the most frequent terms in a stream of messages,
+    which tracks at most a fixed number of terms (or every term, if there is no
+    capacity); a term which is not tracked can have occurred no more often than
+    the sketch's floor, and every tracked term's count overestimates its true
+    count by no more than its overcount
+    """
+
+    def __init__(self, senders: Sequence[str], capacity: Optional[int] = None) -> None:
+        self.senders = list(senders)
+        self.capacity = capacity
+        # The largest count of any term that has been evicted from the sketch
+        self.floor = 0
+        # The estimated overall count and overcount of every tracked term,
+        # followed by the number of occurrences of the term by each sender
+        # (counted since the term was last admitted into the sketch)
+        self.counts = pd.DataFrame(
+            {column: pd.Series(dtype="int64") for column in self.columns}
+        )
+
+    @property
+    def columns(self) -> list[str]:
+        """
+        The columns of the sketch's counts dataframe
+        """
+        return ["count", "overcount", *self.senders]
+
+    def update(self, terms: pd.Series, senders: pd.Series) -> None:
+        """
+        Count the given terms, each of which was sent by the sender at the same
+        position in the given senders series, then evict the least frequent
+        terms for as long as the sketch is over capacity
+        """
+        if terms.empty:
+            return
+        term_counts = (
+            pd.DataFrame({"term": terms.to_numpy(), "sender": senders.to_numpy()})
+            .groupby(["term", "sender"], sort=False)
+            .size()
+            .unstack("sender", fill_value=0)
+            .reindex(columns=self.senders, fill_value=0)
+        )
+        term_counts.insert(0, "count", term_counts.sum(axis=1))
+        term_counts.insert(1, "overcount", 0)
+        # Like in the original Space-Saving algorithm, a term admitted into a
+        # full sketch is assumed to have already occurred as often as the most
+        # frequent term ever evicted, since it may have been evicted itself
+        is_new_term = ~term_counts.index.isin(self.counts.index)
+        term_counts.loc[is_new_term, ["count", "overcount"]] += self.floor
+        # Grouping by hash (rather than aligning the sorted indexes) merges the
+        # counts in time proportional to the number of terms
+        counts = (
+            pd.concat([self.counts, term_counts]).groupby(level=0, sort=False).sum()
+        )
+        if self.capacity is not None and len(counts) > self.capacity:
+            # Only the terms on either side of the capacity need to be ordered
+            # in order to find those to evict
+            count_values = counts["count"].to_numpy()
+            partition = np.argpartition(-count_values, self.capacity)
+            self.floor = max(self.floor, int(count_values[partition[self.capacity]]))
+            counts = counts.iloc[np.sort(partition[: self.capacity])]
+        self.counts = counts
+
+    def get_top_terms(self, count: int) -> pd.DataFrame:
+        """
+        Return the estimated counts of the given number of most frequent terms,
+        sorted by count (then by term)
+        """
+        return (
+            self.counts.rename_axis(index="term")
+            .sort_values(["count", "term"], ascending=[False, True])
+            .head(count)
+        )
+
+
+def get_ngrams(
+    texts: pd.Series, ngram_size: int, stop_words: Iterable[str] = ()
+) -> pd.Series:
+    """
+    Split each of the given texts into case-folded words and return every
+    sequence of ngram_size consecutive words within the same text, labeled with
+    the index of the text it was found in; n-grams made up entirely of the given
+    stop words are excluded
+    """
+    words = texts.str.casefold().str.findall(TOKEN_PATTERN).explode().dropna()
+    text_positions = pd.factorize(words.index)[0]
+    words_array = words.to_numpy(dtype=object)
+    is_stop_word = words.isin(frozenset(stop_words)).to_numpy()
+    ngram_count = max(len(words_array) - ngram_size + 1, 0)
+    # Each n-gram starts at a word that is followed by ngram_size - 1 more words
+    # within the same text
+    is_valid = np.ones(ngram_count, dtype=bool)
+    is_all_stop_words = np.ones(ngram_count, dtype=bool)
+    ngrams = words_array[:ngram_count].copy()
+    for offset in range(ngram_size):
+        is_valid &= (
+            text_positions[offset : offset + ngram_count]
+            == text_positions[:ngram_count]
+        )
+        is_all_stop_words &= is_stop_word[offset : offset + ngram_count]
+        if offset:
+            ngrams = ngrams + " " + words_array[offset : offset + ngram_count]
+    is_valid &= ~is_all_stop_words
+    return pd.Series(
+        ngrams[is_valid], index=words.index[:ngram_count][is_valid], dtype=object
+    )
+
+
+def parse_positive_int(value: str) -> int:
+    """
+    Parse a count given on the command line (such as the number of results to
+    rank), which must be a whole number of at least 1
+    """
+    try:
+        count = int(value)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(f'"{value}" is not a whole number') from error
+    if count < 1:
+        raise argparse.ArgumentTypeError(f'"{value}" must be at least 1')
+    return count
+
+
+def add_top_terms_cli_arguments(cli_parser: argparse.ArgumentParser) -> None:
+    """
+    Add the CLI arguments shared by the top_words and top_ngrams analyzers
+    """
+    cli_parser.add_argument(
+        "--result-count",
+        type=parse_positive_int,
+        default=10,
+        help="the number of results to rank",
+    )
+    cli_parser.add_argument(
+        "--memory-budget",
+        type=float,
+        default=DEFAULT_MEMORY_BUDGET_MB,
+        help="the approximate amount of memory (in megabytes) to spend on "
+        "counting; if the conversation has more distinct terms than fit within "
+        "this budget, the counts become estimates (see the Max Overcount "
+        f"column); defaults to {DEFAULT_MEMORY_BUDGET_MB}",
+    )
+    cli_parser.add_argument(
+        "--exact",
+        action="store_true",
+        help="if specified, counts every term exactly, regardless of how much "
+        "memory that takes",
+    )
+    cli_parser.add_argument(
+        "--include-stop-words",
+        action="store_true",
+        help="if specified, includes common words (like 'the' or 'and') in the results",
+    )
+    cli_parser.add_argument(
+        "--stop-word",
+        action="append",
+        dest="stop_words",
+        help="an additional word to exclude from the results; can be specified "
+        "more than once",
+    )
+
+
+def get_top_terms(
+    dfs: DataFrameNamespace, cli_args: TopTermsCLIArguments, ngram_size: int
+) -> pd.DataFrame:
+    """
+    Count the most frequent words (or n-grams of the given size) across the
+    non-reaction messages of the conversation, chunk by chunk, with a column for
+    the total count and a column for the count from each sender
+    """
+    messages = get_feature(dfs, "non_reaction_messages")
+    senders = ["Me"] + get_feature(dfs, "all_participants")
+    stop_words = set() if cli_args.include_stop_words else set(STOP_WORDS)
+    stop_words.update(word.casefold() for word in cli_args.stop_words or ())
+    if cli_args.exact:
+        capacity = None
+    else:
+        bytes_per_term = BYTES_PER_TRACKED_TERM + 8 * len(senders)
+        capacity = max(
+            int(cli_args.memory_budget * 1024 * 1024) // bytes_per_term,
+            cli_args.result_count,
+        )
+    sketch = TermSketch(senders, capacity)
+    for chunk_start in range(0, len(messages), TOP_TERMS_CHUNK_SIZE):
+        chunk = messages.iloc[chunk_start : chunk_start + TOP_TERMS_CHUNK_SIZE]
+        ngrams = get_ngrams(chunk["text"].fillna(""), ngram_size, stop_words)
+        sketch.update(ngrams, chunk["sender_display_name"].loc[ngrams.index])
+
+    results = sketch.get_top_terms(cli_args.result_count)
+    overcounts = results.pop("overcount")
+    results = results.rename(
+        columns={
+            sender: "count_from_me" if sender == "Me" else f"count_from_{sender}"
+            for sender in senders
+        }
+    )
+    # The overcounts are only relevant if any counts are estimates
+    if overcounts.any():
+        results["max_overcount"] = overcounts
+    return results
+
+
+def get_top_terms_label_overrides(dfs: DataFrameNamespace) -> dict[str, str]:
+    """
+    Preserve the capitalization of each participant's name in the column labels
+    """
+    return {
+        f"count_from_{display_name}": f"Count From {display_name}"
+        for display_name in get_feature(dfs, "all_participants")
+    }
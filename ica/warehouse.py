@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+import argparse
+import importlib.resources
+import os
+import sqlite3
+from collections.abc import Generator, Sequence
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Optional
+
+import duckdb
+import pandas as pd
+
+import ica.core
+from ica.contact import get_all_contact_records
+from ica.conversations import get_all_conversations
+from ica.database import connect_read_only
+from ica.exceptions import WarehouseNotFoundError
+
+# The path to the DuckDB database which persists every message, attachment,
+# handle, and chat of chat.db in columnar form between runs (chat.db itself is
+# only ever opened read-only)
+WAREHOUSE_PATH = Path.home() / "Library" / "Caches" / "ica" / "warehouse.duckdb"
+
+# The number of messages (or attachments) read from chat.db (and decoded) at a
+# time while refreshing the warehouse, which bounds the memory used by a refresh
+WAREHOUSE_BATCH_SIZE = 50_000
+
+# Every ROWID in chat.db is greater than this, so an empty table resumes from it
+INITIAL_ROWID = 0
+
+# The name under which the warehouse is attached to the DuckDB connections of
+# get_sql_connection() and get_warehouse_connection()
+WAREHOUSE_SCHEMA = "warehouse"
+
+
+def read_batch(
+    chat_con: sqlite3.Connection, query_name: str, last_rowid: object, batch_size: int
+) -> pd.DataFrame:
+    """
+    Read the next batch of rows (i.e. those whose ROWID is greater than the
+    given ROWID) with the given query from the queries directory
+    """
+    return pd.read_sql_query(
+        sql=importlib.resources.files("ica")
+        .joinpath(os.path.join("queries", f"{query_name}.sql"))
+        .read_text(),
+        con=chat_con,
+        params={"last_rowid": last_rowid, "batch_size": batch_size},
+    ).assign(
+        datetime=lambda df: ica.core.get_datetimes_from_imessage_dates(
+            df["datetime"], "UTC"
+        ),
+        is_from_me=lambda df: df["is_from_me"].astype(bool),
+    )
+
+
+class Warehouse:
+    """
+    A persistent DuckDB database of every message (with its decoded text),
+    attachment, handle, and chat in the chat database, along with the contact
+    (if any) of each handle; messages and attachments are added in order of
+    ROWID, so that refreshing the warehouse only ever reads the messages and
+    attachments added to chat.db since the last refresh, while the (much
+    smaller) handles and chats tables are replaced on every refresh
+    """
+
+    def __init__(self, con: duckdb.DuckDBPyConnection) -> None:
+        self.con = con
+
+    def has_table(self, table_name: str) -> bool:
+        """
+        Whether the warehouse has a table with the given name
+        """
+        return bool(
+            self.con.execute(
+                "SELECT * FROM duckdb_tables() WHERE table_name = ?", [table_name]
+            ).fetchall()
+        )
+
+    def has_rows(self, table_name: str) -> bool:
+        """
+        Whether the warehouse has a table with the given name with any rows
+        """
+        return self.has_table(table_name) and bool(
+            self.con.execute(f'SELECT * FROM "{table_name}" LIMIT 1').fetchall()
+        )
+
+    def get_last_rowid(self, table_name: str) -> object:
+        """
+        The ROWID of the last row in chat.db which has been read into the table
+        with the given name
+        """
+        if not self.has_rows(table_name):
+            return INITIAL_ROWID
+        ((last_rowid,),) = self.con.execute(
+            f'SELECT MAX("ROWID") FROM "{table_name}"'
+        ).fetchall()
+        return last_rowid
+
+    @property
+    def message_count(self) -> int:
+        """
+        The number of messages in the warehouse
+        """
+        if not self.has_table("messages"):
+            return 0
+        ((message_count,),) = self.con.execute(
+            'SELECT COUNT(*) FROM "messages"'
+        ).fetchall()
+        return message_count
+
+    def append(self, table_name: str, df: pd.DataFrame) -> None:
+        """
+        Append the rows of the given dataframe to the table with the given name;
+        a table is created with the columns (and types) of the first rows read
+        into it (replacing the table if it has no rows yet), since the type of
+        each ROWID in chat.db is whatever was written to it
+        """
+        self.con.register("_batch", df)
+        try:
+            if not self.has_rows(table_name):
+                self.con.execute(
+                    f'CREATE OR REPLACE TABLE "{table_name}" AS FROM "_batch"'
+                )
+            else:
+                self.con.execute(f'INSERT INTO "{table_name}" BY NAME FROM "_batch"')
+        finally:
+            self.con.unregister("_batch")
+
+    def replace(self, table_name: str, df: pd.DataFrame) -> None:
+        """
+        Replace the table with the given name with the rows of the given
+        dataframe
+        """
+        self.con.register("_batch", df)
+        try:
+            self.con.execute(f'CREATE OR REPLACE TABLE "{table_name}" AS FROM "_batch"')
+        finally:
+            self.con.unregister("_batch")
+
+    def refresh_messages(self, chat_con: sqlite3.Connection, batch_size: int) -> int:
+        """
+        Add every message in the given chat database whose ROWID is greater than
+        that of the last message in the warehouse (along with the chats it
+        belongs to), one batch at a time, returning the number of new messages
+        """
+        new_message_count = 0
+        while True:
+            last_rowid = self.get_last_rowid("messages")
+            batch = read_batch(chat_con, "warehouse_messages", last_rowid, batch_size)
+            if batch.empty:
+                return new_message_count
+            batch = (
+                batch.assign(
+                    text=lambda df: df["text"].fillna(
+                        df.loc[df["text"].isna(), "attributedBody"]
+                        .dropna()
+                        .apply(ica.core.decode_message_attributedbody)
+                    )
+                )
+                .drop(columns="attributedBody")
+                .assign(
+                    is_reaction=lambda df: (
+                        df["text"].str.match(ica.core.REACTION_PATTERN).fillna(False)
+                    )
+                )
+            )
+            chat_messages = pd.read_sql_query(
+                sql="""
+                SELECT "chat_id", "message_id"
+                FROM "chat_message_join"
+                WHERE "message_id" > ? AND "message_id" <= ?
+                """,
+                con=chat_con,
+                params=[last_rowid, batch["ROWID"].tolist()[-1]],
+            )
+            # The messages of each batch and the chats they belong to are added
+            # together, so that the warehouse never has one without the other
+            self.con.execute("BEGIN TRANSACTION")
+            try:
+                self.append("messages", batch)
+                self.append("chat_messages", chat_messages)
+                self.con.execute("COMMIT")
+            except BaseException:
+                self.con.execute("ROLLBACK")
+                raise
+            new_message_count += len(batch)
+
+    def refresh_attachments(self, chat_con: sqlite3.Connection, batch_size: int) -> int:
+        """
+        Add every attachment in the given chat database whose ROWID is greater
+        than that of the last attachment in the warehouse, one batch at a time,
+        returning the number of new attachments
+        """
+        new_attachment_count = 0
+        while True:
+            batch = read_batch(
+                chat_con,
+                "warehouse_attachments",
+                self.get_last_rowid("attachments"),
+                batch_size,
+            )
+            if batch.empty:
+                # The table is created even if there are no attachments yet,
+                # so that it can always be queried
+                if not self.has_table("attachments"):
+                    self.append("attachments", batch)
+                return new_attachment_count
+            self.append("attachments", batch)
+            new_attachment_count += len(batch)
+
+    def refresh_handles_and_chats(self, chat_con: sqlite3.Connection) -> None:
+        """
+        Replace the handles table with every handle in the given chat database
+        (along with the contact, if any, of each), and the chats table with the
+        participants of every chat
+        """
+        records_by_identifier = {
+            identifier: record
+            for record in get_all_contact_records()
+            for identifier in record.get_identifiers()
+        }
+        handles = pd.read_sql_query(
+            sql='SELECT "ROWID" AS "handle_id", "id" AS "identifier" FROM "handle"',
+            con=chat_con,
+        )
+        records = handles["identifier"].map(records_by_identifier)
+        self.replace(
+            "handles",
+            handles.assign(
+                contact_id=records.map(lambda record: record.id, na_action="ignore"),
+                first_name=records.map(
+                    lambda record: record.first_name, na_action="ignore"
+                ),
+                last_name=records.map(
+                    lambda record: record.last_name, na_action="ignore"
+                ),
+                display_name=records.map(
+                    lambda record: record.full_name, na_action="ignore"
+                ).fillna(handles["identifier"]),
+            ),
+        )
+        self.replace(
+            "chats",
+            pd.DataFrame(
+                [
+                    (chat_id, conversation.participants)
+                    for conversation in get_all_conversations(chat_con)
+                    for chat_id in conversation.chat_ids
+                ],
+                columns=pd.Index(["chat_id", "participants"]),
+            ),
+        )
+
+    def refresh(
+        self, chat_con: sqlite3.Connection, batch_size: int = WAREHOUSE_BATCH_SIZE
+    ) -> int:
+        """
+        Add every message and attachment in the given chat database which is not
+        in the warehouse yet, and replace the handles and chats, all within a
+        single read transaction of the chat database (so that every table is
+        consistent with the others); return the number of new messages
+        """
+        chat_con.execute("BEGIN")
+        try:
+            new_message_count = self.refresh_messages(chat_con, batch_size)
+            self.refresh_attachments(chat_con, batch_size)
+            self.refresh_handles_and_chats(chat_con)
+        finally:
+            chat_con.rollback()
+        return new_message_count
+
+
+def remove_warehouse(path: Path) -> None:
+    """
+    Remove the warehouse at the given path, along with its write-ahead log
+    """
+    path.unlink(missing_ok=True)
+    path.with_name(f"{path.name}.wal").unlink(missing_ok=True)
+
+
+@contextmanager
+def get_warehouse(path: Optional[Path] = None) -> Generator[Warehouse, None, None]:
+    """
+    Open the persistent warehouse for writing (creating it if it does not exist
+    yet), and yield it for the duration of the context
+    """
+    path = Path(path or WAREHOUSE_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with duckdb.connect(str(path)) as con:
+        yield Warehouse(con)
+
+
+def build_warehouse(path: Optional[Path] = None, rebuild: bool = False) -> int:
+    """
+    Add every message in chat.db which is not in the warehouse yet to the
+    warehouse (or, if rebuild is True, discard the warehouse and add every
+    message again), returning the number of new messages
+    """
+    path = Path(path or WAREHOUSE_PATH)
+    if rebuild:
+        remove_warehouse(path)
+    with closing(connect_read_only(ica.core.get_chat_database_path())) as chat_con:
+        with get_warehouse(path) as warehouse:
+            return warehouse.refresh(chat_con)
+
+
+def attach_warehouse(
+    con: duckdb.DuckDBPyConnection, path: Optional[Path] = None
+) -> None:
+    """
+    Attach the warehouse (read-only) to the given DuckDB connection, so that
+    its tables can be queried as warehouse.messages, warehouse.attachments,
+    warehouse.chat_messages, warehouse.handles, and warehouse.chats
+    """
+    path = Path(path or WAREHOUSE_PATH)
+    if not path.exists():
+        raise WarehouseNotFoundError(
+            'No warehouse has been built yet; run "ica warehouse build" first'
+        )
+    con.execute(
+        "ATTACH '{}' AS \"{}\" (READ_ONLY)".format(
+            str(path).replace("'", "''"), WAREHOUSE_SCHEMA
+        )
+    )
+
+
+@contextmanager
+def get_warehouse_connection(
+    path: Optional[Path] = None,
+) -> Generator[duckdb.DuckDBPyConnection, None, None]:
+    """
+    Create an in-memory DuckDB database with the warehouse attached (see
+    attach_warehouse()), and yield a connection to it
+    """
+    with duckdb.connect(":memory:") as con:
+        attach_warehouse(con, path)
+        yield con
+
+
+def get_warehouse_cli_parser() -> argparse.ArgumentParser:
+    """
+    Retrieve the parser for the arguments of the `ica warehouse` command
+    """
+    parser = argparse.ArgumentParser(
+        prog="ica warehouse",
+        description="manage the DuckDB warehouse of every message, which "
+        "from_sql can query with --warehouse",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser(
+        "build",
+        help="build the warehouse from scratch, from every message in the chat "
+        "database",
+    )
+    subparsers.add_parser(
+        "refresh",
+        help="add every message and attachment added to the chat database since "
+        "the warehouse was last built or refreshed",
+    )
+    return parser
+
+
+def main(argv: Sequence[str]) -> None:
+    """
+    Entry point for the `ica warehouse` command, which builds or refreshes the
+    warehouse
+    """
+    cli_args = get_warehouse_cli_parser().parse_args(argv)
+    new_message_count = build_warehouse(rebuild=cli_args.command == "build")
+    with get_warehouse() as warehouse:
+        print(
+            f"Added {new_message_count} new messages "
+            f"({warehouse.message_count} in total)"
+        )
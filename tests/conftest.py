@@ -23,6 +23,9 @@
 mock_contacts_db_glob = temp_ica_dir / "*.abcddb"
 mock_contacts_db_path = mock_contacts_db_glob.with_name("addressbook.abcddb")
 mock_chats_db_path = temp_ica_dir / "chat.db"
+mock_token_index_path = temp_ica_dir / "token_index.db"
+mock_search_index_path = temp_ica_dir / "search_index.db"
+mock_warehouse_path = temp_ica_dir / "warehouse.duckdb"
 
 
 def pytest_configure(config: pytest.Config) -> None:
@@ -72,6 +75,9 @@ def setup_mock_databases(request: pytest.FixtureRequest) -> Generator[None, None
     with (
         patch("ica.contact.DB_GLOB", mock_contacts_db_glob),
         patch("ica.core.DB_PATH", mock_chats_db_path),
+        patch("ica.token_index.TOKEN_INDEX_PATH", mock_token_index_path),
+        patch("ica.search_index.SEARCH_INDEX_PATH", mock_search_index_path),
+        patch("ica.warehouse.WAREHOUSE_PATH", mock_warehouse_path),
     ):
         # Setup
         with contextlib.suppress(OSError):
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""test the activity_heatmap built-in analyzer"""
+
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+import ica
+import ica.analyzers.activity_heatmap as activity_heatmap
+
+
+def test_get_activity_heatmaps() -> None:
+    """Should count messages by sender, local weekday, and local hour."""
+    heatmaps = activity_heatmap.get_activity_heatmaps(
+        pd.DataFrame(
+            {
+                "datetime": pd.to_datetime(
+                    [
+                        # A Monday in New York, but a Tuesday in UTC
+                        "2024-01-01 23:30",
+                        "2024-01-01 23:45",
+                        "2024-01-07 08:00",
+                        "2024-01-07 08:00",
+                    ]
+                ).tz_localize("America/New_York"),
+                "sender_display_name": ["Me", "Jane", "Jane", "Someone Else"],
+            }
+        ),
+        ["Me", "Jane"],
+    )
+    assert heatmaps.shape == (2, 7, 24)
+    assert heatmaps.sum() == 3
+    assert heatmaps[0, 0, 23] == 1
+    assert heatmaps[1, 0, 23] == 1
+    assert heatmaps[1, 6, 8] == 1
+
+
+@patch("ica.output_results")
+@patch("sys.argv", [activity_heatmap.__file__, "-c", "Jane Fernbrook", "-t", "UTC"])
+def test_activity_heatmap(output_results: MagicMock) -> None:
+    """Should produce the same counts as grouping by weekday and hour."""
+    activity_heatmap.main()
+    df: pd.DataFrame = output_results.call_args[0][0]
+    messages = ica.get_dataframes(contacts=["Jane Fernbrook"], timezone="UTC").messages
+    messages = messages[~messages["is_reaction"]]
+    expected_counts = messages.groupby(
+        [messages["datetime"].dt.day_name(), messages["datetime"].dt.hour]
+    ).size()
+    assert df.shape == (7, 24)
+    assert df.index.name == "weekday"
+    assert df.index[0] == "Monday"
+    assert df.to_numpy().sum() == len(messages)
+    for (weekday, hour), count in expected_counts.items():
+        assert df.loc[weekday, hour] == count
+
+
+@patch("ica.output_results")
+@patch(
+    "sys.argv",
+    [activity_heatmap.__file__, "-c", "Jane Fernbrook", "-t", "UTC", "--by-sender"],
+)
+def test_activity_heatmap_by_sender(output_results: MagicMock) -> None:
+    """Should output a heatmap for each sender."""
+    activity_heatmap.main()
+    df: pd.DataFrame = output_results.call_args[0][0]
+    messages = ica.get_dataframes(contacts=["Jane Fernbrook"]).messages
+    messages = messages[~messages["is_reaction"]]
+    assert df["sender"].unique().tolist() == ["Me", "Jane"]
+    assert df.columns[0] == "sender"
+    heatmap_totals = df.groupby("sender").sum().sum(axis=1)
+    assert heatmap_totals["Me"] == messages["is_from_me"].sum()
+    assert heatmap_totals["Jane"] == (~messages["is_from_me"]).sum()
@@ -5,6 +5,7 @@
 
 import pandas as pd
 
+import ica
 import ica.analyzers.attachment_totals as attachment_totals
 
 
@@ -42,3 +43,68 @@ def test_spotify_count(output_results: MagicMock) -> None:
     attachment_totals.main()
     df: pd.DataFrame = output_results.call_args[0][0]
     assert df.loc["spotify"]["total"] == 1
+
+
+@patch("ica.output_results")
+@patch(
+    "sys.argv",
+    [
+        attachment_totals.__file__,
+        "-c",
+        "Thomas Riverstone",
+        "--link-category",
+        "spotify=www.Spotify.com",
+        "--link-category",
+        "videos=youtube.com",
+        "--link-category",
+        "videos=youtu.be",
+    ],
+)
+def test_custom_link_categories(output_results: MagicMock) -> None:
+    """Should count links for additional user-supplied domains."""
+    attachment_totals.main()
+    df: pd.DataFrame = output_results.call_args[0][0]
+    assert df.loc["spotify"]["total"] == 1
+    # A domain listed by several categories is counted in each of them
+    assert df.loc["videos"]["total"] == 4
+    assert df.loc["youtube_videos"]["total"] == 4
+
+
+@patch("ica.output_results")
+@patch(
+    "sys.argv",
+    [attachment_totals.__file__, "-c", "Jane Fernbrook", "--by-sender"],
+)
+def test_by_sender(output_results: MagicMock) -> None:
+    """Should break down every total by sender."""
+    attachment_totals.main()
+    df: pd.DataFrame = output_results.call_args[0][0]
+    assert list(df.columns) == ["total", "total_from_me", "total_from_Jane"]
+    assert (df["total"] == df["total_from_me"] + df["total_from_Jane"]).all()
+    assert df.loc["gifs"]["total"] == 1
+
+
+def test_attachment_counts() -> None:
+    """Should count attachments by sender, MIME type, and extension class."""
+    attachment_counts = ica.get_attachment_counts(
+        contacts=["Jane Fernbrook"], extensions=["caf", "GIF"]
+    )
+    assert attachment_counts.to_dict(orient="records") == [
+        {
+            "is_from_me": True,
+            "sender_handle": "+12234567890",
+            "mime_type": "image/gif",
+            "extension_class": "GIF",
+            "count": 1,
+        }
+    ]
+
+
+def test_attachment_counts_from_people() -> None:
+    """Should only count the attachments sent by the given people."""
+    assert (
+        ica.get_attachment_counts(contacts=["Jane Fernbrook"], from_people=["Jane"])[
+            "count"
+        ].sum()
+        == 0
+    )
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""test the cache of values computed from dataframes"""
+
+import gc
+from unittest.mock import MagicMock
+
+import pandas as pd
+
+from ica.cache import DataFrameCache
+
+
+def test_dataframe_cache() -> None:
+    """Should compute each value once per dataframe and key."""
+    cache: DataFrameCache[int] = DataFrameCache()
+    df = pd.DataFrame({"value": [1, 2, 3]})
+    compute_value = MagicMock(return_value=6)
+    assert cache.get([df], ("sum",), compute_value) == 6
+    assert cache.get([df], ("sum",), compute_value) == 6
+    compute_value.assert_called_once()
+    cache.get([df], ("mean",), compute_value)
+    cache.get([df.copy()], ("sum",), compute_value)
+    assert compute_value.call_count == 3
+    assert (id(df), "sum") in cache
+
+
+def test_dataframe_cache_evicted() -> None:
+    """Should forget a value once any of its dataframes no longer exists."""
+    cache: DataFrameCache[int] = DataFrameCache()
+    df = pd.DataFrame({"value": [1, 2, 3]})
+    other_df = pd.DataFrame({"value": [4]})
+    cache.get([df, other_df], (), lambda: 10)
+    cache.get([other_df], (), lambda: 4)
+    assert len(cache) == 2
+    del df
+    gc.collect()
+    assert len(cache) == 1
+    assert (id(other_df),) in cache
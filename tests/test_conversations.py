@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""test analyzing every conversation in the chat database at once"""
+
+import sqlite3
+from contextlib import closing, redirect_stdout
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+
+import ica
+import ica.analyzers.attachment_totals as attachment_totals
+import ica.analyzers.message_totals as message_totals
+import ica.analyzers.transcript as transcript
+import ica.cli as cli
+import ica.core
+from ica.conversations import (
+    Conversation,
+    get_all_conversations,
+    partition_conversations,
+)
+
+
+def teardown_function() -> None:
+    """Reset CLI state after each test."""
+    cli.did_user_invoke_cli_directly = False
+
+
+def get_conversations() -> list[Conversation]:
+    """Enumerate every conversation in the mock chat database"""
+    with closing(sqlite3.connect(f"file:{ica.core.DB_PATH}?mode=ro", uri=True)) as con:
+        return get_all_conversations(con)
+
+
+def test_get_all_conversations() -> None:
+    """Should resolve the participants of every chat to their contacts."""
+    conversations = get_conversations()
+    assert [conversation.participants for conversation in conversations] == [
+        "Daniel Brightingale",
+        "Daniel Brightingale, Jane Fernbrook",
+        "Jane Fernbrook",
+        "Thomas Riverstone",
+    ]
+    assert [conversation.chat_ids for conversation in conversations] == [
+        ["chat-daniel-john"],
+        ["chat-daniel-jane-john"],
+        ["chat-jane-john"],
+        ["chat-thomas-john"],
+    ]
+    assert [conversation.message_count for conversation in conversations] == [
+        3,
+        1,
+        11,
+        23,
+    ]
+
+
+@pytest.mark.mock_db_config(
+    contacts={
+        "ZABCDEMAILADDRESS": [{"ZOWNER": "user-jane", "ZADDRESS": "jane@example.com"}]
+    }
+)
+def test_get_all_conversations_unknown_handle() -> None:
+    """Should identify a participant who is not a contact by their handle."""
+    conversations = get_conversations()
+    assert conversations[-1].participants == "thomas.riverstone@example.com"
+    assert conversations[-1].contact_records[0].email_addresses == [
+        "thomas.riverstone@example.com"
+    ]
+
+
+def test_partition_conversations() -> None:
+    """Should balance the number of messages across partitions."""
+    conversations = [
+        Conversation(chat_ids=[str(index)], contact_records=[], message_count=count)
+        for index, count in enumerate([10, 1, 7, 3, 3, 2])
+    ]
+    partitions = partition_conversations(conversations, 2)
+    assert sorted(index for partition in partitions for index in partition) == list(
+        range(len(conversations))
+    )
+    assert [
+        sum(conversations[index].message_count for index in partition)
+        for partition in partitions
+    ] == [13, 13]
+    assert len(partition_conversations(conversations, 10)) == len(conversations)
+
+
+def get_all_conversations_df(output_results: MagicMock, *args: str) -> pd.DataFrame:
+    """Run the message_totals analyzer over every conversation"""
+    with patch("sys.argv", [message_totals.__file__, "--all-conversations", *args]):
+        message_totals.main()
+    return output_results.call_args[0][0]
+
+
+@patch("ica.output_results")
+def test_all_conversations(output_results: MagicMock) -> None:
+    """Should output the same results as analyzing each conversation alone."""
+    df = get_all_conversations_df(output_results, "-j", "1")
+    assert df.columns[:3].tolist() == ["chat_ids", "participants", "metric"]
+    assert df["participants"].unique().tolist() == [
+        conversation.participants for conversation in get_conversations()
+    ]
+    with patch("sys.argv", [message_totals.__file__, "-c", "Jane Fernbrook"]):
+        message_totals.main()
+    # The metrics are labeled just as they are when output for one conversation
+    assert "Messages From Jane" in df["metric"].tolist()
+    jane_df = ica.core.prepare_df_for_output(output_results.call_args[0][0])
+    assert (
+        df[df["participants"] == "Jane Fernbrook"]
+        .set_index("metric")["total"]
+        .equals(jane_df["Total"])
+    )
+
+
+@patch("ica.output_results")
+def test_all_conversations_in_processes(output_results: MagicMock) -> None:
+    """Should output the same results when conversations are analyzed at once."""
+    in_process_df = get_all_conversations_df(output_results, "-j", "1")
+    pooled_df = get_all_conversations_df(output_results, "-j", "3")
+    pd.testing.assert_frame_equal(pooled_df, in_process_df)
+
+
+@patch("ica.output_results")
+def test_all_conversations_from_person(output_results: MagicMock) -> None:
+    """Should skip conversations which do not include the person filtered by."""
+    df = get_all_conversations_df(output_results, "-j", "1", "-p", "Jane")
+    # Jane has not sent any messages to the group chat she is part of
+    assert df["participants"].unique().tolist() == ["Jane Fernbrook"]
+
+
+@patch("ica.output_results")
+def test_all_conversations_attachment_totals(output_results: MagicMock) -> None:
+    """Should count the attachments of each conversation it analyzes."""
+    with patch("sys.argv", [attachment_totals.__file__, "--all-conversations"]):
+        attachment_totals.main()
+    df: pd.DataFrame = output_results.call_args[0][0]
+    assert df["participants"].unique().tolist() == [
+        conversation.participants for conversation in get_conversations()
+    ]
+    with patch("sys.argv", [attachment_totals.__file__, "-c", "Jane Fernbrook"]):
+        attachment_totals.main()
+    jane_df = ica.core.prepare_df_for_output(
+        output_results.call_args[0][0],
+        output_results.call_args[1]["prettified_label_overrides"],
+    )
+    assert (
+        df[df["participants"] == "Jane Fernbrook"]
+        .set_index("type")["total"]
+        .equals(jane_df["Total"])
+    )
+
+
+@patch("sys.argv", [cli.__file__, "run", "message_totals", "--all-conversations"])
+def test_run_all_conversations() -> None:
+    """Should analyze every conversation with each analyzer of `ica run`."""
+    with redirect_stdout(StringIO()) as out:
+        cli.main()
+    for conversation in get_conversations():
+        assert conversation.participants in out.getvalue()
+
+
+@patch("sys.stderr", new_callable=StringIO)
+@patch(
+    "sys.argv",
+    [message_totals.__file__, "-c", "Jane Fernbrook", "--all-conversations"],
+)
+def test_all_conversations_with_contact(stderr: StringIO) -> None:
+    """Should not accept both --contact and --all-conversations."""
+    with pytest.raises(SystemExit):
+        message_totals.main()
+    assert "not allowed with argument" in stderr.getvalue()
+
+
+@patch("sys.argv", [transcript.__file__, "--all-conversations"])
+def test_all_conversations_script_analyzer() -> None:
+    """Should reject --all-conversations for an analyzer without analyze()."""
+    with pytest.raises(ica.ConversationNotFoundError):
+        transcript.main()
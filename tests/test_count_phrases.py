@@ -100,3 +100,19 @@ def test_regex(output_results: MagicMock) -> None:
     assert df.loc[phrase]["count"] == 3
     assert df.loc[phrase]["count_from_me"] == 1
     assert df.loc[phrase]["count_from_Thomas"] == 2
+
+
+@patch("ica.output_results")
+@patch(
+    "sys.argv",
+    [count_phrases.__file__, "me", "-c", "Thomas Riverstone", "--whole-words"],
+)
+def test_whole_words(output_results: MagicMock) -> None:
+    """
+    Should only count occurrences of phrases that start and end on word
+    boundaries.
+    """
+    count_phrases.main()
+    df: pd.DataFrame = output_results.call_args[0][0]
+    phrase = sys.argv[1]
+    assert df.loc[phrase]["count"] == 2
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""test the settings with which SQLite databases are read"""
+
+import argparse
+import sqlite3
+from contextlib import closing, redirect_stdout
+from io import StringIO
+from pathlib import Path
+from typing import Union
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+
+import ica
+import ica.analyzers.message_totals as message_totals
+import ica.cli as cli
+import ica.core
+from ica.database import (
+    READ_PROFILES,
+    DatabaseSnapshot,
+    ReadProfile,
+    connect_read_only,
+    get_read_profile,
+    snapshot_database,
+)
+
+
+def teardown_function() -> None:
+    """Reset CLI state after each test."""
+    cli.did_user_invoke_cli_directly = False
+
+
+def get_message_count(db_path: Union[Path, DatabaseSnapshot]) -> int:
+    """Count the messages in the chat database (or snapshot) at the given path"""
+    with closing(connect_read_only(db_path)) as con:
+        return con.execute("SELECT COUNT(*) FROM message").fetchone()[0]
+
+
+def delete_messages() -> None:
+    """Delete every message from the live (mock) chat database"""
+    with closing(sqlite3.connect(ica.core.DB_PATH)) as con:
+        with con:
+            con.execute("DELETE FROM message")
+
+
+def get_pragma(con: sqlite3.Connection, name: str) -> int:
+    """Retrieve the value of the given pragma for the given connection"""
+    return con.execute(f"PRAGMA {name}").fetchone()[0]
+
+
+def test_connect_tuned() -> None:
+    """Should apply every setting of the tuned read profile."""
+    with closing(connect_read_only(ica.core.DB_PATH, READ_PROFILES["tuned"])) as con:
+        assert get_pragma(con, "mmap_size") > 0
+        assert get_pragma(con, "cache_size") == -64 * 1024
+        # 2 means MEMORY
+        assert get_pragma(con, "temp_store") == 2
+        assert get_pragma(con, "query_only") == 1
+
+
+def test_connect_default() -> None:
+    """Should leave SQLite's own settings alone for the default read profile."""
+    with closing(
+        sqlite3.connect(f"file:{ica.core.DB_PATH}?mode=ro", uri=True)
+    ) as plain_con:
+        defaults = {
+            name: get_pragma(plain_con, name)
+            for name in ("mmap_size", "cache_size", "temp_store", "query_only")
+        }
+    with closing(connect_read_only(ica.core.DB_PATH, READ_PROFILES["default"])) as con:
+        assert {name: get_pragma(con, name) for name in defaults} == defaults
+
+
+def test_connect_read_only() -> None:
+    """Should reject any attempt to modify the database."""
+    with closing(connect_read_only(ica.core.DB_PATH)) as con:
+        with pytest.raises(sqlite3.OperationalError):
+            con.execute("DELETE FROM message")
+
+
+def test_connect_immutable() -> None:
+    """Should read a database opened as immutable."""
+    with closing(
+        connect_read_only(ica.core.DB_PATH, ReadProfile(immutable=True))
+    ) as con:
+        assert get_pragma(con, "query_only") == 0
+        assert con.execute("SELECT COUNT(*) FROM message").fetchone()[0] > 0
+
+
+def test_get_read_profile_invalid() -> None:
+    """Should reject the name of a read profile which does not exist."""
+    with pytest.raises(argparse.ArgumentTypeError):
+        get_read_profile("fastest")
+
+
+@patch("sys.stderr", new_callable=StringIO)
+def test_cli_read_profile_invalid(stderr: StringIO) -> None:
+    """Should report the name of a read profile which does not exist."""
+    with pytest.raises(SystemExit):
+        ica.get_cli_parser().parse_args(
+            ["-c", "Jane Fernbrook", "--read-profile", "fastest"]
+        )
+    assert '"fastest" is not a read profile' in stderr.getvalue()
+
+
+@pytest.mark.parametrize("read_profile", list(READ_PROFILES.values()))
+def test_get_dataframes_read_profile(read_profile: ReadProfile) -> None:
+    """Should load the same dataframes with every read profile."""
+    expected_dfs = ica.get_dataframes(contacts=["Jane Fernbrook"], timezone="UTC")
+    dfs = ica.get_dataframes(
+        contacts=["Jane Fernbrook"], timezone="UTC", read_profile=read_profile
+    )
+    pd.testing.assert_frame_equal(dfs.messages, expected_dfs.messages)
+    pd.testing.assert_frame_equal(dfs.attachments, expected_dfs.attachments)
+    pd.testing.assert_frame_equal(dfs.handles, expected_dfs.handles)
+
+
+def test_snapshot_in_memory() -> None:
+    """Should keep reading the database as it was when the snapshot was taken."""
+    message_count = get_message_count(ica.core.DB_PATH)
+    with snapshot_database(ica.core.DB_PATH) as snapshot:
+        assert snapshot.in_memory
+        delete_messages()
+        assert get_message_count(snapshot) == message_count
+        with closing(connect_read_only(snapshot)) as con:
+            with pytest.raises(sqlite3.OperationalError):
+                con.execute("DELETE FROM message")
+    assert get_message_count(ica.core.DB_PATH) == 0
+
+
+def test_snapshot_directory(tmp_path: Path) -> None:
+    """Should write the snapshot to a file which is removed afterwards."""
+    message_count = get_message_count(ica.core.DB_PATH)
+    with snapshot_database(ica.core.DB_PATH, directory=tmp_path) as snapshot:
+        assert not snapshot.in_memory
+        assert Path(snapshot.path).parent == tmp_path
+        delete_messages()
+        assert get_message_count(snapshot) == message_count
+    assert not list(tmp_path.iterdir())
+
+
+def test_snapshot_tables() -> None:
+    """Should copy only the given tables, along with their indices."""
+    with snapshot_database(ica.core.DB_PATH, tables=["message", "handle"]) as snapshot:
+        with closing(connect_read_only(snapshot)) as con:
+            assert {
+                name for (name,) in con.execute("SELECT tbl_name FROM sqlite_master")
+            } == {"message", "handle"}
+        assert get_message_count(snapshot) == get_message_count(ica.core.DB_PATH)
+
+
+def test_use_chat_database_snapshot() -> None:
+    """Should read the same snapshot within nested contexts."""
+    expected_dfs = ica.get_dataframes(contacts=["Jane Fernbrook"], timezone="UTC")
+    with ica.use_chat_database_snapshot() as snapshot:
+        delete_messages()
+        with ica.use_chat_database_snapshot() as nested_snapshot:
+            assert nested_snapshot == snapshot
+            assert ica.core.get_chat_database_path() == snapshot
+            dfs = ica.get_dataframes(contacts=["Jane Fernbrook"], timezone="UTC")
+        assert ica.core.get_chat_database_path() == snapshot
+    assert ica.core.get_chat_database_path() == ica.core.DB_PATH
+    pd.testing.assert_frame_equal(dfs.messages, expected_dfs.messages)
+    pd.testing.assert_frame_equal(dfs.attachments, expected_dfs.attachments)
+
+
+def get_cli_output(cli_args: list[str]) -> str:
+    """Capture the output printed by the `ica` command with the given arguments"""
+    with patch("sys.argv", [cli.__file__, *cli_args]):
+        with redirect_stdout(StringIO()) as out:
+            cli.main()
+    return out.getvalue()
+
+
+@pytest.mark.parametrize(
+    ("cli_args", "snapshot_args"),
+    [
+        (["message_totals", "-c", "Jane Fernbrook"], ["--snapshot"]),
+        (["message_totals", "-c", "Jane Fernbrook"], ["--snapshot-dir", "{tmp_path}"]),
+        (["transcript", "-c", "Jane Fernbrook"], ["--snapshot"]),
+        (["message_totals", "--all-conversations", "-j", "2"], ["--snapshot"]),
+        (
+            ["run", "message_totals,totals_by_day", "-c", "Jane Fernbrook"],
+            ["--snapshot"],
+        ),
+    ],
+)
+@patch("ica.core.snapshot_database", wraps=snapshot_database)
+def test_cli_snapshot(
+    snapshot_database_mock: MagicMock,
+    cli_args: list[str],
+    snapshot_args: list[str],
+    tmp_path: Path,
+) -> None:
+    """Should output the same results when reading a single snapshot."""
+    expected_output = get_cli_output(cli_args)
+    snapshot_database_mock.assert_not_called()
+    assert (
+        get_cli_output(
+            [*cli_args, *(arg.format(tmp_path=tmp_path) for arg in snapshot_args)]
+        )
+        == expected_output
+    )
+    snapshot_database_mock.assert_called_once()
+
+
+@patch("ica.output_results")
+def test_analyzer_snapshot(output_results: MagicMock) -> None:
+    """Should read a snapshot when an analyzer is run directly."""
+    with patch(
+        "sys.argv", [message_totals.__file__, "-c", "Jane Fernbrook", "--snapshot"]
+    ):
+        with patch(
+            "ica.core.snapshot_database", wraps=snapshot_database
+        ) as snapshot_database_mock:
+            message_totals.main()
+    snapshot_database_mock.assert_called_once()
+    assert not output_results.call_args[0][0].empty
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""test the analyzer interface and its shared derived-feature cache"""
+
+import gc
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+
+import ica
+import ica.cli as cli
+import ica.features
+from ica.features import FEATURE_CACHE, FEATURE_REGISTRY
+from tests.conftest import temp_ica_dir
+
+
+def teardown_function() -> None:
+    """Reset CLI state after each test."""
+    cli.did_user_invoke_cli_directly = False
+
+
+def test_feature_computed_once_per_dataset() -> None:
+    """Should compute each feature at most once for the same dataframes."""
+    compute_feature = MagicMock(return_value=42)
+    with patch.dict(FEATURE_REGISTRY, {"answer": compute_feature}):
+        dfs = ica.get_dataframes(contacts=["Jane Fernbrook"])
+        assert ica.get_feature(dfs, "answer") == 42
+        # A new namespace around the same dataframes is the same dataset
+        assert ica.get_feature(ica.DataFrameNamespace(**vars(dfs)), "answer") == 42
+        compute_feature.assert_called_once_with(dfs)
+        ica.get_feature(ica.get_dataframes(contacts=["Jane Fernbrook"]), "answer")
+        assert compute_feature.call_count == 2
+
+
+def test_feature_cache_evicted() -> None:
+    """Should forget the features of a dataset once it no longer exists."""
+    dfs = ica.get_dataframes(contacts=["Jane Fernbrook"])
+    ica.get_feature(dfs, "all_participants")
+    dataset_key = (id(dfs.messages), id(dfs.attachments), id(dfs.handles))
+    assert dataset_key in FEATURE_CACHE
+    del dfs
+    gc.collect()
+    assert dataset_key not in FEATURE_CACHE
+
+
+def test_register_feature() -> None:
+    """Should allow features to be registered and to depend on others."""
+    with patch.dict(FEATURE_REGISTRY):
+
+        @ica.register_feature("longest_message")
+        def get_longest_message(dfs: ica.DataFrameNamespace) -> str:
+            messages = ica.get_feature(dfs, "non_reaction_messages")
+            return messages["text"].loc[messages["text"].str.len().idxmax()]
+
+        dfs = ica.get_dataframes(contacts=["Jane Fernbrook"])
+        assert ica.get_feature(dfs, "longest_message") == max(
+            dfs.messages[~dfs.messages["is_reaction"]]["text"], key=len
+        )
+    assert "longest_message" not in FEATURE_REGISTRY
+
+
+def test_unknown_feature() -> None:
+    """Should raise an error for a feature which has not been registered."""
+    dfs = ica.get_dataframes(contacts=["Jane Fernbrook"])
+    with pytest.raises(ica.FeatureNotFoundError):
+        ica.get_feature(dfs, "nonexistent")
+
+
+@patch(
+    "sys.argv",
+    [
+        cli.__file__,
+        "run",
+        "most_frequent_emojis,most_frequent_emojis --result-count 3",
+        "-c",
+        "Jane Fernbrook",
+    ],
+)
+def test_features_shared_between_analyzers() -> None:
+    """Should compute each feature once for every analyzer in a run."""
+    with patch.dict(
+        FEATURE_REGISTRY,
+        {"emojis": MagicMock(wraps=ica.features.get_emojis)},
+    ):
+        with redirect_stdout(StringIO()):
+            cli.main()
+        FEATURE_REGISTRY["emojis"].assert_called_once()
+
+
+def test_user_analyzer_module() -> None:
+    """Should run a user analyzer which implements the analyzer interface."""
+    analyzer_path = temp_ica_dir / "my_analyzer.py"
+    analyzer_path.write_text(
+        "\n".join(
+            [
+                "import ica",
+                "import pandas as pd",
+                "",
+                'FEATURES = ("all_participants",)',
+                "",
+                "def add_cli_arguments(cli_parser):",
+                '    cli_parser.add_argument("--label", default="participant")',
+                "",
+                "def analyze(dfs, cli_args):",
+                '    participants = ica.get_feature(dfs, "all_participants")',
+                "    df = pd.DataFrame({cli_args.label: participants})",
+                "    return ica.AnalyzerResult(df)",
+            ]
+        )
+    )
+    with patch("ica.output_results") as output_results:
+        with patch(
+            "sys.argv",
+            [
+                cli.__file__,
+                str(analyzer_path),
+                "-c",
+                "Jane Fernbrook",
+                "--label",
+                "who",
+            ],
+        ):
+            cli.main()
+    df: pd.DataFrame = output_results.call_args[0][0]
+    assert df.to_dict(orient="list") == {"who": ["Jane"]}
+
+
+def test_unknown_declared_feature() -> None:
+    """Should raise an error if an analyzer declares an unknown feature."""
+    analyzer_path = temp_ica_dir / "my_analyzer.py"
+    analyzer_path.write_text(
+        'FEATURES = ("nonexistent",)\n\ndef analyze(dfs, cli_args):\n    pass\n'
+    )
+    with patch("sys.argv", [cli.__file__, str(analyzer_path), "-c", "Jane Fernbrook"]):
+        with patch("sys.stderr", new_callable=StringIO) as stderr:
+            with pytest.raises(SystemExit):
+                cli.main()
+    assert (
+        stderr.getvalue().rstrip()
+        == 'No feature named "nonexistent" has been registered'
+    )
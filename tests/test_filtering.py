@@ -10,6 +10,8 @@
 import pytest
 
 import ica
+import ica.core
+from ica.database import READ_PROFILES
 from tests.utils import MockSuccess
 
 
@@ -189,6 +191,43 @@ def test_from_person_them() -> None:
     )
 
 
+def test_from_person_only_decodes_filtered_messages() -> None:
+    """
+    Should filter messages by sender before decoding any of them.
+    """
+    decoded_messages: list[bytes] = []
+
+    def decode_message_attributedbody(data: bytes) -> str:
+        decoded_messages.append(data)
+        return original_decode_message_attributedbody(data)
+
+    original_decode_message_attributedbody = ica.core.decode_message_attributedbody
+    with patch("ica.core.decode_message_attributedbody", decode_message_attributedbody):
+        # The only message without any text (so which must be decoded) is from
+        # Thomas
+        ica.get_dataframes(contacts=["Thomas Riverstone"], from_people=["me"])
+        assert len(decoded_messages) == 0
+        ica.get_dataframes(contacts=["Thomas Riverstone"], from_people=["Thomas"])
+        assert len(decoded_messages) == 1
+
+
+@pytest.mark.parametrize(
+    ("from_people", "expected_count"),
+    [(["me"], 1), (["Jane"], 0), (["me", "Jane"], 1), (["all"], 1)],
+)
+def test_from_person_attachments(from_people: list[str], expected_count: int) -> None:
+    """
+    Should filter attachments (and attachment counts) by sender; the only
+    attachment was sent by me, although its handle is that of the recipient.
+    """
+    dfs = ica.get_dataframes(contacts=["Jane Fernbrook"], from_people=from_people)
+    assert len(dfs.attachments) == expected_count
+    attachment_counts = ica.get_attachment_counts(
+        contacts=["Jane Fernbrook"], from_people=from_people
+    )
+    assert attachment_counts["count"].sum() == expected_count
+
+
 def test_from_person_not_found() -> None:
     """
     Should raise ContactNotFoundError for invalid name.
@@ -236,6 +275,15 @@ def test_from_person_not_found() -> None:
             ["--from-person", "Me", "--from-person", "You"],
             {"from_date": None, "to_date": None, "from_people": ["Me", "You"]},
         ),
+        (
+            ["--read-profile", "tuned"],
+            {
+                "from_date": None,
+                "to_date": None,
+                "from_people": None,
+                "read_profile": READ_PROFILES["tuned"],
+            },
+        ),
     ],
 )
 @patch("ica.get_dataframes")
@@ -260,10 +308,17 @@ def test_filter_passing_in_analyzers(
         with contextlib.suppress(MockSuccess):
             importlib.import_module(f"ica.analyzers.{analyzer_name}").main()
 
+    # attachment_totals counts attachments in SQL rather than loading them
+    analyzer_kwargs = (
+        {"include_attachments": False, "attachment_count_extensions": ("caf", "m4a")}
+        if analyzer_name == "attachment_totals"
+        else {}
+    )
     mock_get_dataframes.assert_called_once_with(
         contacts=["Test User"],
         timezone=None,
-        **expected_kwargs,
+        **{"read_profile": None, **expected_kwargs},
+        **analyzer_kwargs,
     )
 
 
@@ -272,7 +327,7 @@ def test_to_date_exclusive() -> None:
     Test that to_date filtering excludes messages exactly at the boundary. This
     corresponds to the < behavior (half-open interval).
     """
-    # The message with ROWID "ef073cec-fcd5-4fdb-b400-c2f54a7cb974" has timestamp
+    # The message with ROWID 5 has timestamp
     # 726442407346190720, which is exactly 2024-01-08 21:33:27.346190720 UTC
     target_date = "2024-01-08 21:33:27.346190720"
     dfs = ica.get_dataframes(
@@ -283,9 +338,7 @@ def test_to_date_exclusive() -> None:
     assert len(dfs.messages) > 0, "Should return messages before the boundary"
 
     # Filter to find that specific message
-    boundary_msg = dfs.messages[
-        dfs.messages["ROWID"] == "ef073cec-fcd5-4fdb-b400-c2f54a7cb974"
-    ]
+    boundary_msg = dfs.messages[dfs.messages["ROWID"] == 5]
     assert len(boundary_msg) == 0, (
         "Message at exactly to_date boundary should be excluded (< logic)"
     )
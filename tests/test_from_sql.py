@@ -1,12 +1,17 @@
 from contextlib import redirect_stdout
 from io import StringIO
 from pathlib import Path
+from typing import Optional
 from unittest.mock import patch
 
 import duckdb
+import pandas as pd
+import pyarrow as pa
 import pytest
 
+import ica
 import ica.analyzers.from_sql as from_sql
+import ica.core
 
 
 @patch(
@@ -51,3 +56,95 @@ def test_from_sql_error() -> None:
     out = StringIO()
     with redirect_stdout(out), pytest.raises(duckdb.ParserException):
         from_sql.main()
+
+
+def test_sql_connection_tables() -> None:
+    """
+    Should register the messages, attachments, and handles as Arrow tables.
+    """
+
+    dfs = ica.get_dataframes(contacts=["Jane Fernbrook"], timezone="UTC")
+    with ica.get_sql_connection(dfs) as con:
+        for table_name, df in (
+            ("messages", dfs.messages),
+            ("attachments", dfs.attachments),
+            ("handles", dfs.handles),
+        ):
+            ((count,),) = con.execute(f'SELECT COUNT(*) FROM "{table_name}"').fetchall()
+            assert count == len(df)
+            assert isinstance(ica.core.get_arrow_table(df), pa.Table)
+    # Each dataframe is only converted once
+    assert ica.core.get_arrow_table(dfs.handles) is ica.core.get_arrow_table(
+        dfs.handles
+    )
+
+
+def test_arrow_table_fallback() -> None:
+    """
+    Should register a dataframe as-is if Arrow cannot represent it.
+    """
+
+    df = pd.DataFrame({"value": ["one", 2]})
+    assert ica.core.get_arrow_table(df) is df
+
+
+@pytest.mark.parametrize(
+    "session_gap", [None, pd.Timedelta(minutes=1), pd.Timedelta(days=2)]
+)
+def test_message_details_session_ids(session_gap: Optional[pd.Timedelta]) -> None:
+    """
+    Should number the sessions in SQL exactly as pandas does, without computing
+    them in pandas.
+    """
+
+    dfs = ica.get_dataframes(contacts=["Jane Fernbrook"])
+    expected_session_ids = (
+        ica.get_session_ids(dfs)
+        if session_gap is None
+        else ica.get_session_ids(dfs, session_gap)
+    )
+    with patch("ica.sessions.build_session_ids") as build_session_ids:
+        with ica.get_sql_connection(dfs, session_gap=session_gap) as con:
+            df = con.execute('SELECT "ROWID", "session_id" FROM "message_details"').df()
+        build_session_ids.assert_not_called()
+    assert df.set_index("ROWID")["session_id"].sort_index().tolist() == (
+        expected_session_ids.set_axis(dfs.messages["ROWID"]).sort_index().tolist()
+    )
+
+
+def test_message_details_given_session_ids() -> None:
+    """
+    Should use the given session IDs rather than computing them.
+    """
+
+    dfs = ica.get_dataframes(contacts=["Jane Fernbrook"])
+    session_ids = pd.Series(range(len(dfs.messages)), name="session_id")
+    with ica.get_sql_connection(dfs, session_ids=session_ids) as con:
+        ((session_count,),) = con.execute(
+            'SELECT COUNT(DISTINCT "session_id") FROM "message_details"'
+        ).fetchall()
+    assert session_count == len(dfs.messages)
+
+
+@pytest.mark.parametrize("timezone", ["UTC", "America/Los_Angeles", "Asia/Kolkata"])
+def test_message_details(timezone: str) -> None:
+    """
+    Should compute the same helper columns as pandas, in the local timezone.
+    """
+
+    dfs = ica.get_dataframes(contacts=["Jane Fernbrook"], timezone=timezone)
+    with ica.get_sql_connection(dfs) as con:
+        details = con.execute(
+            'SELECT * FROM "message_details" ORDER BY "datetime", "ROWID"'
+        ).df()
+    messages = dfs.messages.sort_values(["datetime", "ROWID"])
+    datetimes = messages["datetime"]
+    assert details["local_date"].dt.date.tolist() == datetimes.dt.date.tolist()
+    assert details["hour"].tolist() == datetimes.dt.hour.tolist()
+    assert details["weekday"].tolist() == datetimes.dt.weekday.tolist()
+    assert (
+        details["word_count"].tolist()
+        == messages["text"].fillna("").str.split().str.len().tolist()
+    )
+    assert details["reaction_type"].notna().tolist() == messages["is_reaction"].tolist()
+    assert details["is_session_start"].sum() == ica.get_session_ids(dfs).nunique()
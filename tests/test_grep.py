@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""test the grep built-in analyzer"""
+
+import re
+import sqlite3
+from contextlib import closing
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+import ica
+import ica.analyzers.grep as grep
+import ica.core
+from ica.message_search import get_search_scope
+
+
+def get_grep_results(*args: str) -> pd.DataFrame:
+    """Run the grep analyzer with the given arguments and return its results"""
+    with patch("ica.output_results") as output_results:
+        with patch("sys.argv", [grep.__file__, "-t", "UTC", *args]):
+            grep.main()
+    return output_results.call_args[0][0]
+
+
+def get_chat_rowids(chat_id: str) -> list[str]:
+    """Retrieve the ROWID of every message in the given chat, in order"""
+    with closing(sqlite3.connect(ica.core.DB_PATH)) as con:
+        return [
+            rowid
+            for (rowid,) in con.execute(
+                "SELECT message_id FROM chat_message_join WHERE chat_id = ?"
+                " ORDER BY message_id",
+                (chat_id,),
+            )
+        ]
+
+
+def test_grep_pattern() -> None:
+    """Should list every non-reaction message which matches the pattern."""
+    df = get_grep_results(r"\bhey\b", "-c", "Jane Fernbrook")
+    assert df.columns.tolist() == ["timestamp", "sender", "message"]
+    messages = ica.get_dataframes(contacts=["Jane Fernbrook"]).messages
+    assert (
+        df["message"].tolist()
+        == messages.loc[
+            ~messages["is_reaction"]
+            & messages["text"].str.contains(r"\bhey\b", case=False),
+            "text",
+        ].tolist()
+    )
+
+
+@pytest.mark.parametrize(
+    ("pattern", "flags"),
+    [
+        ("hey", re.IGNORECASE),
+        ("Hey", 0),
+        ("catch you", re.IGNORECASE),
+        # Only found in the attributedBody of a message
+        ("Catch you later!”", 0),
+        ("CATCH YOU LATER!", re.IGNORECASE),
+        (r"\d+(th|st)", re.IGNORECASE),
+        ("😀", re.IGNORECASE),
+        ("jane|thomas", re.IGNORECASE),
+    ],
+)
+def test_grep_prefilter(pattern: str, flags: int) -> None:
+    """Should find the same messages with or without the SQL prefilter."""
+    cli_args = ica.get_cli_parser().parse_args(["--all-conversations"])
+    with get_search_scope(cli_args) as search_scope:
+        prefiltered = grep.find_matching_messages(
+            search_scope, re.compile(pattern, flags), include_reactions=True
+        )
+        with patch(
+            "ica.analyzers.grep.build_literal_filter_clause", return_value=("", [])
+        ):
+            unfiltered = grep.find_matching_messages(
+                search_scope, re.compile(pattern, flags), include_reactions=True
+            )
+    assert not unfiltered.empty
+    pd.testing.assert_frame_equal(prefiltered, unfiltered)
+
+
+def test_grep_fixed_strings() -> None:
+    """Should treat the pattern as a literal string if specified."""
+    assert (
+        get_grep_results("?", "-F", "-c", "Jane Fernbrook")["message"]
+        .str.contains("?", regex=False)
+        .all()
+    )
+
+
+def test_grep_case_sensitive() -> None:
+    """Should only ignore case unless specified."""
+    assert len(get_grep_results("JANE", "-c", "Jane Fernbrook")) == 1
+    assert get_grep_results("JANE", "-s", "-c", "Jane Fernbrook").empty
+
+
+def test_grep_context() -> None:
+    """Should list the messages around each match in the same chat."""
+    df = get_grep_results("hey", "-c", "Jane Fernbrook", "-B", "2", "-A", "1")
+    assert df.columns.tolist() == [
+        "window",
+        "timestamp",
+        "sender",
+        "is_match",
+        "message",
+    ]
+    rowids = get_chat_rowids("chat-jane-john")
+    with closing(sqlite3.connect(ica.core.DB_PATH)) as con:
+        texts = dict(con.execute("SELECT ROWID, text FROM message"))
+    match_positions = [
+        position
+        for position, rowid in enumerate(rowids)
+        if texts[rowid] in set(df.loc[df["is_match"].eq("Yes"), "message"])
+    ]
+    expected_positions = sorted(
+        {
+            position
+            for match_position in match_positions
+            for position in range(match_position - 2, match_position + 2)
+            if 0 <= position < len(rowids)
+        }
+    )
+    assert sorted(df["message"]) == sorted(
+        texts[rowids[position]].replace("\ufffc", "(attachment)")
+        for position in expected_positions
+    )
+    assert df["window"].min() == 1
+
+
+def test_grep_context_merges_windows() -> None:
+    """Should merge the windows of matches which overlap or adjoin."""
+    # The first message is a reaction (which is never a match) two messages
+    # before the first match
+    df = get_grep_results("e", "-c", "Jane Fernbrook", "-C", "2")
+    assert df["window"].unique().tolist() == [1]
+    assert len(df) == len(get_chat_rowids("chat-jane-john"))
+
+
+def test_grep_all_conversations() -> None:
+    """Should label the participants of each matching message's conversation."""
+    df = get_grep_results("hey", "--all-conversations", "-C", "1")
+    assert df.columns.tolist() == [
+        "window",
+        "timestamp",
+        "participants",
+        "sender",
+        "is_match",
+        "message",
+    ]
+    # Every window lies within a single conversation
+    assert df.groupby("window")["participants"].nunique().eq(1).all()
+
+
+def test_grep_from_person() -> None:
+    """Should only match the messages from the given people."""
+    df = get_grep_results("hey", "--all-conversations", "-p", "me")
+    assert not df.empty
+    assert set(df["sender"]) == {"Me"}
+
+
+def test_grep_invalid_pattern() -> None:
+    """Should report an invalid regular expression."""
+    with pytest.raises(SystemExit):
+        get_grep_results("(hey", "-c", "Jane Fernbrook")
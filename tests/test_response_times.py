@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""test the response_times built-in analyzer"""
+
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+
+import ica
+import ica.analyzers.response_times as response_times
+
+
+@patch("ica.output_results")
+@patch("sys.argv", [response_times.__file__, "-c", "Jane Fernbrook", "-t", "UTC"])
+def test_response_times(output_results: MagicMock) -> None:
+    """Should compute the same reply times as comparing each pair of messages."""
+    response_times.main()
+    df: pd.DataFrame = output_results.call_args[0][0]
+    messages = ica.get_dataframes(contacts=["Jane Fernbrook"], timezone="UTC").messages
+    messages = messages[~messages["is_reaction"]]
+    expected_reply_times: dict[str, list[pd.Timedelta]] = {"Me": [], "Jane": []}
+    previous_message = None
+    for _, message in messages.iterrows():
+        if (
+            previous_message is not None
+            and message["sender_display_name"]
+            != previous_message["sender_display_name"]
+        ):
+            expected_reply_times[message["sender_display_name"]].append(
+                message["datetime"] - previous_message["datetime"]
+            )
+        previous_message = message
+    assert df.index.name == "participant"
+    assert df.index.tolist() == ["Me", "Jane"]
+    for participant, reply_times in expected_reply_times.items():
+        assert df.loc[participant, "replies"] == len(reply_times)
+        assert df.loc[participant, "max_reply_time"] == max(reply_times).round("s")
+        assert df.loc[participant, "median_reply_time"] == (
+            pd.Series(reply_times).median().round("s")
+        )
+
+
+def test_get_replies() -> None:
+    """Should only count messages whose sender differs from the one before."""
+    replies = response_times.get_replies(
+        pd.DataFrame(
+            {
+                "datetime": pd.to_datetime(
+                    [
+                        "2024-01-01 09:00",
+                        "2024-01-01 09:05",
+                        "2024-01-01 10:00",
+                        "2024-01-01 10:30",
+                        "2024-01-01 23:50",
+                        "2024-01-02 00:10",
+                    ]
+                ).tz_localize("America/New_York"),
+                "sender_display_name": ["Me", "Me", "Jane", "Jane", "Me", "Jane"],
+            }
+        )
+    )
+    assert replies.to_dict(orient="list") == {
+        "participant": ["Jane", "Me", "Jane"],
+        "reply_time": [55 * 60, 13 * 60 * 60 + 20 * 60, 20 * 60],
+        "hour": [9, 10, 23],
+    }
+
+
+@patch("ica.output_results")
+def test_response_times_by_hour(output_results: MagicMock) -> None:
+    """Should break down the same replies by the hour of day."""
+    base_args = [response_times.__file__, "-c", "Jane Fernbrook", "-t", "UTC"]
+    with patch("sys.argv", base_args):
+        response_times.main()
+    totals_df: pd.DataFrame = output_results.call_args[0][0]
+    with patch("sys.argv", [*base_args, "--by-hour"]):
+        response_times.main()
+    df: pd.DataFrame = output_results.call_args[0][0]
+    assert df.index.tolist() == list(range(24))
+    assert df["replies_by_Me"].sum() == totals_df.loc["Me", "replies"]
+    assert df["replies_by_Jane"].sum() == totals_df.loc["Jane", "replies"]
+    assert df["max_reply_time_by_Jane"].max() == totals_df.loc["Jane", "max_reply_time"]
+    label_overrides = output_results.call_args[1]["prettified_label_overrides"]
+    assert label_overrides["p90_reply_time_by_Jane"] == "P90 Reply Time By Jane"
+
+
+@pytest.mark.parametrize(
+    "filter_args",
+    [["-p", "me"], ["--from-date", "2030-01-01"]],
+)
+@patch("ica.output_results")
+def test_response_times_by_hour_without_replies(
+    output_results: MagicMock, filter_args: list[str]
+) -> None:
+    """Should output every hour even for participants who never replied."""
+    with patch(
+        "sys.argv",
+        [response_times.__file__, "-c", "Jane Fernbrook", "--by-hour", *filter_args],
+    ):
+        response_times.main()
+    df: pd.DataFrame = output_results.call_args[0][0]
+    assert df.index.tolist() == list(range(24))
+    assert df["replies_by_Jane"].eq(0).all()
+    assert df["median_reply_time_by_Jane"].isna().all()
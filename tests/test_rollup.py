@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""test the daily rollup shared by the built-in analyzers"""
+
+import gc
+
+import pandas as pd
+import pytest
+
+import ica
+from ica.rollup import ROLLUP_CACHE, get_local_period_codes, get_period_starts
+
+
+@pytest.mark.parametrize("timezone", ["UTC", "America/New_York", "Asia/Kolkata"])
+def test_daily_rollup_matches_floor(timezone: str) -> None:
+    """Should count the same messages per local day as flooring each date."""
+    dfs = ica.get_dataframes(contacts=["Thomas Riverstone"], timezone=timezone)
+    expected = (
+        dfs.messages.assign(
+            date=lambda df: df["datetime"].dt.floor("D"),
+            messages=lambda df: ~df["is_reaction"],
+            reactions=lambda df: df["is_reaction"],
+        )
+        .groupby(["date", "sender_display_name"])[["messages", "reactions"]]
+        .sum()
+    )
+    assert ica.get_daily_rollup(dfs).to_dict(orient="index") == expected.to_dict(
+        orient="index"
+    )
+
+
+def test_daily_rollup_dst_midnight() -> None:
+    """Should start a day at the first valid time if midnight is skipped."""
+    datetimes = pd.Series(
+        pd.to_datetime(["2018-11-04 12:00", "2018-11-05 12:00"]).tz_localize(
+            "America/Sao_Paulo"
+        )
+    )
+    dfs = ica.DataFrameNamespace(
+        messages=pd.DataFrame(
+            {
+                "datetime": datetimes,
+                "sender_display_name": ["Me", "Me"],
+                "is_reaction": [False, True],
+            }
+        ),
+        attachments=pd.DataFrame(),
+        handles=pd.DataFrame(),
+    )
+    daily_rollup = ica.get_daily_rollup(dfs)
+    assert daily_rollup.index.get_level_values("date").tolist() == [
+        pd.Timestamp("2018-11-04 01:00", tz="America/Sao_Paulo"),
+        pd.Timestamp("2018-11-05 00:00", tz="America/Sao_Paulo"),
+    ]
+    assert daily_rollup["reactions"].tolist() == [0, 1]
+
+
+def test_daily_rollup_is_cached() -> None:
+    """Should compute the rollup once per messages dataframe."""
+    dfs = ica.get_dataframes(contacts=["Jane Fernbrook"])
+    cache_size = len(ROLLUP_CACHE)
+    ica.get_daily_rollup(dfs)["messages"] = 0
+    assert len(ROLLUP_CACHE) == cache_size + 1
+    # Modifying a returned rollup must not affect the cached rollup
+    assert ica.get_daily_rollup(dfs)["messages"].sum() > 0
+    assert len(ROLLUP_CACHE) == cache_size + 1
+    del dfs
+    gc.collect()
+    assert len(ROLLUP_CACHE) == cache_size
+
+
+@pytest.mark.parametrize("granularity", ["hour", "day", "week", "month", "year"])
+def test_period_codes_round_trip(granularity: str) -> None:
+    """Should convert period codes back to the start of every period."""
+    datetimes = pd.Series(
+        pd.date_range("2023-10-28", "2024-04-02", freq="17min", tz="Europe/London")
+    )
+    period_starts = get_period_starts(
+        get_local_period_codes(datetimes, granularity),
+        granularity,
+        datetimes.dt.tz,
+    )
+    freq = {"hour": "h", "day": "D", "week": "W-SUN", "month": "M", "year": "Y"}
+    expected = (
+        datetimes.dt.tz_localize(None)
+        .dt.to_period(freq[granularity])
+        .dt.start_time.dt.tz_localize(
+            "Europe/London", ambiguous=True, nonexistent="shift_forward"
+        )
+    )
+    assert period_starts.tolist() == expected.tolist()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""test running several analyzers at once via `ica run`"""
+
+import threading
+from collections.abc import Callable
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+
+import ica.analyzers.message_totals as message_totals
+import ica.analyzers.totals_by_day as totals_by_day
+import ica.cli as cli
+import ica.core
+from tests.conftest import temp_ica_dir
+
+
+def teardown_function() -> None:
+    """Reset CLI state after each test."""
+    cli.did_user_invoke_cli_directly = False
+
+
+@patch(
+    "sys.argv",
+    [
+        cli.__file__,
+        "run",
+        "message_totals,totals_by_day,most_frequent_emojis,attachment_totals",
+        "-c",
+        "Jane Fernbrook",
+    ],
+)
+@patch("ica.core.get_messages_dataframe", wraps=ica.core.get_messages_dataframe)
+def test_run_loads_dataframes_once(get_messages_dataframe: MagicMock) -> None:
+    """Should load the conversation once and share it with every analyzer."""
+    with redirect_stdout(StringIO()):
+        cli.main()
+    get_messages_dataframe.assert_called_once()
+
+
+def get_analyzer_output(analyzer_main: Callable[[], None], cli_args: list[str]) -> str:
+    """Capture the output printed by the given analyzer when run on its own"""
+    with patch("sys.argv", [cli.__file__, *cli_args]):
+        with redirect_stdout(StringIO()) as out:
+            analyzer_main()
+    return out.getvalue()
+
+
+@patch(
+    "sys.argv",
+    [cli.__file__, "run", "message_totals,totals_by_day -g month"]
+    + ["-c", "Jane Fernbrook"],
+)
+def test_run_prints_every_analyzer() -> None:
+    """Should print the same results as running each analyzer on its own."""
+    with redirect_stdout(StringIO()) as actual_out:
+        cli.main()
+    cli.did_user_invoke_cli_directly = False
+    assert actual_out.getvalue() == (
+        "# message_totals\n\n{}\n# totals_by_day\n\n{}".format(
+            get_analyzer_output(message_totals.main, ["-c", "Jane Fernbrook"]),
+            get_analyzer_output(
+                totals_by_day.main, ["-c", "Jane Fernbrook", "-g", "month"]
+            ),
+        )
+    )
+
+
+@patch(
+    "sys.argv",
+    [
+        cli.__file__,
+        "run",
+        "message_totals,totals_by_day,totals_by_day -g week",
+        "-c",
+        "Jane Fernbrook",
+        "-o",
+        str(temp_ica_dir / "report.xlsx"),
+    ],
+)
+def test_run_excel_sheets() -> None:
+    """Should write the results of each analyzer to its own sheet."""
+    cli.main()
+    sheets = pd.read_excel(temp_ica_dir / "report.xlsx", sheet_name=None)
+    assert list(sheets.keys()) == ["message_totals", "totals_by_day", "totals_by_day_2"]
+    assert sheets["totals_by_day_2"].columns[0] == "Week"
+
+
+@patch(
+    "sys.argv",
+    [
+        cli.__file__,
+        "run",
+        "message_totals,attachment_totals",
+        "-c",
+        "Jane Fernbrook",
+        "-o",
+        str(temp_ica_dir / "report"),
+        "-f",
+        "json",
+    ],
+)
+def test_run_output_directory() -> None:
+    """Should write the results of each analyzer to its own file."""
+    cli.main()
+    assert sorted(path.name for path in Path(temp_ica_dir / "report").iterdir()) == [
+        "attachment_totals.json",
+        "message_totals.json",
+    ]
+
+
+@patch("sys.argv", [cli.__file__, "run", "message_totals,", "-c", "Jane Fernbrook"])
+@patch("sys.stderr", new_callable=StringIO)
+def test_run_empty_analyzer(stderr: MagicMock) -> None:
+    """Should reject an empty analyzer name."""
+    with pytest.raises(SystemExit):
+        cli.main()
+    assert "empty analyzer" in stderr.getvalue()
+
+
+def get_run_output(cli_args: list[str]) -> str:
+    """Capture the output printed by `ica run` with the given arguments"""
+    with patch("sys.argv", [cli.__file__, "run", *cli_args]):
+        with redirect_stdout(StringIO()) as out:
+            cli.main()
+    return out.getvalue()
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_run_concurrently(executor: str) -> None:
+    """Should print the same results in the same order when run concurrently."""
+    analyzers = "message_totals,transcript,most_frequent_emojis,totals_by_day -g week"
+    common_args = ["-c", "Jane Fernbrook", "-f", "csv"]
+    assert get_run_output(
+        [analyzers, "-j", "3", "--executor", executor, *common_args]
+    ) == get_run_output([analyzers, *common_args])
+
+
+# Each of the analyzers below waits at this barrier, which can only be passed
+# once both analyzers are running at the same time
+BARRIER = threading.Barrier(2, timeout=5)
+
+
+def test_run_analyzers_at_once() -> None:
+    """Should run independent analyzers at the same time."""
+    analyzer_path = temp_ica_dir / "wait_for_other_analyzer.py"
+    analyzer_path.write_text(
+        "\n".join(
+            [
+                "import pandas as pd",
+                "",
+                "import ica",
+                "from tests.test_runner import BARRIER",
+                "",
+                "def analyze(dfs, cli_args):",
+                "    BARRIER.wait()",
+                '    return ica.AnalyzerResult(pd.DataFrame({"passed": [True]}))',
+            ]
+        )
+    )
+    output = get_run_output(
+        [f"{analyzer_path},{analyzer_path}", "-j", "2", "-c", "Jane Fernbrook"]
+    )
+    assert "# wait_for_other_analyzer_2" in output
+
+
+def test_run_timings() -> None:
+    """Should report the number of seconds each analyzer took to run."""
+    get_run_output(
+        [
+            "message_totals,transcript,totals_by_day",
+            "-c",
+            "Jane Fernbrook",
+            "--timings",
+            "-j",
+            "2",
+            "-o",
+            str(temp_ica_dir / "timings_report"),
+        ]
+    )
+    timings = pd.read_csv(temp_ica_dir / "timings_report" / "timings.csv")
+    assert timings["Analyzer"].tolist() == [
+        "Message Totals",
+        "Transcript",
+        "Totals By Day",
+    ]
+    assert timings["Seconds"].ge(0).all()
+
+
+@patch(
+    "sys.argv",
+    [cli.__file__, "run", "message_totals", "-j", "0", "-c", "Jane Fernbrook"],
+)
+@patch("sys.stderr", new_callable=StringIO)
+def test_run_invalid_workers(stderr: MagicMock) -> None:
+    """Should reject a worker count below 1."""
+    with pytest.raises(SystemExit):
+        cli.main()
+    assert "--workers must be at least 1" in stderr.getvalue()
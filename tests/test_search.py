@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""test the full-text search index and the search built-in analyzer"""
+
+import shutil
+import sqlite3
+from contextlib import closing, redirect_stdout
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+
+import ica
+import ica.analyzers.search as search
+import ica.cli as cli
+import ica.core
+from ica.search_index import build_search_index, get_search_index
+from tests.conftest import mock_search_index_path, temp_ica_dir
+
+
+def teardown_function() -> None:
+    """Reset CLI state after each test."""
+    cli.did_user_invoke_cli_directly = False
+
+
+def get_search_results(*args: str) -> pd.DataFrame:
+    """Run the search analyzer with the given arguments and return its results"""
+    with patch("ica.output_results") as output_results:
+        with patch("sys.argv", [search.__file__, "-t", "UTC", *args]):
+            search.main()
+    return output_results.call_args[0][0]
+
+
+@patch("sys.argv", [cli.__file__, "index", "build"])
+def test_index_build() -> None:
+    """Should only index the messages added since the index was last built."""
+    with redirect_stdout(StringIO()) as out:
+        cli.main()
+        cli.main()
+    assert out.getvalue().splitlines() == [
+        "Indexed 38 new messages (38 in total)",
+        "Indexed 0 new messages (38 in total)",
+    ]
+    assert mock_search_index_path.exists()
+
+
+def test_index_update_in_batches() -> None:
+    """Should index new messages one batch at a time, resuming by ROWID."""
+    chat_db_path = temp_ica_dir / "chat_copy.db"
+    shutil.copy(ica.core.DB_PATH, chat_db_path)
+    with closing(sqlite3.connect(chat_db_path)) as chat_con:
+        with get_search_index() as search_index:
+            assert search_index.update(chat_con, batch_size=5) == 38
+            assert search_index.update(chat_con, batch_size=5) == 0
+            # A new message has a greater ROWID than any before it (as ROWIDs
+            # are auto-incrementing)
+            chat_con.execute(
+                "INSERT INTO message (ROWID, text, date, is_from_me, handle_id)"
+                " VALUES (1000, 'Are we still on for tacos?', 0, 1, '')"
+            )
+            chat_con.execute(
+                "INSERT INTO chat_message_join VALUES (1000, 'chat-jane-john')"
+            )
+            assert search_index.update(chat_con, batch_size=5) == 1
+            assert search_index.search("tacos")["chat_id"].tolist() == [
+                "chat-jane-john"
+            ]
+
+
+def test_search_term() -> None:
+    """Should find every message in the conversation containing the word."""
+    build_search_index()
+    df = get_search_results("hey", "-c", "Jane Fernbrook")
+    assert df.columns.tolist() == ["timestamp", "sender", "message"]
+    messages = ica.get_dataframes(contacts=["Jane Fernbrook"]).messages
+    assert (
+        df["message"].tolist()
+        == messages.loc[
+            ~messages["is_reaction"]
+            & messages["text"].str.contains(r"\bhey\b", case=False),
+            "text",
+        ].tolist()
+    )
+    assert df["sender"].tolist() == ["Me", "Jane"]
+
+
+def test_search_phrase_and_prefix() -> None:
+    """Should support phrase and prefix queries."""
+    build_search_index()
+    assert get_search_results('"how\'s your day"', "--all-conversations")[
+        "message"
+    ].tolist() == ["Hey Jane, how's your day going? 😊"]
+    prefix_df = get_search_results("th*", "--all-conversations")
+    assert len(prefix_df) > len(get_search_results("the", "--all-conversations"))
+    assert prefix_df["message"].str.contains(r"\bth", case=False).all()
+    assert prefix_df["timestamp"].is_monotonic_increasing
+
+
+def test_search_all_conversations() -> None:
+    """Should label the participants of each matching message's conversation."""
+    build_search_index()
+    df = get_search_results("th*", "--all-conversations")
+    assert df.columns.tolist() == ["timestamp", "participants", "sender", "message"]
+    assert set(df["participants"]) == {
+        "Daniel Brightingale",
+        "Jane Fernbrook",
+        "Thomas Riverstone",
+    }
+
+
+def test_search_filters() -> None:
+    """Should only find messages from the given senders within the date range."""
+    build_search_index()
+    df = get_search_results("th*", "--all-conversations", "-p", "Thomas")
+    assert set(df["sender"]) == {"Thomas Riverstone"}
+    df = get_search_results("th*", "--all-conversations", "-p", "me")
+    assert set(df["sender"]) == {"Me"}
+    df = get_search_results(
+        "th*",
+        "--all-conversations",
+        "--from-date",
+        "2024-01-12",
+        "--to-date",
+        "2024-01-13",
+    )
+    assert not df.empty
+    assert df["timestamp"].dt.strftime("%Y-%m-%d").eq("2024-01-12").all()
+
+
+def test_search_limit_and_relevance() -> None:
+    """Should list at most the given number of the most relevant messages."""
+    build_search_index()
+    df = get_search_results(
+        "th*", "--all-conversations", "--sort", "relevance", "--limit", "3"
+    )
+    assert len(df) == 3
+
+
+def test_search_without_index() -> None:
+    """Should ask for the index to be built before searching."""
+    with pytest.raises(ica.SearchIndexNotFoundError):
+        get_search_results("hey", "-c", "Jane Fernbrook")
+
+
+def test_search_invalid_query() -> None:
+    """Should report a malformed query."""
+    build_search_index()
+    with pytest.raises(ica.SearchQueryInvalidError):
+        get_search_results("AND AND", "--all-conversations")
+
+
+@patch("sys.argv", [cli.__file__, "search", "hey", "-c", "Jane Fernbrook"])
+@patch("sys.stderr", new_callable=StringIO)
+def test_search_cli_without_index(stderr: MagicMock) -> None:
+    """Should print an error (without a traceback) if there is no index."""
+    with pytest.raises(SystemExit):
+        cli.main()
+    assert "ica index build" in stderr.getvalue()
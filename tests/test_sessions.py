@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""test session segmentation and the sessions built-in analyzer"""
+
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+
+import ica
+import ica.analyzers.from_sql as from_sql
+import ica.analyzers.sessions as sessions
+from ica.sessions import build_session_ids
+
+
+def test_build_session_ids() -> None:
+    """Should start a new session after every gap longer than the threshold."""
+    datetimes = pd.Series(
+        pd.to_datetime(
+            [
+                "2024-01-01 09:00",
+                "2024-01-01 09:59",
+                "2024-01-01 10:59",
+                "2024-01-01 12:00",
+                "2024-01-02 12:00",
+            ]
+        ).tz_localize("UTC"),
+        index=[10, 11, 12, 13, 14],
+    )
+    session_ids = build_session_ids(datetimes, pd.Timedelta(hours=1))
+    assert session_ids.name == "session_id"
+    assert session_ids.index.tolist() == [10, 11, 12, 13, 14]
+    assert session_ids.tolist() == [0, 0, 0, 1, 2]
+
+
+def test_build_session_ids_unsorted() -> None:
+    """Should number sessions chronologically even if messages are unsorted."""
+    datetimes = pd.Series(
+        pd.to_datetime(
+            ["2024-01-02 12:00", "2024-01-01 09:00", "2024-01-01 09:30"]
+        ).tz_localize("UTC")
+    )
+    assert build_session_ids(datetimes, pd.Timedelta(hours=1)).tolist() == [1, 0, 0]
+
+
+def test_build_session_ids_empty() -> None:
+    """Should return no session IDs if there are no messages."""
+    datetimes = pd.Series(pd.DatetimeIndex([], tz="UTC"))
+    assert build_session_ids(datetimes, pd.Timedelta(hours=1)).empty
+
+
+def test_get_session_ids_cached() -> None:
+    """Should compute the session IDs for each messages dataframe only once."""
+    dfs = ica.get_dataframes(contacts=["Jane Fernbrook"])
+    with patch(
+        "ica.sessions.build_session_ids", wraps=build_session_ids
+    ) as build_session_ids_mock:
+        session_ids = ica.get_session_ids(dfs)
+        session_ids[:] = -1
+        assert ica.get_session_ids(dfs).ge(0).all()
+        build_session_ids_mock.assert_called_once()
+        ica.get_session_ids(dfs, pd.Timedelta(minutes=5))
+        assert build_session_ids_mock.call_count == 2
+
+
+@patch("ica.output_results")
+def test_sessions(output_results: MagicMock) -> None:
+    """Should summarize the same sessions that are listed."""
+    base_args = [sessions.__file__, "-c", "Jane Fernbrook", "-t", "UTC"]
+    with patch("sys.argv", [*base_args, "--list-sessions"]):
+        sessions.main()
+    sessions_df: pd.DataFrame = output_results.call_args[0][0]
+    with patch("sys.argv", base_args):
+        sessions.main()
+    df: pd.DataFrame = output_results.call_args[0][0]
+    messages = ica.get_dataframes(contacts=["Jane Fernbrook"]).messages
+    assert sessions_df["messages"].sum() == len(messages)
+    assert sessions_df["start"].is_monotonic_increasing
+    totals = df["total"]
+    assert totals["sessions"] == len(sessions_df)
+    assert (
+        totals["sessions_started_by_me"] + totals["sessions_started_by_jane"]
+        == totals["sessions"]
+    )
+    assert totals["max_session_duration"] == sessions_df["duration"].max()
+
+
+@patch("ica.output_results")
+def test_sessions_gap(output_results: MagicMock) -> None:
+    """Should find fewer sessions with a longer session gap."""
+    base_args = [sessions.__file__, "-c", "Jane Fernbrook", "--list-sessions"]
+    with patch("sys.argv", [*base_args, "-g", "1min"]):
+        sessions.main()
+    short_gap_df: pd.DataFrame = output_results.call_args[0][0]
+    with patch("sys.argv", [*base_args, "-g", "30d"]):
+        sessions.main()
+    long_gap_df: pd.DataFrame = output_results.call_args[0][0]
+    assert len(short_gap_df) > len(long_gap_df) == 1
+
+
+@pytest.mark.parametrize("session_gap", ["soon", "-1h", "0s"])
+@patch("sys.stderr", new_callable=StringIO)
+def test_sessions_invalid_gap(stderr: StringIO, session_gap: str) -> None:
+    """Should reject a session gap which is not a positive duration."""
+    with patch(
+        "sys.argv",
+        [sessions.__file__, "-c", "Jane Fernbrook", f"--session-gap={session_gap}"],
+    ):
+        with pytest.raises(SystemExit):
+            sessions.main()
+    assert f'"{session_gap}" is not a' in stderr.getvalue()
+
+
+@patch("ica.output_results")
+@patch(
+    "sys.argv",
+    [
+        from_sql.__file__,
+        "SELECT session_id, COUNT(*) AS message_count FROM message_details"
+        " GROUP BY session_id ORDER BY session_id",
+        "-c",
+        "Jane Fernbrook",
+    ],
+)
+def test_from_sql_session_id(output_results: MagicMock) -> None:
+    """Should expose the session ID of every message to SQL queries."""
+    from_sql.main()
+    df: pd.DataFrame = output_results.call_args[0][0]
+    dfs = ica.get_dataframes(contacts=["Jane Fernbrook"])
+    assert df["message_count"].tolist() == (
+        dfs.messages.groupby(ica.get_session_ids(dfs)).size().tolist()
+    )
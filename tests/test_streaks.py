@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""test the streaks built-in analyzer"""
+
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+from freezegun import freeze_time
+
+import ica
+import ica.analyzers.streaks as streaks
+
+
+def test_get_runs() -> None:
+    """Should run-length encode a boolean vector."""
+    run_starts, run_lengths, run_values = streaks.get_runs(
+        np.array([True, True, False, True, False, False, False])
+    )
+    assert run_starts.tolist() == [0, 2, 3, 4]
+    assert run_lengths.tolist() == [2, 1, 1, 3]
+    assert run_values.tolist() == [True, False, True, False]
+
+
+def test_get_streaks() -> None:
+    """Should find the longest and current streaks of a daily activity vector."""
+    assert streaks.get_streaks(
+        np.array([False, True, True, True, False, False, True, True])
+    ) == {
+        "longest_streak": 3,
+        "longest_streak_start_index": 1,
+        "current_streak": 2,
+        "longest_gap": 2,
+        "current_gap": 0,
+    }
+
+
+def test_get_streaks_inactive() -> None:
+    """Should report no streaks for a vector without any active days."""
+    assert streaks.get_streaks(np.zeros(4, dtype=bool)) == {
+        "longest_streak": 0,
+        "longest_streak_start_index": -1,
+        "current_streak": 0,
+        "longest_gap": 4,
+        "current_gap": 4,
+    }
+
+
+def get_expected_longest_streak(dates: set[pd.Timestamp]) -> int:
+    """Find the longest run of consecutive dates by checking every date"""
+    longest_streak = 0
+    for date in dates:
+        streak = 0
+        while date + pd.Timedelta(days=streak) in dates:
+            streak += 1
+        longest_streak = max(longest_streak, streak)
+    return longest_streak
+
+
+@patch("ica.output_results")
+@patch("sys.argv", [streaks.__file__, "-c", "Jane Fernbrook", "-t", "UTC"])
+@freeze_time("2024-01-26 9:00:00")
+def test_streaks(output_results: MagicMock) -> None:
+    """Should compute the same streaks as checking every day."""
+    streaks.main()
+    df: pd.DataFrame = output_results.call_args[0][0]
+    messages = ica.get_dataframes(contacts=["Jane Fernbrook"], timezone="UTC").messages
+    assert df.index.tolist() == ["Everyone", "Me", "Jane"]
+    for participant, participant_messages in (
+        ("Everyone", messages),
+        ("Me", messages[messages["is_from_me"]]),
+        ("Jane", messages[~messages["is_from_me"]]),
+    ):
+        dates = set(participant_messages["datetime"].dt.normalize())
+        assert df.loc[participant, "longest_streak"] == (
+            get_expected_longest_streak(dates)
+        )
+        assert df.loc[participant, "current_gap"] == (
+            (pd.Timestamp("2024-01-26", tz="UTC") - max(dates)).days
+        )
+        assert df.loc[participant, "longest_streak_start"] in dates
+        assert df.loc[participant, "longest_streak_end"] in dates
+
+
+@patch("ica.output_results")
+@patch(
+    "sys.argv",
+    [streaks.__file__, "-c", "Jane Fernbrook", "-t", "UTC", "--to-date", "2024-01-12"],
+)
+@freeze_time("2024-01-26 9:00:00")
+def test_streaks_to_date(output_results: MagicMock) -> None:
+    """Should end the current streaks on the day before the end date."""
+    streaks.main()
+    df: pd.DataFrame = output_results.call_args[0][0]
+    messages = ica.get_dataframes(
+        contacts=["Jane Fernbrook"], timezone="UTC", to_date="2024-01-12"
+    ).messages
+    last_date = messages["datetime"].max().normalize()
+    assert df.loc["Everyone", "current_gap"] == (
+        (pd.Timestamp("2024-01-11", tz="UTC") - last_date).days
+    )
+    assert df["current_streak"].gt(0).eq(df["current_gap"].eq(0)).all()
+
+
+@patch("ica.output_results")
+@patch(
+    "sys.argv",
+    [streaks.__file__, "-c", "Jane Fernbrook", "--from-date", "2030-01-01"],
+)
+def test_streaks_no_messages(output_results: MagicMock) -> None:
+    """Should report no streaks if there are no messages."""
+    streaks.main()
+    df: pd.DataFrame = output_results.call_args[0][0]
+    assert df["longest_streak"].eq(0).all()
+    assert df["longest_gap"].eq(0).all()
+    assert df["longest_streak_start"].isna().all()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""test the text-processing utilities shared by the built-in analyzers"""
+
+import re
+from typing import Optional
+
+import emoji
+import pandas as pd
+import pytest
+
+from ica.text import (
+    PhraseMatcher,
+    get_emoji_occurrences,
+    get_emoji_pattern,
+    get_link_occurrences,
+    get_required_literal,
+)
+
+SAMPLE_TEXTS = [
+    "hey hey, they said hey",
+    "Hahaha HA ha",
+    "aaaa",
+    "reminds me of the time you reminded me",
+    "",
+]
+
+
+@pytest.mark.parametrize(
+    ("phrases", "use_regex", "case_sensitive"),
+    [
+        (["hey", "he", "ha", "aa", "reminds me"], False, False),
+        (["hey", "Ha", "aa"], False, True),
+        (["h[ae]", r"\bme\b", "a+", "(ha)+"], True, False),
+        ([r"(a)\1", "ha"], True, False),
+        ([" ", "?", ""], False, False),
+    ],
+)
+def test_phrase_matcher_matches_str_count(
+    phrases: list[str], use_regex: bool, case_sensitive: bool
+) -> None:
+    """Should produce the same counts as counting each phrase separately."""
+    matcher = PhraseMatcher(phrases, use_regex=use_regex, case_sensitive=case_sensitive)
+    flags = 0 if case_sensitive else re.IGNORECASE
+    for text in SAMPLE_TEXTS:
+        assert matcher.count_phrases(text) == [
+            len(re.findall(phrase if use_regex else re.escape(phrase), text, flags))
+            for phrase in phrases
+        ]
+
+
+@pytest.mark.parametrize(
+    ("pattern", "literal"),
+    [
+        ("reminds me", "reminds me"),
+        (r"\bhey\b", "hey"),
+        ("remind(s|ed) me", "remind"),
+        ("h(ey)+", "ey"),
+        ("ha(ha)?", "ha"),
+        ("a.*reminded", "reminded"),
+        ("hey|you", None),
+        ("hey|ha", "h"),
+        ("a(?i:hey)", "a"),
+        (r"\w+", None),
+        ("(unclosed", None),
+    ],
+)
+def test_required_literal(pattern: str, literal: Optional[str]) -> None:
+    """Should find the longest literal which every match must contain."""
+    assert get_required_literal(pattern) == literal
+    for text in SAMPLE_TEXTS:
+        for match in re.finditer(pattern, text) if literal else ():
+            assert literal in match.group()
+
+
+def test_phrase_matcher_overlapping_phrases() -> None:
+    """Should count phrases which overlap one another independently."""
+    matcher = PhraseMatcher(["hey", "he", "ey"])
+    assert matcher.count_phrases("hey") == [1, 1, 1]
+
+
+def test_phrase_matcher_hits() -> None:
+    """Should only report the (message, phrase) pairs with occurrences."""
+    matcher = PhraseMatcher(["hey", "ha"])
+    hits = matcher.get_phrase_hits(pd.Series(["hey hey", None, "haha", "nope"]))
+    assert hits.to_dict(orient="records") == [
+        {"position": 0, "phrase_index": 0, "count": 2},
+        {"position": 2, "phrase_index": 1, "count": 2},
+    ]
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Perfect, thanks man! 👍👍🏻👍🏼👍🏽👍🏾👍🏿",
+        "coding 👨‍💻 and ☺️ and ☺ 🇺🇸🇬🇧",
+        "non-standard 👍‍🔥 sequence and keycap 1️⃣ #",
+        "🏃🏾‍♂️🕵‍♂️ 🏳️‍🌈 🏴‍☠️",
+        "no emoji here",
+    ],
+)
+def test_emoji_pattern_matches_emoji_package(text: str) -> None:
+    """Should find the same emojis as the emoji package."""
+    assert get_emoji_pattern().findall(text) == [
+        item["emoji"] for item in emoji.emoji_list(text)
+    ]
+
+
+def test_emoji_occurrences() -> None:
+    """Should extract emojis by message, with skin tones removed."""
+    emojis = get_emoji_occurrences(pd.Series(["👍🏻 hi 🍎", None, "nope", "🍎"]))
+    assert list(emojis.items()) == [(0, "👍"), (0, "🍎"), (3, "🍎")]
+
+
+def test_link_occurrences() -> None:
+    """Should extract every link by message, with normalized domains."""
+    links = get_link_occurrences(
+        pd.Series(
+            [
+                "see https://WWW.YouTube.com/watch?v=1 and http://youtu.be/2",
+                None,
+                "no links",
+                "https://open.spotify.com/track/3",
+            ]
+        )
+    )
+    assert list(links.index) == [0, 0, 3]
+    assert list(links["domain"]) == ["youtube.com", "youtu.be", "open.spotify.com"]
+    assert links["url"].iloc[1] == "http://youtu.be/2"
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""test the conversion of UTC timestamps to local wall times"""
+
+import gc
+import sqlite3
+import zoneinfo
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import ica
+import ica.core
+from ica.timestamps import (
+    LOCAL_CODE_CACHE,
+    get_local_codes,
+    get_local_wall_ns,
+    get_wall_datetimes,
+)
+
+
+@pytest.mark.parametrize(
+    "timezone",
+    [
+        "UTC",
+        "America/New_York",
+        # Daylight saving time shifts the clock by only 30 minutes
+        "Australia/Lord_Howe",
+        # The UTC offset is not a whole number of hours
+        "Asia/Kathmandu",
+        # The timezone skipped an entire day in 2011
+        "Pacific/Apia",
+    ],
+)
+@pytest.mark.parametrize("make_tz", [str, zoneinfo.ZoneInfo])
+def test_local_wall_ns_matches_pandas(timezone: str, make_tz: type) -> None:
+    """Should compute the same local wall times as pandas."""
+    utc_ns = np.sort(
+        np.random.default_rng(0).integers(
+            pd.Timestamp("1990-01-01").value, pd.Timestamp("2030-01-01").value, 10_000
+        )
+    )
+    datetimes = (
+        pd.DatetimeIndex(utc_ns).tz_localize("UTC").tz_convert(make_tz(timezone))
+    )
+    np.testing.assert_array_equal(
+        get_local_wall_ns(utc_ns, datetimes.tz), datetimes.tz_localize(None).asi8
+    )
+
+
+def test_local_wall_ns_around_transition() -> None:
+    """Should switch UTC offsets at the exact second of each transition."""
+    datetimes = pd.DatetimeIndex(
+        ["2024-03-10 06:59:59", "2024-03-10 07:00:00"]
+    ).tz_localize("UTC")
+    assert (
+        get_local_wall_ns(datetimes.asi8, "America/New_York").tolist()
+        == pd.DatetimeIndex(
+            ["2024-03-10 01:59:59", "2024-03-10 03:00:00"]
+        ).asi8.tolist()
+    )
+
+
+def test_wall_datetimes_missing() -> None:
+    """Should keep missing datetimes missing when removing the timezone."""
+    datetimes = pd.Series(
+        [pd.Timestamp("2024-07-01 12:00", tz="America/New_York"), pd.NaT],
+        dtype="datetime64[ns, America/New_York]",
+    )
+    wall_datetimes = get_wall_datetimes(datetimes)
+    assert wall_datetimes[0] == pd.Timestamp("2024-07-01 12:00")
+    assert pd.isna(wall_datetimes[1])
+
+
+@pytest.mark.parametrize("timezone", ["UTC", "America/New_York", "Asia/Kolkata"])
+def test_messages_datetimes(timezone: str) -> None:
+    """Should convert the date of every message to the given timezone."""
+    messages = ica.get_dataframes(
+        contacts=["Thomas Riverstone"], timezone=timezone
+    ).messages
+    with closing(sqlite3.connect(ica.core.DB_PATH)) as con:
+        dates = dict(con.execute("SELECT ROWID, date FROM message"))
+    assert messages["datetime"].dt.tz is not None
+    assert messages["datetime"].tolist() == [
+        pd.Timestamp(
+            dates[rowid] // 1_000_000_000 + 978_307_200, unit="s", tz="UTC"
+        ).tz_convert(timezone)
+        for rowid in messages["ROWID"]
+    ]
+
+
+@pytest.mark.parametrize("granularity", ["hour", "day"])
+def test_local_codes(granularity: str) -> None:
+    """Should number the local hour or day of every message since 1970."""
+    messages = ica.get_dataframes(
+        contacts=["Thomas Riverstone"], timezone="America/New_York"
+    ).messages
+    assert (
+        get_local_codes(messages, granularity).tolist()
+        == (
+            messages["datetime"]
+            .dt.tz_localize(None)
+            .dt.floor("h" if granularity == "hour" else "D")
+            .astype("int64")
+            // (3_600 if granularity == "hour" else 86_400)
+            // 1_000_000_000
+        ).tolist()
+    )
+
+
+def test_local_codes_cached() -> None:
+    """Should compute the local codes once per messages dataframe."""
+    messages = ica.get_dataframes(contacts=["Jane Fernbrook"]).messages
+    cache_size = len(LOCAL_CODE_CACHE)
+    hour_codes = get_local_codes(messages, "hour")
+    assert len(LOCAL_CODE_CACHE) == cache_size + 1
+    # Modifying the returned codes should not affect the cached codes
+    hour_codes[:] = 0
+    assert not np.array_equal(get_local_codes(messages, "hour"), hour_codes)
+    assert len(LOCAL_CODE_CACHE) == cache_size + 1
+    del messages
+    gc.collect()
+    assert len(LOCAL_CODE_CACHE) == cache_size
+
+
+def test_local_codes_invalid_granularity() -> None:
+    """Should reject any granularity other than hour or day."""
+    messages = ica.get_dataframes(contacts=["Jane Fernbrook"]).messages
+    with pytest.raises(ValueError):
+        get_local_codes(messages, "week")
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""test the persistent inverted token index"""
+
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+
+import ica
+import ica.analyzers.count_phrases as count_phrases
+from ica.text import PhraseMatcher
+from ica.token_index import get_token_index
+from tests.conftest import mock_token_index_path
+
+
+def get_messages(contact: str) -> pd.DataFrame:
+    """Retrieve the non-reaction messages for the given contact"""
+    dfs = ica.get_dataframes(contacts=[contact])
+    return dfs.messages[~dfs.messages["is_reaction"]]
+
+
+def test_update_is_incremental() -> None:
+    """Should only index messages which have not already been indexed."""
+    messages = get_messages("Jane Fernbrook")
+    with get_token_index() as token_index:
+        assert token_index.update(messages.iloc[:3]) == 3
+        assert token_index.update(messages) == len(messages) - 3
+        assert token_index.update(messages) == 0
+    assert mock_token_index_path.exists()
+
+
+@pytest.mark.parametrize(
+    ("phrases", "case_sensitive", "whole_words"),
+    [
+        (["hey", "reminds me", "🤣", "?"], False, False),
+        (["Hey", "you"], True, False),
+        (["hey", "the", "reminds me"], False, True),
+    ],
+)
+def test_phrase_hits_match_full_scan(
+    phrases: list[str], case_sensitive: bool, whole_words: bool
+) -> None:
+    """Should report the same hits as scanning every message."""
+    messages = get_messages("Thomas Riverstone")
+    matcher = PhraseMatcher(
+        phrases, case_sensitive=case_sensitive, whole_words=whole_words
+    )
+    with get_token_index() as token_index:
+        token_index.update(messages)
+        assert token_index.get_phrase_hits(messages, matcher).to_dict(
+            orient="records"
+        ) == matcher.get_phrase_hits(messages["text"]).to_dict(orient="records")
+
+
+def test_phrase_hits_match_full_scan_non_ascii() -> None:
+    """
+    Should match words case-insensitively exactly as a full scan does, even
+    where str.casefold() would equate different words (e.g. "Straße" and
+    "strasse").
+    """
+    texts = [
+        "Straße STRASSE strasse",
+        "\ufb01ne \ufb01ne fine",
+        "ΟΔΟΣ οδος",
+        "thıs THIS İstanbul istanbul",
+        "ſtop STOP",
+    ]
+    messages = pd.DataFrame(
+        {
+            "ROWID": range(1, len(texts) + 1),
+            "text": texts,
+            "sender_handle": None,
+            "is_from_me": True,
+            "datetime": pd.to_datetime(range(len(texts)), unit="s", utc=True),
+        }
+    )
+    matcher = PhraseMatcher(
+        [
+            "strasse",
+            "Straße",
+            "fine",
+            "\ufb01ne",
+            "οδος",
+            "this",
+            "istanbul",
+            "stop",
+            "fine \ufb01ne",
+        ],
+        whole_words=True,
+    )
+    with get_token_index() as token_index:
+        token_index.update(messages)
+        assert token_index.get_phrase_hits(messages, matcher).to_dict(
+            orient="records"
+        ) == matcher.get_phrase_hits(messages["text"]).to_dict(orient="records")
+
+
+def test_update_reindexes_edited_messages() -> None:
+    """Should index a message again once its text has been edited."""
+    messages = get_messages("Thomas Riverstone")
+    matcher = PhraseMatcher(["tacos"], whole_words=True)
+    with get_token_index() as token_index:
+        token_index.update(messages)
+        edited_messages = messages.assign(
+            text=messages["text"].where(
+                messages["ROWID"] != messages["ROWID"].iloc[0], "Tacos tonight?"
+            )
+        )
+        assert token_index.update(edited_messages) == 1
+        assert token_index.update(edited_messages) == 0
+        assert token_index.get_phrase_hits(edited_messages, matcher).to_dict(
+            orient="records"
+        ) == [{"position": 0, "phrase_index": 0, "count": 1}]
+        # Reverting the edit removes the words of the edited message again
+        assert token_index.update(messages) == 1
+        assert token_index.get_phrase_hits(messages, matcher).empty
+
+
+def test_outdated_index_is_rebuilt() -> None:
+    """Should rebuild an index recorded with an older version."""
+    messages = get_messages("Jane Fernbrook")
+    with get_token_index() as token_index:
+        token_index.update(messages)
+        token_index.con.execute("PRAGMA user_version = 0")
+        token_index.con.commit()
+    with get_token_index() as token_index:
+        assert token_index.update(messages) == len(messages)
+
+
+def test_candidate_rowids_within_words() -> None:
+    """Should consider words which contain a phrase's words as candidates."""
+    messages = pd.DataFrame(
+        {
+            "ROWID": [1, 2, 3],
+            "text": ["they said so", "hey there", "nope"],
+            "sender_handle": [None, "+12234567890", "+12234567890"],
+            "is_from_me": [True, False, False],
+            "datetime": pd.to_datetime([1, 2, 3], unit="s", utc=True),
+        }
+    )
+    with get_token_index() as token_index:
+        token_index.update(messages)
+        assert token_index.get_candidate_rowids("hey") == {1, 2}
+        assert token_index.get_candidate_rowids("hey", whole_words=True) == {2}
+        assert token_index.get_candidate_rowids("!!") is None
+
+
+@patch("ica.output_results")
+def test_count_phrases_use_index(output_results: MagicMock) -> None:
+    """Should produce identical phrase counts with and without the index."""
+    cli_args = [count_phrases.__file__, "hey", "🤣", "-c", "Thomas Riverstone"]
+    with patch("sys.argv", cli_args):
+        count_phrases.main()
+    expected_df: pd.DataFrame = output_results.call_args[0][0]
+    # Run twice so that the second run reads from the persisted index
+    for _ in range(2):
+        with patch("sys.argv", [*cli_args, "--use-index"]):
+            count_phrases.main()
+        df: pd.DataFrame = output_results.call_args[0][0]
+        assert df.to_dict(orient="index") == expected_df.to_dict(orient="index")
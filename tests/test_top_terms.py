@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""test the top_words and top_ngrams built-in analyzers"""
+
+from collections import Counter
+from io import StringIO
+from types import ModuleType
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import ica
+import ica.analyzers.top_ngrams as top_ngrams
+import ica.analyzers.top_words as top_words
+from ica.text import tokenize
+from ica.top_terms import STOP_WORDS, TermSketch, get_ngrams
+
+
+def get_expected_counts(ngram_size: int, stop_words: frozenset = STOP_WORDS) -> Counter:
+    """Count every n-gram in Jane's conversation one message at a time"""
+    messages = ica.get_dataframes(contacts=["Jane Fernbrook"]).messages
+    counts: Counter = Counter()
+    for text in messages[~messages["is_reaction"]]["text"]:
+        words = tokenize(text)
+        for start in range(len(words) - ngram_size + 1):
+            ngram = words[start : start + ngram_size]
+            if not all(word in stop_words for word in ngram):
+                counts[" ".join(ngram)] += 1
+    return counts
+
+
+def test_get_ngrams() -> None:
+    """Should only combine consecutive words within the same text."""
+    ngrams = get_ngrams(
+        pd.Series(["The quick fox", "of the", "Jumps"], index=[4, 5, 6]),
+        ngram_size=2,
+        stop_words={"the", "of"},
+    )
+    assert ngrams.tolist() == ["the quick", "quick fox"]
+    assert ngrams.index.tolist() == [4, 4]
+
+
+def test_term_sketch_bounds() -> None:
+    """Should never underestimate a tracked term or miss a frequent term."""
+    rng = np.random.default_rng(0)
+    terms = pd.Series(rng.zipf(1.5, 20_000).astype(str))
+    senders = pd.Series(rng.choice(["Me", "Jane"], len(terms)))
+    sketch = TermSketch(["Me", "Jane"], capacity=50)
+    for chunk_start in range(0, len(terms), 1_000):
+        sketch.update(
+            terms[chunk_start : chunk_start + 1_000],
+            senders[chunk_start : chunk_start + 1_000],
+        )
+    true_counts = terms.value_counts()
+    assert len(sketch.counts) == 50
+    assert sketch.floor > 0
+    tracked_true_counts = true_counts.reindex(sketch.counts.index, fill_value=0)
+    assert (sketch.counts["count"] >= tracked_true_counts).all()
+    assert (
+        sketch.counts["count"] - sketch.counts["overcount"] <= tracked_true_counts
+    ).all()
+    untracked_true_counts = true_counts.drop(sketch.counts.index)
+    assert (untracked_true_counts <= sketch.floor).all()
+    # The most frequent terms are so frequent that they are counted exactly
+    top_terms = sketch.get_top_terms(5)
+    assert top_terms.index.tolist() == true_counts.index[:5].tolist()
+    assert top_terms["count"].tolist() == true_counts.iloc[:5].tolist()
+
+
+def test_term_sketch_exact() -> None:
+    """Should count every term exactly if it has no capacity."""
+    sketch = TermSketch(["Me", "Jane"])
+    sketch.update(pd.Series(["a", "b", "a"]), pd.Series(["Me", "Jane", "Jane"]))
+    sketch.update(pd.Series(["c", "a"]), pd.Series(["Me", "Me"]))
+    assert sketch.get_top_terms(10).to_dict(orient="index") == {
+        "a": {"count": 3, "overcount": 0, "Me": 2, "Jane": 1},
+        "b": {"count": 1, "overcount": 0, "Me": 0, "Jane": 1},
+        "c": {"count": 1, "overcount": 0, "Me": 1, "Jane": 0},
+    }
+
+
+@patch("ica.output_results")
+@patch(
+    "sys.argv",
+    [top_words.__file__, "-c", "Jane Fernbrook", "--result-count", "1000"],
+)
+def test_top_words(output_results: MagicMock) -> None:
+    """Should count every word (except stop words) exactly."""
+    top_words.main()
+    df: pd.DataFrame = output_results.call_args[0][0]
+    assert df.index.name == "word"
+    assert df.columns.tolist() == ["count", "count_from_me", "count_from_Jane"]
+    assert df["count"].to_dict() == dict(get_expected_counts(1))
+    assert (df["count"] == df["count_from_me"] + df["count_from_Jane"]).all()
+    assert df["count"].is_monotonic_decreasing
+
+
+@patch("ica.output_results")
+@patch(
+    "sys.argv",
+    [
+        top_words.__file__,
+        "-c",
+        "Jane Fernbrook",
+        "--include-stop-words",
+        "--stop-word",
+        "Sounds",
+    ],
+)
+def test_top_words_stop_words(output_results: MagicMock) -> None:
+    """Should only exclude the given stop words."""
+    top_words.main()
+    df: pd.DataFrame = output_results.call_args[0][0]
+    expected_counts = get_expected_counts(1, stop_words=frozenset(("sounds",)))
+    assert len(df) == 10
+    assert "sounds" not in df.index
+    assert df["count"].to_dict() == {word: expected_counts[word] for word in df.index}
+    assert df["count"].iloc[0] == max(expected_counts.values())
+
+
+@patch("ica.output_results")
+@patch("ica.top_terms.TOP_TERMS_CHUNK_SIZE", 2)
+@patch(
+    "sys.argv",
+    [
+        top_words.__file__,
+        "-c",
+        "Jane Fernbrook",
+        "--include-stop-words",
+        "--memory-budget",
+        "0",
+        "--result-count",
+        "5",
+    ],
+)
+def test_top_words_memory_budget(output_results: MagicMock) -> None:
+    """Should estimate counts once the terms no longer fit in memory."""
+    top_words.main()
+    df: pd.DataFrame = output_results.call_args[0][0]
+    expected_counts = get_expected_counts(1, stop_words=frozenset())
+    assert len(df) == 5
+    assert "max_overcount" in df.columns
+    for word, row in df.iterrows():
+        assert row["count"] - row["max_overcount"] <= expected_counts[word]
+        assert expected_counts[word] <= row["count"]
+
+
+@patch("ica.output_results")
+@patch(
+    "sys.argv",
+    [
+        top_ngrams.__file__,
+        "-c",
+        "Jane Fernbrook",
+        "-n",
+        "3",
+        "--result-count",
+        "1000",
+        "--exact",
+    ],
+)
+def test_top_ngrams(output_results: MagicMock) -> None:
+    """Should count every n-gram of the given size exactly."""
+    top_ngrams.main()
+    df: pd.DataFrame = output_results.call_args[0][0]
+    assert df.index.name == "ngram"
+    assert df["count"].to_dict() == dict(get_expected_counts(3))
+    assert output_results.call_args[1]["prettified_label_overrides"] == {
+        "count_from_Jane": "Count From Jane"
+    }
+
+
+@pytest.mark.parametrize(
+    ("analyzer", "invalid_args"),
+    [
+        (top_ngrams, ["--ngram-size", "0"]),
+        (top_ngrams, ["-n", "-1"]),
+        (top_words, ["--result-count", "-3"]),
+        (top_ngrams, ["--result-count", "0"]),
+    ],
+)
+@patch("sys.stderr", new_callable=StringIO)
+def test_top_terms_invalid_counts(
+    stderr: StringIO, analyzer: ModuleType, invalid_args: list[str]
+) -> None:
+    """Should reject an n-gram size or result count of less than 1."""
+    with patch("sys.argv", [analyzer.__file__, "-c", "Jane Fernbrook", *invalid_args]):
+        with pytest.raises(SystemExit):
+            analyzer.main()
+    assert "must be at least 1" in stderr.getvalue()
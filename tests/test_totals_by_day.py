@@ -24,3 +24,34 @@ def test_totals_by_day(output_results: MagicMock) -> None:
         .pipe(lambda df: df.set_index(df.index.tz_localize("UTC")))
         .to_dict(orient="index")
     )
+
+
+@patch("ica.output_results")
+def test_totals_by_granularity(output_results: MagicMock) -> None:
+    """Should compute the same totals at every granularity."""
+    base_args = [totals_by_day.__file__, "-c", "Thomas Riverstone", "-t", "UTC"]
+    with patch("sys.argv", base_args):
+        totals_by_day.main()
+    daily_df: pd.DataFrame = output_results.call_args[0][0]
+    for granularity in ("hour", "week", "month", "year"):
+        with patch("sys.argv", [*base_args, "--granularity", granularity]):
+            totals_by_day.main()
+        df: pd.DataFrame = output_results.call_args[0][0]
+        assert df.index.name == granularity
+        assert df.sum().to_dict() == daily_df.sum().to_dict()
+    assert df.index.tolist() == [pd.Timestamp("2024-01-01", tz="UTC")]
+
+
+@patch("ica.output_results")
+@patch(
+    "sys.argv",
+    [totals_by_day.__file__, "-c", "Thomas Riverstone", "-t", "UTC", "--fill-gaps"],
+)
+def test_fill_gaps(output_results: MagicMock) -> None:
+    """Should include the days without any messages."""
+    totals_by_day.main()
+    df: pd.DataFrame = output_results.call_args[0][0]
+    assert df.index.tolist() == list(
+        pd.date_range("2024-01-07", "2024-01-12", freq="D", tz="UTC")
+    )
+    assert df.loc["2024-01-08"].sum() == 0
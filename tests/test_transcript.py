@@ -7,6 +7,7 @@
 import pandas as pd
 import pytest
 
+import ica
 import ica.analyzers.transcript as transcript
 
 
@@ -25,3 +26,88 @@ def test_transcripts(transcript_num: Any, contact: str) -> None:
         assert df.to_dict(orient="records") == pd.read_json(
             f"tests/data/transcript-{transcript_num}.json"
         ).to_dict(orient="records")
+
+
+def get_transcript(*args: str) -> pd.DataFrame:
+    """Run the transcript analyzer with the given arguments and return its results"""
+    with patch("ica.output_results") as output_results:
+        with patch(
+            "sys.argv",
+            [transcript.__file__, "-c", "Thomas Riverstone", "-t", "UTC", *args],
+        ):
+            transcript.main()
+    return output_results.call_args[0][0]
+
+
+def get_sorted_rowids() -> list[str]:
+    """Retrieve the ROWID of every message with Thomas, in order"""
+    return sorted(ica.get_dataframes(contacts=["Thomas Riverstone"]).messages["ROWID"])
+
+
+def test_transcript_tail() -> None:
+    """Should only list the last messages, in the order they were sent."""
+    df = get_transcript("--tail", "5")
+    assert df.columns.tolist() == [
+        "rowid",
+        "timestamp",
+        "sender",
+        "is_reaction",
+        "message",
+    ]
+    assert sorted(df["rowid"]) == get_sorted_rowids()[-5:]
+    assert df["timestamp"].is_monotonic_increasing
+    assert (
+        sorted(get_transcript("--tail", "5", "--offset", "5")["rowid"])
+        == (get_sorted_rowids()[-10:-5])
+    )
+
+
+def test_transcript_limit_and_offset() -> None:
+    """Should list the given page of messages."""
+    assert sorted(get_transcript("--limit", "5")["rowid"]) == get_sorted_rowids()[:5]
+    assert (
+        sorted(get_transcript("--limit", "5", "--offset", "20")["rowid"])
+        == (get_sorted_rowids()[20:])
+    )
+
+
+def test_transcript_since_rowid() -> None:
+    """Should only list the messages added after the given ROWID."""
+    rowids = get_sorted_rowids()
+    df = get_transcript("--since-rowid", str(rowids[9]), "--limit", "3")
+    assert sorted(df["rowid"]) == rowids[10:13]
+
+
+def test_transcript_since_rowid_invalid() -> None:
+    """Should reject a ROWID which is not a whole number."""
+    with pytest.raises(SystemExit):
+        get_transcript("--since-rowid", "abc")
+
+
+def test_transcript_page_from_person() -> None:
+    """Should fill the page with messages from the given people."""
+    df = get_transcript("--tail", "3", "-p", "Thomas")
+    assert df["sender"].tolist() == ["Thomas"] * 3
+
+
+@pytest.mark.parametrize("args", [("--tail", "-1"), ("--offset", "-1")])
+def test_transcript_negative_page(args: tuple[str, str]) -> None:
+    """Should reject a negative page size or offset."""
+    with pytest.raises(SystemExit):
+        get_transcript(*args)
+
+
+def test_iter_transcript_pages() -> None:
+    """Should yield every message exactly once, one page at a time."""
+    pages = list(ica.iter_transcript_pages(contacts=["Thomas Riverstone"], page_size=5))
+    assert [len(page) for page in pages] == [5, 5, 5, 5, 3]
+    assert sorted(pd.concat(pages)["ROWID"]) == get_sorted_rowids()
+    # Every page resumes after the last ROWID of the previous page
+    for page, next_page in zip(pages, pages[1:]):
+        assert page["ROWID"].max() < next_page["ROWID"].min()
+    pages = list(
+        ica.iter_transcript_pages(
+            contacts=["Thomas Riverstone"], page_size=5, from_people=["me"]
+        )
+    )
+    assert all(page["is_from_me"].all() for page in pages)
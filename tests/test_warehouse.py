@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""test the DuckDB warehouse of every message in the chat database"""
+
+import shutil
+import sqlite3
+from contextlib import closing, redirect_stdout
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+
+import ica
+import ica.analyzers.from_sql as from_sql
+import ica.cli as cli
+import ica.core
+from ica.warehouse import build_warehouse, get_warehouse, get_warehouse_connection
+from tests.conftest import mock_warehouse_path, temp_ica_dir
+
+
+def teardown_function() -> None:
+    """Reset CLI state after each test."""
+    cli.did_user_invoke_cli_directly = False
+
+
+def get_warehouse_output(*args: str) -> list[str]:
+    """Capture the lines printed by `ica warehouse` with each of the given commands"""
+    with redirect_stdout(StringIO()) as out:
+        for command in args:
+            with patch("sys.argv", [cli.__file__, "warehouse", command]):
+                cli.main()
+    return out.getvalue().splitlines()
+
+
+def get_from_sql_results(*args: str) -> pd.DataFrame:
+    """Run the from_sql analyzer with the given arguments and return its results"""
+    with patch("ica.output_results") as output_results:
+        with patch("sys.argv", [from_sql.__file__, *args]):
+            from_sql.main()
+    return output_results.call_args[0][0]
+
+
+def test_warehouse_build_and_refresh() -> None:
+    """Should only add the messages added since the warehouse was last built."""
+    assert get_warehouse_output("build", "refresh", "build") == [
+        "Added 38 new messages (38 in total)",
+        "Added 0 new messages (38 in total)",
+        "Added 38 new messages (38 in total)",
+    ]
+    assert mock_warehouse_path.exists()
+
+
+def test_warehouse_refresh_in_batches() -> None:
+    """Should add new messages one batch at a time, resuming by ROWID."""
+    chat_db_path = temp_ica_dir / "chat_copy.db"
+    shutil.copy(ica.core.DB_PATH, chat_db_path)
+    with closing(sqlite3.connect(chat_db_path)) as chat_con:
+        with get_warehouse() as warehouse:
+            assert warehouse.refresh(chat_con, batch_size=5) == 38
+            assert warehouse.refresh(chat_con, batch_size=5) == 0
+            # A new message has a greater ROWID than any before it (as ROWIDs
+            # are auto-incrementing)
+            chat_con.execute(
+                "INSERT INTO message (ROWID, text, date, is_from_me, handle_id)"
+                " VALUES (1000, 'Are we still on for tacos?', 0, 1, '')"
+            )
+            chat_con.execute(
+                "INSERT INTO chat_message_join VALUES (1000, 'chat-jane-john')"
+            )
+            chat_con.commit()
+            assert warehouse.refresh(chat_con, batch_size=5) == 1
+            assert warehouse.con.execute(
+                """
+                SELECT "chat_id" FROM "messages"
+                JOIN "chat_messages" ON "message_id" = "messages"."ROWID"
+                WHERE "text" LIKE '%tacos%'
+                """
+            ).fetchall() == [("chat-jane-john",)]
+            assert warehouse.message_count == 39
+
+
+def test_warehouse_matches_dataframes() -> None:
+    """Should hold the same messages and attachments as the dataframes."""
+    build_warehouse()
+    dfs = ica.get_dataframes(contacts=["Jane Fernbrook"], timezone="UTC")
+    with get_warehouse_connection() as con:
+        messages = con.execute(
+            """
+            SELECT "messages".*
+            FROM "warehouse"."messages"
+            JOIN "warehouse"."chat_messages" ON "message_id" = "messages"."ROWID"
+            JOIN "warehouse"."chats" USING ("chat_id")
+            WHERE "participants" = 'Jane Fernbrook'
+            ORDER BY "datetime", "messages"."ROWID"
+            """
+        ).df()
+        attachments = con.execute(
+            'SELECT * FROM "warehouse"."attachments" ORDER BY "ROWID"'
+        ).df()
+    expected_messages = dfs.messages.sort_values(["datetime", "ROWID"])
+    assert messages["ROWID"].tolist() == expected_messages["ROWID"].tolist()
+    assert messages["text"].tolist() == expected_messages["text"].tolist()
+    assert messages["is_reaction"].tolist() == expected_messages["is_reaction"].tolist()
+    assert messages["datetime"].tolist() == expected_messages["datetime"].tolist()
+    assert set(dfs.attachments["ROWID"]) <= set(attachments["ROWID"])
+
+
+def test_warehouse_handles() -> None:
+    """Should resolve the contact of every handle which belongs to one."""
+    build_warehouse()
+    with get_warehouse_connection() as con:
+        handles = con.execute(
+            'SELECT "identifier", "display_name" FROM "warehouse"."handles"'
+        ).fetchall()
+    assert ("thomas.riverstone@example.com", "Thomas Riverstone") in handles
+
+
+def test_from_sql_warehouse() -> None:
+    """Should query the warehouse alongside the conversation's dataframes."""
+    build_warehouse()
+    df = get_from_sql_results(
+        """
+        SELECT
+            (SELECT COUNT(*) FROM "messages") AS "conversation_count",
+            (SELECT COUNT(*) FROM "warehouse"."messages") AS "warehouse_count"
+        """,
+        "-c",
+        "Jane Fernbrook",
+        "--warehouse",
+    )
+    assert df.iloc[0].tolist() == [11, 38]
+
+
+def test_from_sql_warehouse_all_conversations() -> None:
+    """Should query only the warehouse for every conversation."""
+    build_warehouse()
+    df = get_from_sql_results(
+        """
+        SELECT "participants", COUNT(*) AS "count"
+        FROM "warehouse"."chat_messages"
+        JOIN "warehouse"."chats" USING ("chat_id")
+        GROUP BY ALL
+        ORDER BY "participants"
+        """,
+        "--all-conversations",
+        "--warehouse",
+    )
+    assert df["count"].tolist() == [3, 1, 11, 23]
+
+
+def test_from_sql_without_warehouse() -> None:
+    """Should ask for the warehouse to be built before querying it."""
+    with pytest.raises(ica.WarehouseNotFoundError):
+        get_from_sql_results("SELECT 1", "-c", "Jane Fernbrook", "--warehouse")
+
+
+@patch(
+    "sys.argv",
+    [cli.__file__, "from_sql", "SELECT 1", "-c", "Jane Fernbrook", "--warehouse"],
+)
+@patch("sys.stderr", new_callable=StringIO)
+def test_from_sql_cli_without_warehouse(stderr: MagicMock) -> None:
+    """Should print an error (without a traceback) if there is no warehouse."""
+    with pytest.raises(SystemExit):
+        cli.main()
+    assert "ica warehouse build" in stderr.getvalue()